@@ -0,0 +1,185 @@
+"""
+Typo-tolerant creator search.
+
+On PostgreSQL creators are matched with pg_trgm: the % and <% operators are
+served by GIN trigram indexes on lower(username) and lower(bio), and results
+are ranked by similarity(). Other databases use TrigramIndex, an in-process
+inverted index that splits names into trigrams the same way pg_trgm does,
+so both backends return the same matches for the same input.
+"""
+import heapq
+import re
+import threading
+from collections import Counter
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import User
+
+# pg_trgm's defaults for % and <%
+SIMILARITY_THRESHOLD = 0.3
+WORD_SIMILARITY_THRESHOLD = 0.6
+# A bio match counts for less than a username match
+BIO_WEIGHT = 0.5
+MAX_LIMIT = 20
+# Candidates sharing the most trigrams with the query that are scored exactly
+CANDIDATES = 200
+
+WORD_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def trigrams(text):
+    """Trigrams of every word in ``text``, padded like pg_trgm ("  a", " ab", ..., "yz ")"""
+    grams = set()
+    for word in WORD_RE.findall(text.lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a, b):
+    """pg_trgm similarity(): shared trigrams over all distinct trigrams"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def word_similarity(query, words):
+    """Best similarity between the query and any single word, close to pg_trgm's word_similarity()"""
+    return max((similarity(query, word) for word in words), default=0.0)
+
+
+class TrigramIndex:
+    """Inverted index from trigram to creator IDs"""
+
+    def __init__(self, creators=()):
+        self._postings = {}
+        self._usernames = {}
+        self._bio_words = {}
+        self._lock = threading.Lock()
+        for pk, username, bio in creators:
+            self._add(pk, username, bio)
+
+    def __len__(self):
+        return len(self._usernames)
+
+    def _grams(self, pk):
+        grams = set(self._usernames.get(pk, ()))
+        for word in self._bio_words.get(pk, ()):
+            grams |= word
+        return grams
+
+    def _add(self, pk, username, bio):
+        self._usernames[pk] = trigrams(username)
+        self._bio_words[pk] = [trigrams(word) for word in set(WORD_RE.findall((bio or '').lower()))]
+        for gram in self._grams(pk):
+            self._postings.setdefault(gram, set()).add(pk)
+
+    def _remove(self, pk):
+        for gram in self._grams(pk):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(pk)
+                if not ids:
+                    del self._postings[gram]
+        self._usernames.pop(pk, None)
+        self._bio_words.pop(pk, None)
+
+    def upsert(self, pk, username, bio):
+        with self._lock:
+            self._remove(pk)
+            self._add(pk, username, bio)
+
+    def remove(self, pk):
+        with self._lock:
+            self._remove(pk)
+
+    def search(self, query, limit=10):
+        """(creator ID, score) pairs, best first"""
+        grams = trigrams(query)
+        if not grams:
+            return []
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        scored = []
+        for pk, _ in shared.most_common(CANDIDATES):
+            username_score = similarity(grams, self._usernames.get(pk, set()))
+            bio_score = word_similarity(grams, self._bio_words.get(pk, ()))
+            if username_score >= SIMILARITY_THRESHOLD or bio_score >= WORD_SIMILARITY_THRESHOLD:
+                scored.append((max(username_score, BIO_WEIGHT * bio_score), pk))
+        return [(pk, score) for score, pk in heapq.nlargest(limit, scored)]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = TrigramIndex(
+                    User.objects.filter(is_creator=True, is_active=True)
+                    .values_list('pk', 'username', 'bio')
+                    .iterator(chunk_size=5000)
+                )
+    return _index
+
+
+def sync_creator(user):
+    """Keep the fallback index in step with a saved user (a no-op on PostgreSQL)"""
+    if _index is None:
+        # Built from the database on first use, which will include this user
+        return
+    if user.is_creator and user.is_active:
+        _index.upsert(user.pk, user.username, user.bio)
+    else:
+        _index.remove(user.pk)
+
+
+def remove_creator(pk):
+    if _index is not None:
+        _index.remove(pk)
+
+
+def _postgres_search(query, limit):
+    # Written as raw SQL so the expressions match the trigram indexes exactly
+    score = RawSQL(
+        'GREATEST(similarity(lower(accounts_user.username), lower(%s)), '
+        '%s * word_similarity(lower(%s), lower(accounts_user.bio)))',
+        [query, BIO_WEIGHT, query],
+        output_field=FloatField()
+    )
+    matches = RawSQL(
+        '(lower(accounts_user.username) %% lower(%s) OR lower(%s) <%% lower(accounts_user.bio))',
+        [query, query],
+        output_field=BooleanField()
+    )
+    return list(
+        User.objects.filter(matches, is_creator=True, is_active=True)
+        .annotate(similarity=score)
+        .order_by('-similarity', 'username')[:limit]
+    )
+
+
+def search_creators(query, limit=10):
+    """Creators whose username or bio is similar to ``query``, best first, with a ``similarity`` attribute"""
+    query = query.strip().lstrip('@')
+    limit = min(limit, MAX_LIMIT)
+    if len(query) < 2:
+        return []
+    if connection.vendor == 'postgresql':
+        return _postgres_search(query, limit)
+
+    ranked = get_index().search(query, limit)
+    creators = User.objects.filter(is_creator=True).in_bulk([pk for pk, _ in ranked])
+    results = []
+    for pk, score in ranked:
+        if pk in creators:
+            creators[pk].similarity = score
+            results.append(creators[pk])
+    return results
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from accounts import stats
+
+
+class Command(BaseCommand):
+    help = 'Recount the materialized creator stats and roll the 30-day revenue window forward'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=stats.REPAIR_CHUNK_SIZE,
+            help='Number of creators recounted per query'
+        )
+
+    def handle(self, *args, **options):
+        repaired = stats.repair(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Recounted stats for {repaired} creator(s)'))
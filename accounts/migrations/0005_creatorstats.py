@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_user_is_verified_user_verification_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreatorStats',
+            fields=[
+                ('creator', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('posts_count', models.PositiveIntegerField(default=0)),
+                ('active_subscribers', models.PositiveIntegerField(default=0)),
+                ('likes_received', models.PositiveIntegerField(default=0)),
+                ('lifetime_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('revenue_30d', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Creator Stats',
+                'verbose_name_plural': 'Creator Stats',
+            },
+        ),
+    ]
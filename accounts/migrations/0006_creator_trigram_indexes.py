@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # Partial indexes: only creators are ever searched
+    """
+    CREATE INDEX accounts_user_username_trgm_idx ON accounts_user
+    USING GIN (lower(username) gin_trgm_ops) WHERE is_creator
+    """,
+    """
+    CREATE INDEX accounts_user_bio_trgm_idx ON accounts_user
+    USING GIN (lower(bio) gin_trgm_ops) WHERE is_creator
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS accounts_user_bio_trgm_idx",
+    "DROP INDEX IF EXISTS accounts_user_username_trgm_idx",
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Other databases use the in-process index in accounts.creator_search
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in POSTGRES_FORWARD:
+            schema_editor.execute(statement)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in POSTGRES_REVERSE:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_creatorstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
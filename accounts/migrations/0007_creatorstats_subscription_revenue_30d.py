@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:25
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def populate_subscription_revenue(apps, schema_editor):
+    CreatorStats = apps.get_model('accounts', 'CreatorStats')
+    PaymentHistory = apps.get_model('subscriptions', 'PaymentHistory')
+    revenue = (
+        PaymentHistory.objects.filter(
+            recipient=OuterRef('creator_id'),
+            payment_type='subscription',
+            status='succeeded',
+            created_at__gte=timezone.now() - timedelta(days=30)
+        )
+        .order_by()
+        .values('recipient')
+        .annotate(total=Sum('amount'))
+        .values('total')
+    )
+    CreatorStats.objects.update(subscription_revenue_30d=Coalesce(
+        Subquery(revenue, output_field=DecimalField()), Value(0, output_field=DecimalField())
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_creator_trigram_indexes'),
+        ('subscriptions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='creatorstats',
+            name='subscription_revenue_30d',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(populate_subscription_revenue, migrations.RunPython.noop),
+    ]
@@ -37,3 +37,30 @@ class User(AbstractUser):
     class Meta:
         verbose_name = _('User')
         verbose_name_plural = _('Users')
+
+class CreatorStats(models.Model):
+    """
+    Materialized counters for a creator's profile header and dashboard
+    """
+    creator = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    active_subscribers = models.PositiveIntegerField(default=0)
+    likes_received = models.PositiveIntegerField(default=0)
+    lifetime_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Rolling window, only exact as of the last repair_creator_stats run or payment
+    revenue_30d = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # The dashboard's monthly revenue: subscription payments only, no tips or post purchases
+    subscription_revenue_30d = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Stats for {self.creator_id}"
+    
+    class Meta:
+        verbose_name = _('Creator Stats')
+        verbose_name_plural = _('Creator Stats')
@@ -1,8 +1,13 @@
 from django.dispatch import receiver
 from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
 import stripe
 from django.conf import settings
 from .models import User
+from . import creator_search, stats
+from content.models import Post, Like
+from subscriptions.models import Subscription, PaymentHistory
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
@@ -30,4 +35,94 @@ def create_stripe_customer(sender, user, request, **kwargs):
                 
             except stripe.error.StripeError as e:
                 # Log the error but don't prevent login
-                print(f"Error creating Stripe customer for user {user.username}: {str(e)}") 
\ No newline at end of file
+                print(f"Error creating Stripe customer for user {user.username}: {str(e)}") 
+
+# User fields whose changes post_save receivers act on
+TRACKED_USER_FIELDS = ('username', 'bio', 'is_creator', 'is_active', 'subscription_price', 'date_joined')
+
+
+def remember_fields(instance, fields):
+    # What the row holds in the database, to tell which fields a save changes
+    deferred = instance.get_deferred_fields()
+    instance._stored_fields = {field: getattr(instance, field) for field in fields if field not in deferred}
+
+
+def note_changed_fields(instance, fields, update_fields):
+    """From pre_save: record which of ``fields`` the save changes, for changed_fields()"""
+    stored = instance._stored_fields
+    saved = set(fields) - instance.get_deferred_fields()
+    if update_fields is not None:
+        saved &= set(update_fields)
+    instance._changed_fields = {
+        field for field in saved
+        if instance._state.adding or field not in stored or stored[field] != getattr(instance, field)
+    }
+    stored.update((field, getattr(instance, field)) for field in saved)
+
+
+def changed_fields(instance):
+    """Tracked fields the save being signalled changed"""
+    return instance._changed_fields
+
+
+@receiver(post_init, sender=User)
+def remember_tracked_user_fields(sender, instance, **kwargs):
+    remember_fields(instance, TRACKED_USER_FIELDS)
+
+
+@receiver(pre_save, sender=User)
+def note_changed_user_fields(sender, instance, update_fields=None, **kwargs):
+    note_changed_fields(instance, TRACKED_USER_FIELDS, update_fields)
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust(instance.creator_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    stats.adjust(instance.creator_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Like)
+def count_like_received(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust_likes(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Like)
+def count_like_removed(sender, instance, **kwargs):
+    stats.adjust_likes(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def recount_active_subscribers(sender, instance, **kwargs):
+    # Recounted rather than adjusted: a save may or may not flip `active`
+    stats.recount([instance.creator_id], ['active_subscribers'])
+
+
+@receiver(post_save, sender=PaymentHistory)
+@receiver(post_delete, sender=PaymentHistory)
+def recount_revenue(sender, instance, **kwargs):
+    stats.recount([instance.recipient_id], ['lifetime_revenue', 'revenue_30d', 'subscription_revenue_30d'])
+
+
+CREATOR_SEARCH_FIELDS = {'username', 'bio', 'is_creator', 'is_active'}
+
+
+@receiver(post_save, sender=User)
+def sync_creator_search(sender, instance, created, **kwargs):
+    if created and not instance.is_creator:
+        return
+    if not CREATOR_SEARCH_FIELDS.intersection(changed_fields(instance)):
+        return
+    # The fallback index lives in this process, updating it is cheap
+    transaction.on_commit(lambda: creator_search.sync_creator(instance))
+
+
+@receiver(post_delete, sender=User)
+def remove_creator_search(sender, instance, **kwargs):
+    transaction.on_commit(lambda: creator_search.remove_creator(instance.pk))
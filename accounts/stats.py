@@ -0,0 +1,109 @@
+"""
+Materialized creator statistics.
+
+CreatorStats rows are created on first read and kept current from signal
+handlers: posts and likes are adjusted by one with F() expressions, while
+subscription and payment changes recount the affected column inside a single
+UPDATE. The 30-day revenue window also needs time to pass to be correct, so
+the repair_creator_stats command recounts every row and should run daily.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from content.models import Post
+from subscriptions.models import Subscription, PaymentHistory
+from .models import User, CreatorStats
+
+REVENUE_WINDOW = timedelta(days=30)
+REPAIR_CHUNK_SIZE = 500
+
+
+def _total(queryset, owner_field, aggregate, output_field):
+    """Aggregate ``queryset`` for the creator of the stats row being updated"""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{owner_field: OuterRef('creator_id')})
+            .order_by()
+            .values(owner_field)
+            .annotate(total=aggregate)
+            .values('total'),
+            output_field=output_field
+        ),
+        Value(0, output_field=output_field)
+    )
+
+
+def _recount_expressions(now):
+    succeeded = PaymentHistory.objects.filter(status='succeeded')
+    return {
+        'posts_count': _total(Post.objects.all(), 'creator', Count('pk'), IntegerField()),
+        'active_subscribers': _total(
+            Subscription.objects.filter(active=True), 'creator', Count('pk'), IntegerField()
+        ),
+        'likes_received': _total(Post.objects.all(), 'creator', Sum('like_count'), IntegerField()),
+        'lifetime_revenue': _total(succeeded, 'recipient', Sum('amount'), DecimalField()),
+        'revenue_30d': _total(
+            succeeded.filter(created_at__gte=now - REVENUE_WINDOW), 'recipient', Sum('amount'), DecimalField()
+        ),
+        'subscription_revenue_30d': _total(
+            succeeded.filter(payment_type='subscription', created_at__gte=now - REVENUE_WINDOW),
+            'recipient', Sum('amount'), DecimalField()
+        ),
+    }
+
+
+def recount(creator_ids, fields=None):
+    """Recompute ``fields`` (all by default) for the given creators in one UPDATE"""
+    expressions = _recount_expressions(timezone.now())
+    if fields is not None:
+        expressions = {field: expressions[field] for field in fields}
+    return CreatorStats.objects.filter(creator_id__in=creator_ids).update(
+        updated_at=timezone.now(),
+        **expressions
+    )
+
+
+def adjust(creator_id, field, delta):
+    CreatorStats.objects.filter(creator_id=creator_id).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def adjust_likes(post_id, delta):
+    """Adjust likes_received of the post's creator without loading the post"""
+    CreatorStats.objects.filter(
+        creator_id=Subquery(Post.objects.filter(pk=post_id).values('creator_id'))
+    ).update(likes_received=Greatest(F('likes_received') + delta, 0))
+
+
+def for_creator(creator):
+    """
+    The stats row of ``creator``, computing it if it does not exist yet.
+
+    Use User.objects.select_related('stats') to get it with the creator.
+    """
+    try:
+        return creator.stats
+    except CreatorStats.DoesNotExist:
+        CreatorStats.objects.bulk_create([CreatorStats(creator=creator)], ignore_conflicts=True)
+        recount([creator.pk])
+        stats = CreatorStats.objects.get(creator=creator)
+        creator.stats = stats
+        return stats
+
+
+def repair(chunk_size=REPAIR_CHUNK_SIZE):
+    """Create missing rows and recount every creator's stats, returning how many were written"""
+    creator_ids = list(User.objects.filter(is_creator=True).order_by('pk').values_list('pk', flat=True))
+    repaired = 0
+    for start in range(0, len(creator_ids), chunk_size):
+        chunk = creator_ids[start:start + chunk_size]
+        CreatorStats.objects.bulk_create(
+            [CreatorStats(creator_id=creator_id) for creator_id in chunk],
+            ignore_conflicts=True
+        )
+        repaired += recount(chunk)
+    return repaired
@@ -0,0 +1,97 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from unittest.mock import patch
+from accounts import creator_search
+
+User = get_user_model()
+
+class TrigramIndexTests(TestCase):
+    def test_trigrams_are_padded_like_pg_trgm(self):
+        self.assertEqual(creator_search.trigrams('Cat'), {'  c', ' ca', 'cat', 'at '})
+
+    def test_misspelled_username_matches(self):
+        index = creator_search.TrigramIndex([(1, 'jonathan', ''), (2, 'maria', '')])
+        results = index.search('jonathon')
+        self.assertEqual([pk for pk, _ in results], [1])
+        self.assertGreaterEqual(results[0][1], creator_search.SIMILARITY_THRESHOLD)
+
+    def test_bio_word_matches_rank_below_username_matches(self):
+        index = creator_search.TrigramIndex([
+            (1, 'someone', 'Yoga teacher and photographer'),
+            (2, 'photographer', ''),
+        ])
+        self.assertEqual([pk for pk, _ in index.search('photographr')], [2, 1])
+
+    def test_upsert_and_remove(self):
+        index = creator_search.TrigramIndex([(1, 'alice', '')])
+        index.upsert(1, 'bobby', '')
+        self.assertEqual(index.search('alice'), [])
+        self.assertEqual([pk for pk, _ in index.search('bobby')], [1])
+        index.remove(1)
+        self.assertEqual(index.search('bobby'), [])
+        self.assertEqual(len(index), 0)
+
+
+class CreatorSearchTests(TestCase):
+    def setUp(self):
+        patcher = patch.object(creator_search, '_index', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = Client()
+        self.creator = User.objects.create_user(
+            username='christopher',
+            email='christopher@example.com',
+            password='testpass123',
+            is_creator=True,
+            bio='Landscape photography'
+        )
+        self.fan = User.objects.create_user(
+            username='christophe',
+            email='fan@example.com',
+            password='testpass123'
+        )
+
+    def test_only_creators_are_returned(self):
+        results = creator_search.search_creators('cristopher')
+        self.assertEqual(results, [self.creator])
+        self.assertGreater(results[0].similarity, 0)
+
+    def test_short_queries_return_nothing(self):
+        self.assertEqual(creator_search.search_creators('c'), [])
+
+    def test_index_follows_profile_changes(self):
+        creator_search.get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.creator.username = 'kristina'
+            self.creator.save(update_fields=['username'])
+        self.assertEqual(creator_search.search_creators('christopher'), [])
+        self.assertEqual(creator_search.search_creators('@kristna'), [self.creator])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.fan.is_creator = True
+            self.fan.save()
+        self.assertEqual(creator_search.search_creators('christophe'), [self.fan])
+
+    def test_unrelated_saves_are_not_synced(self):
+        with patch.object(creator_search, 'sync_creator') as sync_creator:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.creator.last_login = timezone.now()
+                self.creator.save()
+            sync_creator.assert_not_called()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.creator.bio = 'Seascapes'
+                self.creator.save()
+            sync_creator.assert_called_once_with(self.creator)
+
+    def test_endpoint(self):
+        response = self.client.get(reverse('creator_search'), {'q': 'christofer'})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([result['username'] for result in results], ['christopher'])
+        self.assertEqual(results[0]['url'], reverse('creator_profile', args=['christopher']))
+
+    def test_search_page_lists_matching_creators(self):
+        response = self.client.get(reverse('search'), {'q': 'christofer'})
+        self.assertContains(response, '@christopher')
@@ -0,0 +1,121 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from accounts import stats
+from accounts.models import CreatorStats
+from content.models import Post, Like
+from subscriptions.models import Subscription, PaymentHistory
+
+User = get_user_model()
+
+class CreatorStatsTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.fan = User.objects.create_user(
+            username='fan',
+            email='fan@example.com',
+            password='testpass123'
+        )
+        self.post = Post.objects.create(creator=self.creator, title='Post', text='Content', visibility='public')
+        Like.objects.create(user=self.fan, post=self.post)
+        self.subscription = Subscription.objects.create(
+            subscriber=self.fan,
+            creator=self.creator,
+            active=True,
+            expires_at=timezone.now() + timedelta(days=30),
+            price=9.99
+        )
+        self.payment = PaymentHistory.objects.create(
+            user=self.fan,
+            recipient=self.creator,
+            payment_type='subscription',
+            amount=Decimal('9.99'),
+            status='succeeded'
+        )
+
+    def _stats(self):
+        return CreatorStats.objects.get(creator=self.creator)
+
+    def test_computed_on_first_read(self):
+        """Test that a missing row is computed from the source tables"""
+        self.assertFalse(CreatorStats.objects.filter(creator=self.creator).exists())
+        creator_stats = stats.for_creator(self.creator)
+        self.assertEqual(creator_stats.posts_count, 1)
+        self.assertEqual(creator_stats.active_subscribers, 1)
+        self.assertEqual(creator_stats.likes_received, 1)
+        self.assertEqual(creator_stats.lifetime_revenue, Decimal('9.99'))
+        self.assertEqual(creator_stats.revenue_30d, Decimal('9.99'))
+
+    def test_kept_current_by_signals(self):
+        """Test that posts, likes, subscriptions and payments update the row"""
+        stats.for_creator(self.creator)
+        post = Post.objects.create(creator=self.creator, title='Second', text='Content', visibility='public')
+        Like.objects.create(user=self.creator, post=post)
+        self.subscription.active = False
+        self.subscription.save()
+        PaymentHistory.objects.create(
+            user=self.fan,
+            recipient=self.creator,
+            payment_type='tip',
+            amount=Decimal('5.00'),
+            status='succeeded'
+        )
+        creator_stats = self._stats()
+        self.assertEqual(creator_stats.posts_count, 2)
+        self.assertEqual(creator_stats.likes_received, 2)
+        self.assertEqual(creator_stats.active_subscribers, 0)
+        self.assertEqual(creator_stats.lifetime_revenue, Decimal('14.99'))
+        self.assertEqual(creator_stats.revenue_30d, Decimal('14.99'))
+        self.assertEqual(creator_stats.subscription_revenue_30d, Decimal('9.99'))
+
+        post.delete()
+        creator_stats = self._stats()
+        self.assertEqual(creator_stats.posts_count, 1)
+        self.assertEqual(creator_stats.likes_received, 1)
+
+    def test_repair(self):
+        """Test that the repair command fixes drift and rolls the revenue window"""
+        stats.for_creator(self.creator)
+        PaymentHistory.objects.filter(pk=self.payment.pk).update(created_at=timezone.now() - timedelta(days=31))
+        CreatorStats.objects.filter(creator=self.creator).update(posts_count=42)
+        out = StringIO()
+        call_command('repair_creator_stats', stdout=out)
+        self.assertIn('1 creator(s)', out.getvalue())
+        creator_stats = self._stats()
+        self.assertEqual(creator_stats.posts_count, 1)
+        self.assertEqual(creator_stats.revenue_30d, Decimal('0'))
+        self.assertEqual(creator_stats.lifetime_revenue, Decimal('9.99'))
+
+    def test_dashboard_revenue_counts_subscriptions_only(self):
+        """Test that tips are left out of the dashboard's monthly revenue"""
+        PaymentHistory.objects.create(
+            user=self.fan,
+            recipient=self.creator,
+            payment_type='tip',
+            amount=Decimal('5.00'),
+            status='succeeded'
+        )
+        self.client.login(username='creator', password='testpass123')
+        response = self.client.get(reverse('creator_dashboard'))
+        self.assertEqual(response.context['monthly_revenue'], Decimal('9.99'))
+
+    def test_profile_header_uses_stats_row(self):
+        """Test that the profile header needs no counting queries"""
+        stats.for_creator(self.creator)
+        response = self.client.get(reverse('creator_profile', args=['creator']))
+        self.assertEqual(response.context['posts_count'], 1)
+        self.assertEqual(response.context['subscribers_count'], 1)
+        with self.assertNumQueries(1):
+            creator = User.objects.select_related('stats').get(username='creator')
+            stats.for_creator(creator)
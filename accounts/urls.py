@@ -10,5 +10,6 @@ urlpatterns = [
     path('profile/edit/', views.edit_profile, name='edit_profile'),
     path('become-creator/', views.become_creator, name='become_creator'),
     path('creator/dashboard/', views.creator_dashboard, name='creator_dashboard'),
+    path('creators/search/', views.search_creators, name='creator_search'),
     path('creator/<str:username>/', views.creator_profile, name='creator_profile'),
 ] 
\ No newline at end of file
@@ -3,17 +3,18 @@ from django.contrib.auth import login, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.conf import settings
+from django.http import JsonResponse
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 import stripe
-from django.db.models import Sum
-from django.utils import timezone
-from datetime import timedelta
 
 from .forms import UserRegistrationForm, UserLoginForm, UserProfileForm, CreatorProfileForm
 from .models import User
-from subscriptions.models import Subscription, PaymentHistory
+from . import creator_search, stats
+from subscriptions.models import Subscription
 from content.models import Post
+from content import entitlements, media_signing
+from content.prefetch import latest_comments
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
@@ -139,16 +140,7 @@ def creator_dashboard(request):
         return redirect('become_creator')
     
     # Get creator stats
-    posts_count = Post.objects.filter(creator=request.user).count()
-    subscribers_count = Subscription.objects.filter(creator=request.user, active=True).count()
-    
-    # Calculate monthly revenue
-    monthly_revenue = PaymentHistory.objects.filter(
-        recipient=request.user,
-        payment_type='subscription',
-        status='succeeded',
-        created_at__gte=timezone.now() - timedelta(days=30)
-    ).aggregate(total=Sum('amount'))['total'] or 0
+    creator_stats = stats.for_creator(request.user)
     
     # Calculate engagement rate (placeholder for now)
     engagement_rate = 0
@@ -163,9 +155,10 @@ def creator_dashboard(request):
     ).distinct().order_by('-date_joined')[:5]
     
     context = {
-        'posts_count': posts_count,
-        'subscribers_count': subscribers_count,
-        'monthly_revenue': monthly_revenue,
+        'stats': creator_stats,
+        'posts_count': creator_stats.posts_count,
+        'subscribers_count': creator_stats.active_subscribers,
+        'monthly_revenue': creator_stats.subscription_revenue_30d,
         'engagement_rate': engagement_rate,
         'recent_posts': recent_posts,
         'recent_subscribers': recent_subscribers,
@@ -174,41 +167,68 @@ def creator_dashboard(request):
 
 def creator_profile(request, username):
     """View a creator's public profile"""
-    creator = get_object_or_404(User, username=username, is_creator=True)
+    # The stats row comes with the creator, so the header needs no extra queries
+    creator = get_object_or_404(User.objects.select_related('stats'), username=username, is_creator=True)
     is_subscribed = False
     subscription = None
     
     # Check if the user is subscribed to this creator
-    if request.user.is_authenticated:
+    if entitlements.is_subscribed(request.user, creator):
+        is_subscribed = True
+        # Only needed for the expiry date in the subscribe box
         subscription = Subscription.objects.filter(
             subscriber=request.user, 
             creator=creator, 
             active=True
         ).first()
-        is_subscribed = subscription is not None
     
-    # Get creator's posts
-    if is_subscribed or request.user == creator:
-        # Show all posts for subscribers or the creator themselves
-        posts = Post.objects.filter(creator=creator).order_by('-created_at')
-    else:
-        # Show only public posts for non-subscribers
-        posts = Post.objects.filter(creator=creator, visibility='public').order_by('-created_at')
+    # Get creator's posts, annotated with what the viewer may see
+    posts = Post.objects.filter(creator=creator)
+    if request.user != creator:
+        # Locked posts are listed as teasers, private ones not at all
+        posts = posts.exclude(visibility='private')
+    posts = entitlements.annotate_access(posts, request.user).order_by('-created_at')
+    posts = posts.select_related('creator').prefetch_related('media_files__variants', latest_comments())
+    media_signing.sign_posts(posts, request.user)
     
     # Get creator stats
-    posts_count = Post.objects.filter(creator=creator).count()
-    subscribers_count = Subscription.objects.filter(creator=creator, active=True).count()
+    creator_stats = stats.for_creator(creator)
     
     context = {
         'creator': creator,
         'posts': posts,
         'is_subscribed': is_subscribed,
         'subscription': subscription,
-        'posts_count': posts_count,
-        'subscribers_count': subscribers_count,
+        'stats': creator_stats,
+        'posts_count': creator_stats.posts_count,
+        'subscribers_count': creator_stats.active_subscribers,
     }
     return render(request, 'accounts/creator_profile.html', context)
 
+def search_creators(request):
+    """Creators whose username or bio resembles the query, for search-as-you-type"""
+    q = request.GET.get('q', '')
+    try:
+        limit = max(1, int(request.GET.get('limit', 10)))
+    except ValueError:
+        limit = 10
+    
+    creators = creator_search.search_creators(q, limit=limit)
+    return JsonResponse({
+        'success': True,
+        'results': [
+            {
+                'id': creator.pk,
+                'username': creator.username,
+                'is_verified': creator.is_verified,
+                'similarity': round(creator.similarity, 3),
+                'profile_picture': creator.profile_picture.url if creator.profile_picture else None,
+                'url': reverse('creator_profile', args=[creator.username]),
+            }
+            for creator in creators
+        ]
+    })
+
 @login_required
 def settings_view(request):
     if request.method == 'POST':
@@ -0,0 +1,79 @@
+"""
+Reference counting for files in content-addressed storage.
+
+Media.file and Message.media are stored in blob_storage, where identical
+uploads share one file. Signals call acquire() when a row starts using a
+file and release() when it stops (deleted, or given another file); the file
+itself is removed once nothing uses it.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from . import transcoding
+from .models import Blob, Media, Message
+from .storage import blob_storage
+
+# File field of each model whose files are reference counted
+BLOB_FIELDS = {
+    Media: 'file',
+    Message: 'media',
+}
+
+
+def acquire(name):
+    if not blob_storage.is_blob(name):
+        # Stored before deduplication; not counted
+        return
+    if Blob.objects.filter(name=name).update(ref_count=F('ref_count') + 1):
+        return
+    try:
+        with transaction.atomic():
+            Blob.objects.create(name=name, size=blob_storage.size(name), ref_count=1)
+    except IntegrityError:
+        # Created concurrently by another upload of the same bytes
+        Blob.objects.filter(name=name).update(ref_count=F('ref_count') + 1)
+
+
+def release(name):
+    if not blob_storage.is_blob(name):
+        return
+    with transaction.atomic():
+        Blob.objects.filter(name=name).update(ref_count=F('ref_count') - 1)
+        unused = Blob.objects.filter(name=name, ref_count__lte=0).exists()
+    if unused:
+        transaction.on_commit(lambda: _delete_unused(name))
+
+
+def _delete_unused(name):
+    with transaction.atomic():
+        # Locked until the file is gone, so an upload of the same bytes can't take a reference in between
+        blob = Blob.objects.select_for_update().filter(name=name).first()
+        if blob is None or blob.ref_count > 0:
+            # Uploaded again in the meantime
+            return
+        blob.delete()
+        # Last: if this fails the row comes back and the file is still there
+        blob_storage.delete(name)
+        transcoding.delete_renditions(name)
+
+
+def import_existing(model, chunk_size=500):
+    """
+    Move files of ``model`` stored before deduplication into blob storage,
+    pointing the rows at the shared copies; returns how many were moved.
+    """
+    field = BLOB_FIELDS[model]
+    rows = model.objects.exclude(**{f'{field}__startswith': f'{blob_storage.prefix}/'}).exclude(**{field: ''})
+    moved = 0
+    for pk, old_name in rows.filter(**{f'{field}__isnull': False}).values_list('pk', field).iterator(chunk_size):
+        if not blob_storage.exists(old_name):
+            continue
+        with blob_storage.open(old_name, 'rb') as original:
+            name = blob_storage.save(old_name, original)
+        with transaction.atomic():
+            # update() rather than save(): no signals, no auto_now bumps
+            model.objects.filter(pk=pk).update(**{field: name})
+            acquire(name)
+        blob_storage.delete(old_name)
+        moved += 1
+    return moved
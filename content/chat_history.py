@@ -0,0 +1,42 @@
+"""
+Pages of chat history.
+
+chat_detail renders the newest PAGE_SIZE messages of a chat; older ones are
+fetched over the chat WebSocket (a "history" message) as the reader scrolls
+up. Pages are keyset paginated on (created_at, id), newest first, so a page
+costs one indexed range scan however far back it is, and messages arriving
+meanwhile don't shift it.
+"""
+from .models import Message
+from .pagination import paginate_keyset
+
+PAGE_SIZE = 50
+
+
+def page(chat_id, cursor=None):
+    """
+    The page of messages of a chat older than ``cursor`` (the newest ones
+    when None) in reading order, and the cursor of the page before it, or
+    None when this page starts the chat. Raises InvalidCursor.
+    """
+    messages = paginate_keyset(
+        Message.objects.filter(chat_id=chat_id).select_related('sender'),
+        cursor=cursor,
+        per_page=PAGE_SIZE,
+        ordering=('-created_at', '-id')
+    )
+    return messages.object_list[::-1], messages.next_cursor
+
+
+def serialize(message):
+    """A stored message with the fields of a live chat message"""
+    return {
+        'message': message.content,
+        'user_id': message.sender_id,
+        'media_url': message.media.url if message.media else None,
+        'media_type': message.media_type,
+        'width': message.width,
+        'height': message.height,
+        'placeholder': message.placeholder,
+        'timestamp': message.created_at.isoformat(),
+    }
@@ -0,0 +1,94 @@
+"""
+Binary framing for chat media sent over the WebSocket.
+
+A file is sent as a series of binary frames, each a 10-byte header followed
+by a chunk of the file:
+
+    transfer id   uint32  chosen by the sender, unique per connection
+    chunk index   uint32  0, 1, 2, ... in order
+    content type  uint8   a key of CONTENT_TYPES
+    flags         uint8   FLAG_FINAL on the last chunk
+
+all big-endian. Chunks are appended to a temporary file as they arrive, so
+memory use is one chunk per transfer whatever the size of the file, and the
+finished file is stored (and deduplicated) by blob_storage.
+"""
+import struct
+import tempfile
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.files import File
+
+from .storage import blob_storage
+
+HEADER = struct.Struct('!IIBB')
+FLAG_FINAL = 0x01
+
+# Content type code: (MIME type, extension, Message.media_type)
+CONTENT_TYPES = {
+    1: ('image/jpeg', '.jpg', 'image'),
+    2: ('image/png', '.png', 'image'),
+    3: ('image/gif', '.gif', 'image'),
+    4: ('image/webp', '.webp', 'image'),
+    16: ('video/mp4', '.mp4', 'video'),
+    17: ('video/quicktime', '.mov', 'video'),
+    18: ('video/webm', '.webm', 'video'),
+}
+
+Frame = namedtuple('Frame', 'transfer_id index content_type final payload')
+
+
+class FrameError(Exception):
+    """A frame that breaks the protocol; the transfer it belongs to is dropped"""
+
+
+def parse_frame(data):
+    if len(data) < HEADER.size:
+        raise FrameError('Frame too short')
+    transfer_id, index, content_type, flags = HEADER.unpack_from(data)
+    if content_type not in CONTENT_TYPES:
+        raise FrameError('Unsupported content type')
+    return Frame(transfer_id, index, content_type, bool(flags & FLAG_FINAL), memoryview(data)[HEADER.size:])
+
+
+def build_frame(transfer_id, index, content_type, payload, final=False):
+    return HEADER.pack(transfer_id, index, content_type, FLAG_FINAL if final else 0) + payload
+
+
+class Transfer:
+    """One file being received, spooled to disk chunk by chunk"""
+
+    def __init__(self, transfer_id, content_type):
+        self.transfer_id = transfer_id
+        self.content_type = content_type
+        self.next_index = 0
+        self.size = 0
+        self._file = tempfile.TemporaryFile(dir=settings.FILE_UPLOAD_TEMP_DIR)
+
+    @property
+    def media_type(self):
+        return CONTENT_TYPES[self.content_type][2]
+
+    def append(self, frame):
+        if frame.index != self.next_index:
+            raise FrameError(f'Expected chunk {self.next_index}, got {frame.index}')
+        if frame.content_type != self.content_type:
+            raise FrameError('Content type changed mid-transfer')
+        self.size += len(frame.payload)
+        if self.size > settings.CHAT_MEDIA_MAX_SIZE:
+            raise FrameError('File too large')
+        self._file.write(frame.payload)
+        self.next_index += 1
+
+    def store(self, name):
+        """Save the received file to blob storage and return its stored name"""
+        extension = CONTENT_TYPES[self.content_type][1]
+        self._file.seek(0)
+        try:
+            return blob_storage.save(f'chat_media/{name}{extension}', File(self._file))
+        finally:
+            self.close()
+
+    def close(self):
+        self._file.close()
@@ -4,13 +4,17 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fanshub.settings')
 import json
 import asyncio
 from channels.generic.websocket import AsyncWebsocketConsumer
+from asgiref.sync import sync_to_async
 from channels.db import database_sync_to_async
+from django.conf import settings
+from . import chat_history, chat_media, inbox
 from .models import Chat, Message
+from .pagination import InvalidCursor
 from accounts.models import User
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ObjectDoesNotExist
-from django.core.files.base import ContentFile
-from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from datetime import timedelta
 
@@ -25,6 +29,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
         try:
             self.chat_id = self.scope['url_route']['kwargs']['chat_id']
             self.room_group_name = f'chat_{self.chat_id}'
+            # Media being received, by transfer id
+            self.transfers = {}
             
             # Join room group
             await self.channel_layer.group_add(
@@ -67,6 +73,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 self.channel_name
             )
             
+            # Half-received files are dropped
+            for transfer_id in list(self.transfers):
+                self.abort_transfer(transfer_id)
+            
             # Start offline cooldown
             asyncio.create_task(self.mark_offline())
         except Exception as e:
@@ -95,53 +105,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
                             }
                         )
                 
-                elif message_type == 'media_message':
-                    # Handle media message
-                    try:
-                        # Decode base64 data
-                        import base64
-                        file_data = base64.b64decode(data['data'])
-                        
-                        # Get file extension from content type
-                        content_type = data.get('content_type', '')
-                        
-                        if content_type.startswith('image/'):
-                            file_extension = '.jpg'  # Default to jpg for images
-                        elif content_type.startswith('video/'):
-                            file_extension = '.mp4'  # Default to mp4 for videos
-                        else:
-                            file_extension = self.get_file_extension(file_data[:4])
-                        
-                        if not file_extension:
-                            return
-                        
-                        # Create a unique filename
-                        filename = f'chat_{self.chat_id}_{timezone.now().strftime("%Y%m%d_%H%M%S")}{file_extension}'
-                        
-                        # Save the file
-                        file_path = await self.save_media_file(file_data, filename)
-                        
-                        # Determine media type
-                        media_type = 'image' if file_extension in ['.jpg', '.jpeg', '.png', '.gif'] else 'video'
-                        
-                        # Save message with media
-                        new_message = await self.save_message('', media_url=file_path, media_type=media_type)
-                        
-                        # Send media message to group
-                        await self.channel_layer.group_send(
-                            self.room_group_name,
-                            {
-                                'type': 'chat_message',
-                                'message': '',
-                                'media_url': file_path,
-                                'media_type': media_type,
-                                'user_id': self.scope['user'].id,
-                                'username': self.scope['user'].username,
-                                'timestamp': new_message.created_at.isoformat()
-                            }
-                        )
-                    except Exception as e:
-                        pass
+                elif message_type == 'history':
+                    # Older messages, as the reader scrolls up
+                    await self.send_history(data.get('cursor'))
                 
                 elif message_type == 'typing':
                     # Handle typing status
@@ -157,40 +123,78 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     )
             
             elif bytes_data:
-                pass
+                # Chat media, as binary frames (see content.chat_media)
+                await self.receive_media_frame(bytes_data)
             
         except json.JSONDecodeError:
             pass
         except Exception as e:
             raise
 
-    def get_file_extension(self, header_bytes):
-        # Check for image signatures
-        if header_bytes.startswith(b'\xFF\xD8\xFF'):  # JPEG
-            return '.jpg'
-        elif header_bytes.startswith(b'\x89PNG\r\n\x1a\n'):  # PNG
-            return '.png'
-        elif header_bytes.startswith(b'GIF87a') or header_bytes.startswith(b'GIF89a'):  # GIF
-            return '.gif'
-        # Check for video signatures
-        elif header_bytes.startswith(b'\x00\x00\x00') or header_bytes.startswith(b'ftyp'):  # MP4
-            return '.mp4'
-        return None
-    
-    @database_sync_to_async
-    def save_media_file(self, file_data, filename):
+    async def receive_media_frame(self, data):
+        transfer_id = None
         try:
-            # Create the chat_media directory if it doesn't exist
-            media_dir = 'chat_media'
-            if not default_storage.exists(media_dir):
-                default_storage.makedirs(media_dir)
+            frame = chat_media.parse_frame(data)
+            transfer_id = frame.transfer_id
+            transfer = self.transfers.get(transfer_id)
+            if transfer is None:
+                if len(self.transfers) >= settings.CHAT_MEDIA_MAX_TRANSFERS:
+                    raise chat_media.FrameError('Too many files at once')
+                transfer = self.transfers[transfer_id] = chat_media.Transfer(transfer_id, frame.content_type)
             
-            # Save the file using Django's storage
-            file_path = os.path.join(media_dir, filename)
-            path = default_storage.save(file_path, ContentFile(file_data))
-            return path
-        except Exception as e:
-            raise
+            # Disk writes run in a worker thread, never on the event loop
+            await sync_to_async(transfer.append, thread_sensitive=False)(frame)
+            if not frame.final:
+                return
+            
+            del self.transfers[transfer_id]
+            filename = f'chat_{self.chat_id}_{timezone.now().strftime("%Y%m%d_%H%M%S")}'
+            file_path = await sync_to_async(transfer.store, thread_sensitive=False)(filename)
+            new_message = await self.save_message('', media_url=file_path, media_type=transfer.media_type)
+            
+            await self.send(text_data=json.dumps({
+                'type': 'media_ack',
+                'transfer_id': transfer_id
+            }))
+            await self.channel_layer.group_send(
+                self.room_group_name,
+                {
+                    'type': 'chat_message',
+                    'message': '',
+                    'media_url': file_path,
+                    'media_type': transfer.media_type,
+                    'user_id': self.scope['user'].id,
+                    'username': self.scope['user'].username,
+                    'timestamp': new_message.created_at.isoformat()
+                }
+            )
+        except chat_media.FrameError as e:
+            self.abort_transfer(transfer_id)
+            await self.send(text_data=json.dumps({
+                'type': 'media_error',
+                'transfer_id': transfer_id,
+                'error': str(e)
+            }))
+
+    async def send_history(self, cursor):
+        try:
+            messages, older = await self.load_history(cursor)
+        except InvalidCursor:
+            await self.send(text_data=json.dumps({
+                'type': 'history_error',
+                'error': 'Invalid cursor'
+            }))
+            return
+        await self.send(text_data=json.dumps({
+            'type': 'history',
+            'messages': messages,
+            'cursor': older
+        }))
+
+    def abort_transfer(self, transfer_id):
+        transfer = self.transfers.pop(transfer_id, None)
+        if transfer is not None:
+            transfer.close()
 
     async def chat_message(self, event):
         try:
@@ -258,16 +262,27 @@ class ChatConsumer(AsyncWebsocketConsumer):
     def save_message(self, message, media_url=None, media_type=None):
         try:
             chat = Chat.objects.get(id=self.chat_id)
-            return Message.objects.create(
-                chat=chat,
-                sender=self.scope['user'],
-                content=message,
-                media=media_url,
-                media_type=media_type
-            )
+            with transaction.atomic():
+                new_message = Message.objects.create(
+                    chat=chat,
+                    sender=self.scope['user'],
+                    content=message,
+                    media=media_url,
+                    media_type=media_type
+                )
+                inbox.record_message(new_message)
+            return new_message
         except Exception as e:
             raise
 
+    @database_sync_to_async
+    def load_history(self, cursor):
+        user = self.scope['user']
+        if not Chat.objects.filter(Q(creator=user) | Q(subscriber=user), id=self.chat_id).exists():
+            return [], None
+        messages, older = chat_history.page(self.chat_id, cursor=str(cursor) if cursor else None)
+        return [chat_history.serialize(message) for message in messages], older
+
     @database_sync_to_async
     def mark_online(self):
         user = self.scope['user']
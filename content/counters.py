@@ -0,0 +1,78 @@
+"""
+Denormalized engagement counters on Post.
+
+Writes go through a single UPDATE with an F() expression so concurrent likes
+never lose increments. reconcile() repairs any drift (raw SQL deletes,
+queryset.update/delete calls that bypass signals) in primary key chunks.
+"""
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Post, Like, Comment, Share, Save
+
+# Counter column on Post -> model whose rows it counts
+COUNTER_MODELS = {
+    'like_count': Like,
+    'comment_count': Comment,
+    'share_count': Share,
+    'save_count': Save,
+}
+
+
+def counter_field_for(model):
+    for field, counted_model in COUNTER_MODELS.items():
+        if counted_model is model:
+            return field
+    return None
+
+
+def adjust(post_id, field, delta):
+    """Atomically add ``delta`` to one of a post's counters, never going below zero"""
+    Post.objects.filter(pk=post_id).update(**{field: Greatest(F(field) + delta, Value(0))})
+
+
+def _actual_count(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(post=OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        Value(0)
+    )
+
+
+def reconcile(chunk_size=1000):
+    """
+    Recount every post's counters and fix the ones that drifted.
+
+    Returns the number of posts that were repaired.
+    """
+    annotations = {f'actual_{field}': _actual_count(model) for field, model in COUNTER_MODELS.items()}
+    fields = list(COUNTER_MODELS)
+    repaired = 0
+    last_id = 0
+    while True:
+        chunk = list(
+            Post.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .only('pk', *fields)
+            .annotate(**annotations)[:chunk_size]
+        )
+        if not chunk:
+            break
+        last_id = chunk[-1].pk
+
+        drifted = [
+            post.pk for post in chunk
+            if any(getattr(post, field) != getattr(post, f'actual_{field}') for field in fields)
+        ]
+        if drifted:
+            # Recount inside the UPDATE so increments made since the read are not lost
+            Post.objects.filter(pk__in=drifted).update(
+                **{field: _actual_count(model) for field, model in COUNTER_MODELS.items()}
+            )
+            repaired += len(drifted)
+    return repaired
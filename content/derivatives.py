@@ -0,0 +1,99 @@
+"""
+Resized WebP and JPEG copies of uploaded images.
+
+Uploads are stored as they arrive; once the upload commits a background task
+reads the original, resizes it in a process pool (decoding and encoding are
+CPU bound and would hold the GIL in the task threads) and records every
+output as a MediaVariant. Templates then serve the variants through srcset,
+so a feed card downloads a few dozen KB instead of the original photo.
+"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from PIL import Image
+
+from . import imaging
+from .models import Media, MediaVariant
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+_pool = None
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # spawn, not fork: forking a process that runs request threads can deadlock
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.MEDIA_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _pool
+
+
+def run(func, *args):
+    """Call ``func`` (a function of content.imaging) in the image process pool and wait for its result"""
+    if settings.BACKGROUND_TASKS_EAGER:
+        return func(*args)
+    return _get_pool().submit(func, *args).result()
+
+
+def is_current(media, variants):
+    return bool(variants) and all(variant.source == media.file.name for variant in variants)
+
+
+def generate_variants(media_id):
+    """Create the variants of an image Media, unless they exist for its current file; returns how many were made"""
+    media = Media.objects.filter(pk=media_id, media_type='image').first()
+    if media is None or not media.file:
+        return 0
+    old = list(media.variants.all())
+    if is_current(media, old):
+        return 0
+
+    try:
+        with media.file.open('rb') as upload:
+            data = upload.read()
+        rendered = run(imaging.render, data, settings.MEDIA_VARIANT_WIDTHS)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.warning('Could not generate variants for media %s', media.pk, exc_info=True)
+        return 0
+
+    storage = MediaVariant._meta.get_field('file').storage
+    stem = os.path.splitext(os.path.basename(media.file.name))[0]
+    variants = [
+        MediaVariant(
+            media=media,
+            format=output,
+            width=width,
+            height=height,
+            file=storage.save(
+                f'post_media/variants/{media.pk}/{stem}-{width}w.{EXTENSIONS[output]}', ContentFile(content)
+            ),
+            size=len(content),
+            source=media.file.name
+        )
+        for output, width, height, content in rendered
+    ]
+    try:
+        with transaction.atomic():
+            MediaVariant.objects.filter(pk__in=[variant.pk for variant in old]).delete()
+            MediaVariant.objects.bulk_create(variants)
+    except IntegrityError:
+        # The media was deleted, or another task got there first
+        for variant in variants:
+            storage.delete(variant.file.name)
+        return 0
+    return len(variants)
+
+
+def pending_media():
+    """Image media without any variant yet"""
+    return Media.objects.filter(media_type='image', variants__isnull=True)
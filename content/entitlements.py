@@ -0,0 +1,162 @@
+"""
+Who can see which posts.
+
+Every access decision is made from two small sets per user: the creators they
+are actively subscribed to and the premium posts they have bought. Both sets
+are memoized on the request's user object and cached across requests (Redis
+in production), so after the first lookup a page makes no further queries.
+The cache is invalidated from Subscription and PaymentHistory saves.
+"""
+from django.core.cache import cache
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Q
+
+from subscriptions.models import Subscription, PaymentHistory
+
+CACHE_TIMEOUT = 60 * 15
+MEMO_ATTR = '_entitlements_memo'
+
+
+def _creators_key(user_id):
+    return f'entitlements:creators:{user_id}'
+
+
+def _purchases_key(user_id):
+    return f'entitlements:purchases:{user_id}'
+
+
+def _memo(user):
+    memo = getattr(user, MEMO_ATTR, None)
+    if memo is None:
+        memo = {}
+        setattr(user, MEMO_ATTR, memo)
+    return memo
+
+
+def _cached_set(user, name, key, load):
+    memo = _memo(user)
+    if name not in memo:
+        ids = cache.get(key)
+        if ids is None:
+            ids = frozenset(load())
+            cache.set(key, ids, CACHE_TIMEOUT)
+        memo[name] = ids
+    return memo[name]
+
+
+def subscribed_creator_ids(user):
+    """IDs of the creators ``user`` has an active subscription to"""
+    if not user.is_authenticated:
+        return frozenset()
+    return _cached_set(
+        user, 'creators', _creators_key(user.id),
+        lambda: Subscription.objects.filter(
+            subscriber_id=user.id,
+            active=True
+        ).values_list('creator_id', flat=True)
+    )
+
+
+def purchased_post_ids(user):
+    """IDs of the premium posts ``user`` has paid for"""
+    if not user.is_authenticated:
+        return frozenset()
+    return _cached_set(
+        user, 'purchases', _purchases_key(user.id),
+        lambda: PaymentHistory.objects.filter(
+            user_id=user.id,
+            payment_type='post',
+            status='succeeded',
+            post__isnull=False
+        ).values_list('post_id', flat=True)
+    )
+
+
+def is_subscribed(user, creator):
+    creator_id = getattr(creator, 'pk', creator)
+    return creator_id in subscribed_creator_ids(user)
+
+
+def can_view(user, post):
+    """Whether ``user`` may see the full content of ``post``"""
+    if not post.is_published:
+        return user.is_authenticated and user.id == post.creator_id
+    if post.visibility == 'public':
+        return True
+    if not user.is_authenticated:
+        return False
+    if user.id == post.creator_id:
+        return True
+    if post.visibility == 'subscribers':
+        return is_subscribed(user, post.creator_id)
+    if post.visibility == 'premium':
+        # Premium posts are sold to subscribers on top of the subscription
+        return is_subscribed(user, post.creator_id) and post.id in purchased_post_ids(user)
+    return False
+
+
+def published_posts(user, queryset):
+    """Leave out unpublished posts, except the user's own"""
+    if not user.is_authenticated:
+        return queryset.filter(is_published=True)
+    return queryset.filter(Q(is_published=True) | Q(creator_id=user.id))
+
+
+def visible_posts(user, queryset):
+    """Restrict a Post queryset to the posts ``user`` may see"""
+    queryset = published_posts(user, queryset)
+    if not user.is_authenticated:
+        return queryset.filter(visibility='public')
+    creator_ids = subscribed_creator_ids(user)
+    return queryset.filter(
+        Q(visibility='public') |
+        Q(creator_id=user.id) |
+        Q(visibility='subscribers', creator_id__in=creator_ids) |
+        Q(visibility='premium', creator_id__in=creator_ids, id__in=purchased_post_ids(user))
+    )
+
+
+def annotate_access(queryset, user):
+    """
+    Annotate every post in a queryset with the viewer's access, in the same query.
+
+    Adds ``can_view``, ``is_locked`` (its negation) and ``needs_purchase`` (a
+    premium post the viewer has not bought), so a page of locked cards can be
+    rendered without a lookup per post. Unpublished posts of other creators
+    are left out.
+    """
+    queryset = published_posts(user, queryset)
+    if not user.is_authenticated:
+        can_view_q = Q(visibility='public')
+        needs_purchase_q = Q(visibility='premium')
+    else:
+        queryset = queryset.annotate(
+            viewer_subscribed=Exists(Subscription.objects.filter(
+                subscriber_id=user.id,
+                creator_id=OuterRef('creator_id'),
+                active=True
+            )),
+            viewer_purchased=Exists(PaymentHistory.objects.filter(
+                user_id=user.id,
+                post_id=OuterRef('pk'),
+                payment_type='post',
+                status='succeeded'
+            )),
+        )
+        can_view_q = (
+            Q(visibility='public') |
+            Q(creator_id=user.id) |
+            Q(visibility='subscribers', viewer_subscribed=True) |
+            Q(visibility='premium', viewer_subscribed=True, viewer_purchased=True)
+        )
+        needs_purchase_q = Q(visibility='premium', viewer_purchased=False) & ~Q(creator_id=user.id)
+
+    return queryset.annotate(
+        can_view=ExpressionWrapper(can_view_q, output_field=BooleanField()),
+        is_locked=ExpressionWrapper(~can_view_q, output_field=BooleanField()),
+        needs_purchase=ExpressionWrapper(needs_purchase_q, output_field=BooleanField()),
+    )
+
+
+def invalidate(user_id):
+    """Drop a user's cached entitlements after their subscriptions or purchases change"""
+    cache.delete_many([_creators_key(user_id), _purchases_key(user_id)])
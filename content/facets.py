@@ -0,0 +1,114 @@
+"""
+Category and tag counts for a filtered set of posts.
+
+Both facets come from one query, a UNION ALL of two GROUP BYs over the
+Post.categories and Post.tags through tables restricted to the matching
+posts. Results are cached per normalized filter set and audience. Every
+cache key embeds a version number, and tagging, untagging, creating or
+deleting a post bumps it, so stale counts are never served. A signed-in
+viewer's keys also embed a version of their own, bumped when what they may
+see changes: subscribing, cancelling or buying a post.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import CharField, Count, Value
+
+from .models import Post
+
+VERSION_KEY = 'facets:version'
+CACHE_TIMEOUT = 60 * 10
+MAX_TAGS = 20
+
+
+def _user_version_key(user_id):
+    return f'facets:version:user:{user_id}'
+
+
+def _version(key=VERSION_KEY):
+    version = cache.get(key)
+    if version is None:
+        version = 1
+        cache.add(key, version, None)
+    return version
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+def invalidate():
+    """Make every cached facet count stale"""
+    _bump(VERSION_KEY)
+
+
+def invalidate_user(user_id):
+    """Make the facet counts cached for one viewer stale"""
+    _bump(_user_version_key(user_id))
+
+
+def normalize_filters(filters):
+    """Lowercase, trim and drop empty filters so equivalent searches share a key"""
+    return {
+        name: ' '.join(str(value).lower().split())
+        for name, value in sorted(filters.items())
+        if value and str(value).strip()
+    }
+
+
+def cache_key(filters, user):
+    # Counts depend on what the viewer may see; anonymous visitors share one audience
+    if user.is_authenticated:
+        audience = f'user:{user.pk}:{_version(_user_version_key(user.pk))}'
+    else:
+        audience = 'anonymous'
+    raw = json.dumps([audience, normalize_filters(filters)], separators=(',', ':'))
+    digest = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    return f'facets:{_version()}:{digest}'
+
+
+def _count(posts):
+    post_ids = posts.order_by().values('pk')
+    through = {
+        'category': (Post.categories.through, 'category'),
+        'tag': (Post.tags.through, 'tag'),
+    }
+    grouped = [
+        model.objects.filter(post_id__in=post_ids)
+        .order_by()
+        .values(f'{field}_id', f'{field}__name')
+        .annotate(
+            kind=Value(kind, output_field=CharField()),
+            total=Count('post_id')
+        )
+        .values_list('kind', f'{field}_id', f'{field}__name', 'total')
+        for kind, (model, field) in through.items()
+    ]
+    facets = {'categories': [], 'tags': []}
+    for kind, pk, name, total in grouped[0].union(grouped[1], all=True):
+        facets['categories' if kind == 'category' else 'tags'].append(
+            {'id': pk, 'name': name, 'count': total}
+        )
+    for values in facets.values():
+        values.sort(key=lambda facet: (-facet['count'], facet['name'].lower()))
+    del facets['tags'][MAX_TAGS:]
+    return facets
+
+
+def facet_counts(posts, filters, user):
+    """
+    Category and tag counts for ``posts``, the queryset the search page shows.
+
+    ``filters`` are the request parameters that produced ``posts`` and, with
+    the viewer, make up the cache key.
+    """
+    key = cache_key(filters, user)
+    facets = cache.get(key)
+    if facets is None:
+        facets = _count(posts)
+        cache.set(key, facets, CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,90 @@
+"""
+Featured creators.
+
+The pool of creators eligible for the landing and home pages is computed
+periodically by the refresh_featured_creators command and kept in the cache as
+(creator id, weight) pairs. Pages sample from it in memory, so showing a few
+featured creators costs one primary key lookup instead of ORDER BY RANDOM()
+over the whole user table. A cache miss never recomputes the pool in the
+request: pages show no featured creators until one background refresh,
+shared by every request that missed, has run.
+"""
+import heapq
+import math
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from accounts.models import User
+from .tasks import run_in_background
+
+POOL_CACHE_KEY = 'featured:pool'
+# Outlives the refresh interval so a late refresh never empties the pages
+POOL_CACHE_TIMEOUT = 60 * 60 * 24
+REFRESH_LOCK_KEY = 'featured:refreshing'
+# Lets another request retry if a refresh dies without releasing the lock
+REFRESH_LOCK_TIMEOUT = 60 * 5
+ACTIVITY_WINDOW = timedelta(days=30)
+VERIFIED_BOOST = 2.0
+
+
+def _weight(is_verified, recent_posts, active_subscribers):
+    # Logarithmic so a handful of very large creators do not crowd out the rest
+    weight = (1 + math.log1p(recent_posts)) * (1 + math.log1p(active_subscribers))
+    if is_verified:
+        weight *= VERIFIED_BOOST
+    return weight
+
+
+def refresh_pool():
+    """Recompute the featured pool from verification, recent posts and subscribers"""
+    since = timezone.now() - ACTIVITY_WINDOW
+    creators = User.objects.filter(is_creator=True, is_active=True).annotate(
+        recent_posts=Count('posts', filter=Q(posts__created_at__gte=since), distinct=True),
+        active_subscribers=Count('subscribers', filter=Q(subscribers__active=True), distinct=True)
+    ).values_list('id', 'is_verified', 'recent_posts', 'active_subscribers')
+
+    weighted = [(creator_id, _weight(*stats)) for creator_id, *stats in creators]
+    pool = heapq.nlargest(settings.FEATURED_POOL_SIZE, weighted, key=lambda item: item[1])
+    cache.set(POOL_CACHE_KEY, pool, POOL_CACHE_TIMEOUT)
+    return pool
+
+
+def _refresh_and_unlock():
+    try:
+        refresh_pool()
+    finally:
+        cache.delete(REFRESH_LOCK_KEY)
+
+
+def get_pool():
+    pool = cache.get(POOL_CACHE_KEY)
+    if pool is None:
+        # Cold cache, e.g. right after a deploy; cache.add is atomic, so one refresh for every miss
+        if cache.add(REFRESH_LOCK_KEY, True, REFRESH_LOCK_TIMEOUT):
+            run_in_background(_refresh_and_unlock)
+        # Already there when background tasks run eagerly
+        pool = cache.get(POOL_CACHE_KEY, [])
+    return pool
+
+
+def sample_creator_ids(count, exclude=()):
+    """Pick ``count`` creator IDs from the pool, weighted, without replacement"""
+    candidates = [(creator_id, weight) for creator_id, weight in get_pool() if creator_id not in exclude]
+    # Efraimidis-Spirakis: the largest random() ** (1 / weight) keys form a weighted sample
+    keyed = ((random.random() ** (1 / weight), creator_id) for creator_id, weight in candidates)
+    return [creator_id for _, creator_id in heapq.nlargest(count, keyed)]
+
+
+def featured_creators(count=5, exclude=()):
+    """A weighted random sample of featured creators, fetched in one query"""
+    creator_ids = sample_creator_ids(count, exclude=exclude)
+    if not creator_ids:
+        return []
+    # The pool can be a little stale, so creators who stepped down are dropped here
+    creators = User.objects.filter(is_creator=True).in_bulk(creator_ids)
+    return [creators[creator_id] for creator_id in creator_ids if creator_id in creators]
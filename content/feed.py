@@ -0,0 +1,182 @@
+"""
+Home feed inbox.
+
+Posts are fanned out on write into a FeedItem row per active subscriber, so
+reading a feed page is a single range scan over (subscriber, created_at, post).
+Creators with more than FEED_FANOUT_MAX_SUBSCRIBERS active subscribers are not
+fanned out; their posts are pulled at read time and merged into the page,
+and copied into their subscribers' inboxes once they drop back below it.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from subscriptions.models import Subscription
+from . import entitlements
+from .models import Post, FeedItem
+from .pagination import KeysetPage, decode_cursor, encode_cursor, keyset_filter, ordering_fields
+from .tasks import run_in_background
+
+PULL_CREATORS_CACHE_KEY = 'feed:pull_creators'
+PULL_CREATORS_CACHE_TIMEOUT = 60 * 60
+# The set as last computed, kept past the timeout to tell which creators left it
+LAST_PULL_CREATORS_CACHE_KEY = 'feed:pull_creators:last'
+FANOUT_BATCH_SIZE = 1000
+FEED_ORDERING = ('-created_at', '-post_id')
+
+
+def pull_creator_ids(refresh=False):
+    """IDs of creators too big to fan out, cached because every feed read needs them"""
+    creator_ids = None if refresh else cache.get(PULL_CREATORS_CACHE_KEY)
+    if creator_ids is None:
+        creator_ids = set(
+            Subscription.objects.filter(active=True)
+            .values('creator_id')
+            .annotate(total=Count('id'))
+            .filter(total__gt=settings.FEED_FANOUT_MAX_SUBSCRIBERS)
+            .values_list('creator_id', flat=True)
+        )
+        previous = cache.get(LAST_PULL_CREATORS_CACHE_KEY)
+        cache.set(PULL_CREATORS_CACHE_KEY, creator_ids, PULL_CREATORS_CACHE_TIMEOUT)
+        cache.set(LAST_PULL_CREATORS_CACHE_KEY, creator_ids, None)
+        # Their posts were pulled at read time, never fanned out, and reads stop pulling them now
+        for creator_id in (previous or set()) - creator_ids:
+            run_in_background(backfill_creator, creator_id)
+    return creator_ids
+
+
+def _bulk_insert(items):
+    FeedItem.objects.bulk_create(items, batch_size=FANOUT_BATCH_SIZE, ignore_conflicts=True)
+
+
+def fan_out_post(post_id):
+    """Write a post into the inbox of each active subscriber of its creator"""
+    post = Post.objects.filter(id=post_id).exclude(visibility='private').only('id', 'creator_id', 'created_at').first()
+    if post is None or post.creator_id in pull_creator_ids():
+        return
+
+    subscriber_ids = Subscription.objects.filter(
+        creator_id=post.creator_id,
+        active=True
+    ).values_list('subscriber_id', flat=True)
+
+    batch = []
+    for subscriber_id in subscriber_ids.iterator(chunk_size=FANOUT_BATCH_SIZE):
+        batch.append(FeedItem(
+            subscriber_id=subscriber_id,
+            post_id=post.id,
+            creator_id=post.creator_id,
+            created_at=post.created_at
+        ))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            _bulk_insert(batch)
+            batch = []
+    if batch:
+        _bulk_insert(batch)
+
+
+def _latest_posts(creator_id):
+    return list(
+        Post.objects.filter(creator_id=creator_id).exclude(visibility='private')
+        .order_by('-created_at', '-id').values_list('id', 'created_at')[:settings.FEED_BACKFILL_LIMIT]
+    )
+
+
+def backfill_subscription(subscriber_id, creator_id):
+    """Copy a creator's latest posts into a new subscriber's inbox"""
+    if creator_id in pull_creator_ids():
+        return
+    _bulk_insert([
+        FeedItem(
+            subscriber_id=subscriber_id,
+            post_id=post_id,
+            creator_id=creator_id,
+            created_at=created_at
+        )
+        for post_id, created_at in _latest_posts(creator_id)
+    ])
+
+
+def backfill_creator(creator_id):
+    """Copy a creator's latest posts into the inbox of each active subscriber, e.g. after leaving pull mode"""
+    if creator_id in pull_creator_ids():
+        return
+    posts = _latest_posts(creator_id)
+    subscriber_ids = Subscription.objects.filter(
+        creator_id=creator_id,
+        active=True
+    ).values_list('subscriber_id', flat=True)
+
+    batch = []
+    for subscriber_id in subscriber_ids.iterator(chunk_size=FANOUT_BATCH_SIZE):
+        batch.extend(
+            FeedItem(subscriber_id=subscriber_id, post_id=post_id, creator_id=creator_id, created_at=created_at)
+            for post_id, created_at in posts
+        )
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            _bulk_insert(batch)
+            batch = []
+    if batch:
+        _bulk_insert(batch)
+
+
+def prune_subscription(subscriber_id, creator_id):
+    """Remove a creator's posts from a subscriber's inbox"""
+    FeedItem.objects.filter(subscriber_id=subscriber_id, creator_id=creator_id).delete()
+
+
+def _window(queryset, ordering, values, limit):
+    queryset = queryset.order_by(*ordering)
+    if values is not None:
+        queryset = queryset.filter(keyset_filter(ordering, values))
+    return list(queryset[:limit])
+
+
+def feed_page(user, cursor=None, per_page=20, queryset=None):
+    """
+    Return a KeysetPage of posts for ``user``'s home feed.
+
+    ``queryset`` lets callers add select_related/prefetch_related for the posts
+    that end up on the page. Raises InvalidCursor for a malformed cursor.
+    """
+    values = decode_cursor(cursor, 2, ordering_fields(FeedItem, FEED_ORDERING)) if cursor else None
+
+    # Inbox rows and pulled posts share the (created_at, post id) key, so the
+    # same cursor positions both streams
+    keys = _window(
+        FeedItem.objects.filter(subscriber=user).values_list('created_at', 'post_id'),
+        FEED_ORDERING, values, per_page + 1
+    )
+
+    pull_ids = pull_creator_ids()
+    followed_pull_creators = pull_ids & entitlements.subscribed_creator_ids(user) if pull_ids else set()
+    if followed_pull_creators:
+        keys += _window(
+            Post.objects.filter(creator_id__in=followed_pull_creators).exclude(visibility='private')
+            .values_list('created_at', 'id'),
+            ('-created_at', '-id'), values, per_page + 1
+        )
+        # A creator that crossed the threshold can still have posts in inboxes
+        keys = sorted(set(keys), reverse=True)
+
+    next_cursor = None
+    if len(keys) > per_page:
+        keys = keys[:per_page]
+        next_cursor = encode_cursor(keys[-1])
+
+    if queryset is None:
+        queryset = Post.objects.all()
+    # Private posts are only shown on the creator's own pages; also drops posts made private after fan-out
+    posts = queryset.exclude(visibility='private').in_bulk([post_id for _, post_id in keys])
+    return KeysetPage([posts[post_id] for _, post_id in keys if post_id in posts], next_cursor)
+
+
+def rebuild_inbox(subscriber_id):
+    """Rebuild a subscriber's inbox from their active subscriptions"""
+    FeedItem.objects.filter(subscriber_id=subscriber_id).delete()
+    creator_ids = Subscription.objects.filter(
+        subscriber_id=subscriber_id,
+        active=True
+    ).values_list('creator_id', flat=True)
+    for creator_id in creator_ids:
+        backfill_subscription(subscriber_id, creator_id)
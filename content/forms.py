@@ -3,6 +3,19 @@ from django.forms import inlineformset_factory
 from django.utils.translation import gettext_lazy as _
 from .models import Post, Media
 
+IMAGE_EXTENSIONS = ['jpg', 'jpeg', 'png', 'gif']
+VIDEO_EXTENSIONS = ['mp4', 'mov', 'avi']
+
+
+def media_type_for(filename):
+    """'image' or 'video' judging by the file extension, None for anything else"""
+    ext = filename.split('.')[-1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        return 'image'
+    if ext in VIDEO_EXTENSIONS:
+        return 'video'
+    return None
+
 class PostForm(forms.ModelForm):
     """Form for creating and editing posts"""
     title = forms.CharField(
@@ -63,15 +76,11 @@ class MediaForm(forms.ModelForm):
     def clean_file(self):
         file = self.cleaned_data.get('file')
         if file:
-            # Get the file extension
-            ext = file.name.split('.')[-1].lower()
             # Check if it's an image or video
-            if ext in ['jpg', 'jpeg', 'png', 'gif']:
-                self.instance.media_type = 'image'
-            elif ext in ['mp4', 'mov', 'avi']:
-                self.instance.media_type = 'video'
-            else:
+            media_type = media_type_for(file.name)
+            if media_type is None:
                 raise forms.ValidationError(_('Unsupported file type. Please upload images or videos only.'))
+            self.instance.media_type = media_type
         return file
 
 # Create a formset for adding multiple media files to a post
@@ -0,0 +1,139 @@
+"""
+Image resizing for MediaVariant, and the metadata stored on Media.
+
+Kept free of Django imports: render() and inspect() run in worker processes
+that never set Django up.
+"""
+import base64
+import io
+
+from PIL import Image, ImageOps
+
+# Encoder settings per output format
+ENCODERS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+# Encoder settings when an original is rewritten without its EXIF block
+REWRITE = {
+    'JPEG': {'format': 'JPEG', 'quality': 95, 'subsampling': 'keep'},
+    'PNG': {'format': 'PNG', 'optimize': True},
+    'WEBP': {'format': 'WEBP', 'quality': 90},
+}
+# Source formats that are rewritten as another
+REWRITE_AS = {'MPO': 'JPEG'}
+PLACEHOLDER_ENCODER = {'format': 'WEBP', 'quality': 30}
+
+# EXIF tag holding the camera orientation
+ORIENTATION_TAG = 0x0112
+
+
+def target_widths(original_width, widths):
+    """The requested widths below the original; never upscale"""
+    smaller = sorted(width for width in set(widths) if width < original_width)
+    return smaller or [original_width]
+
+
+def _flatten(image):
+    # JPEG has no alpha channel: composite on white rather than on black
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def render(data, widths, formats=tuple(ENCODERS)):
+    """
+    Resize the image in ``data`` to each of ``widths`` and encode it in each
+    of ``formats``.
+
+    Returns a list of (format, width, height, encoded bytes). Raises OSError
+    when ``data`` is not an image Pillow can read.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        # Lets the JPEG decoder skip detail no variant needs
+        largest = max(widths)
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+        variants = []
+        for width in target_widths(image.width, widths):
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for output in formats:
+                encoded = io.BytesIO()
+                frame = _flatten(resized) if output == 'jpeg' else resized
+                frame.save(encoded, **ENCODERS[output])
+                variants.append((output, width, height, encoded.getvalue()))
+        return variants
+
+
+def orientation(width, height):
+    if width == height:
+        return 'square'
+    return 'landscape' if width > height else 'portrait'
+
+
+def placeholder(image, size):
+    """A ``size`` pixel wide preview of ``image`` as a data: URI, meant to be shown blurred"""
+    small = image.copy()
+    small.thumbnail((size, size))
+    has_alpha = small.mode in ('RGBA', 'LA', 'PA') or 'transparency' in small.info
+    encoded = io.BytesIO()
+    small.convert('RGBA' if has_alpha else 'RGB').save(encoded, **PLACEHOLDER_ENCODER)
+    return 'data:image/webp;base64,' + base64.b64encode(encoded.getvalue()).decode('ascii')
+
+
+def _rewrite(image, upright, source_format):
+    # Pillow only writes EXIF when asked to, so re-encoding drops it
+    output = REWRITE_AS.get(source_format, source_format)
+    # Extra MPO frames are previews and depth maps, not animation
+    if output not in REWRITE or (getattr(image, 'is_animated', False) and source_format != 'MPO'):
+        return None
+    options = dict(REWRITE[output])
+    if image.info.get('icc_profile'):
+        options['icc_profile'] = image.info['icc_profile']
+    encoded = io.BytesIO()
+    if output == 'JPEG' and upright is image:
+        # Same pixels: reuse the original quantization, no generation loss
+        options.update(quality='keep')
+        image.save(encoded, **options)
+    else:
+        if output == 'JPEG':
+            options.pop('subsampling')
+            upright = _flatten(upright)
+        upright.save(encoded, **options)
+    return encoded.getvalue()
+
+
+def inspect(data, placeholder_size):
+    """
+    Read the image in ``data``.
+
+    Returns a dict with its displayed ``width`` and ``height`` (after the
+    EXIF orientation is applied), ``orientation``, a ``placeholder`` data:
+    URI, whether it has ``exif`` and ``stripped``: the image re-encoded
+    upright without its EXIF block, or None when there was no EXIF to remove
+    or the format can't be rewritten (animated images). Raises OSError when ``data`` is not an
+    image Pillow can read.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        exif = image.getexif()
+        if exif.get(ORIENTATION_TAG, 1) == 1:
+            image.load()
+            upright = image
+        else:
+            upright = ImageOps.exif_transpose(image)
+        stripped = _rewrite(image, upright, image.format) if exif else None
+        return {
+            'width': upright.width,
+            'height': upright.height,
+            'orientation': orientation(upright.width, upright.height),
+            'placeholder': placeholder(upright, placeholder_size),
+            'exif': bool(exif),
+            'stripped': stripped,
+        }
@@ -0,0 +1,65 @@
+"""
+Chat inbox.
+
+Every chat has a ChatParticipant row per side holding that user's unread
+count and a copy of the time of the chat's latest message, so listing a
+user's chats is a single range scan over (user, last_message_at, chat). The
+latest message itself is previewed from Chat; neither reads Message.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from .models import Chat, ChatParticipant, Message
+
+PREVIEW_LENGTH = 100
+
+
+def add_participants(chat):
+    ChatParticipant.objects.bulk_create(
+        [
+            ChatParticipant(chat=chat, user_id=user_id, last_message_at=chat.last_message_at or chat.created_at)
+            for user_id in (chat.creator_id, chat.subscriber_id)
+        ],
+        ignore_conflicts=True
+    )
+
+
+def preview(message):
+    if message.content:
+        return message.content[:PREVIEW_LENGTH]
+    return message.get_media_type_display() or ''
+
+
+def record_message(message):
+    """Move the chat of a new message to the top of both inboxes and count it as unread for the recipient"""
+    with transaction.atomic():
+        Chat.objects.filter(pk=message.chat_id).update(
+            last_message_at=message.created_at,
+            last_message_preview=preview(message),
+            last_sender=message.sender_id
+        )
+        participants = ChatParticipant.objects.filter(chat_id=message.chat_id)
+        participants.update(last_message_at=message.created_at)
+        # F(): concurrent messages never lose increments
+        participants.exclude(user_id=message.sender_id).update(unread_count=F('unread_count') + 1)
+
+
+def mark_read(chat, user):
+    """Everything the other side sent is read by ``user``"""
+    with transaction.atomic():
+        Message.objects.filter(chat=chat, is_read=False).exclude(sender=user).update(is_read=True)
+        ChatParticipant.objects.filter(chat=chat, user=user).exclude(unread_count=0).update(unread_count=0)
+
+
+def chats(user):
+    """The user's chats, latest message first, each with the user's ``unread_count``"""
+    participants = (
+        ChatParticipant.objects.filter(user=user)
+        .select_related('chat__creator', 'chat__subscriber')
+        .order_by('-last_message_at', '-chat')
+    )
+    chats = []
+    for participant in participants:
+        participant.chat.unread_count = participant.unread_count
+        chats.append(participant.chat)
+    return chats
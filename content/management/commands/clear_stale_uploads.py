@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from content import uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete resumable uploads that were abandoned before completing, with their partial files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=settings.RESUMABLE_UPLOAD_EXPIRY_HOURS,
+            help='Remove unfinished uploads untouched for this many hours'
+        )
+
+    def handle(self, *args, **options):
+        cleared = uploads.clear_stale(hours=options['hours'])
+        self.stdout.write(self.style.SUCCESS(f'Removed {cleared} stale upload(s)'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from content import blobs
+
+
+class Command(BaseCommand):
+    help = 'Move post and chat media stored before deduplication into content-addressed storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of rows read per query'
+        )
+
+    def handle(self, *args, **options):
+        for model in blobs.BLOB_FIELDS:
+            moved = blobs.import_existing(model, chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Moved {moved} {model._meta.verbose_name_plural} file(s) into blob storage'
+            ))
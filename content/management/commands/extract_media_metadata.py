@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from content import media_metadata
+from content.models import Media, Message
+
+
+class Command(BaseCommand):
+    help = (
+        'Record dimensions and placeholders of images uploaded before they were extracted, stripping their EXIF, '
+        'and probe videos for their poster and duration'
+    )
+
+    def handle(self, *args, **options):
+        extracted = 0
+        for model in (Media, Message):
+            for instance in media_metadata.pending(model).iterator():
+                if instance.media_type == 'video':
+                    extracted += media_metadata.extract_video(instance)
+                else:
+                    extracted += media_metadata.extract(instance)
+        self.stdout.write(self.style.SUCCESS(f'Extracted metadata of {extracted} file(s)'))
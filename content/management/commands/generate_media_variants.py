@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from content import derivatives
+from content.models import Media
+
+
+class Command(BaseCommand):
+    help = 'Generate the resized WebP and JPEG variants of uploaded images that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Check every image, regenerating variants made from a replaced upload'
+        )
+
+    def handle(self, *args, **options):
+        media = Media.objects.filter(media_type='image') if options['all'] else derivatives.pending_media()
+        generated = 0
+        for media_id in media.values_list('pk', flat=True).distinct().iterator():
+            generated += derivatives.generate_variants(media_id)
+        self.stdout.write(self.style.SUCCESS(f'Generated {generated} variant(s)'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from content import feed
+from subscriptions.models import Subscription
+
+
+class Command(BaseCommand):
+    help = 'Rebuild home feed inboxes from active subscriptions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help='Only rebuild the inbox of this user ID (can be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        # Creators may have crossed the fan-out threshold since the last run
+        pull_creators = feed.pull_creator_ids(refresh=True)
+        self.stdout.write(f'{len(pull_creators)} creator(s) are served at read time')
+
+        subscriber_ids = options['user_ids']
+        if not subscriber_ids:
+            subscriber_ids = Subscription.objects.filter(
+                active=True
+            ).values_list('subscriber_id', flat=True).distinct().iterator()
+
+        rebuilt = 0
+        for subscriber_id in subscriber_ids:
+            feed.rebuild_inbox(subscriber_id)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} feed inbox(es)'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from content import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search documents of every post'
+
+    def handle(self, *args, **options):
+        indexed = search.reindex()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} post(s)'))
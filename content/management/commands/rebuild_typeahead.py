@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from content import typeahead
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the typeahead index of creators, tags and categories '
+        '(with the memory backend each process also builds its own trie on first use)'
+    )
+
+    def handle(self, *args, **options):
+        indexed = typeahead.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} name(s)'))
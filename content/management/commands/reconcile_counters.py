@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from content import counters
+
+
+class Command(BaseCommand):
+    help = 'Recount likes, comments, shares and saves on posts and repair drifted counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of posts checked per query'
+        )
+
+    def handle(self, *args, **options):
+        repaired = counters.reconcile(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Repaired counters on {repaired} post(s)'))
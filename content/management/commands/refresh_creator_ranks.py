@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from content import ranking
+
+
+class Command(BaseCommand):
+    help = 'Rescore creators for Discover (only stale or expired ranks unless --full is given)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rescore every creator'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=ranking.REFRESH_CHUNK_SIZE,
+            help='Number of creators scored per query'
+        )
+
+    def handle(self, *args, **options):
+        refreshed = ranking.refresh(full=options['full'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {refreshed} creator rank(s)'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from content import featured
+
+
+class Command(BaseCommand):
+    help = 'Recompute the weighted pool of featured creators shown on the landing and home pages'
+
+    def handle(self, *args, **options):
+        pool = featured.refresh_pool()
+        self.stdout.write(self.style.SUCCESS(f'Featured pool refreshed with {len(pool)} creator(s)'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from content import transcoding
+from content.models import Media
+
+
+class Command(BaseCommand):
+    help = 'Make the HLS renditions of videos that have none, such as those uploaded before transcoding'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Also try videos whose transcoding failed before'
+        )
+
+    def handle(self, *args, **options):
+        media = transcoding.untranscoded_videos()
+        if options['retry_failed']:
+            media = Media.objects.filter(media_type='video', hls_playlist='')
+        transcoded = 0
+        for media_id in media.values_list('pk', flat=True).iterator():
+            # An update, so queueing doesn't hold the post back while it is transcoded
+            Media.objects.filter(pk=media_id).update(processing_status='pending')
+            transcoding.transcode(media_id)
+            transcoded += Media.objects.filter(pk=media_id).exclude(hls_playlist='').exists()
+        self.stdout.write(self.style.SUCCESS(f'Transcoded {transcoded} video(s)'))
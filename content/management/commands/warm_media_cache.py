@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from content import transcoding
+from content.models import CreatorRank, Media, MediaVariant
+
+
+class Command(BaseCommand):
+    help = (
+        'Download the media of the top ranked creators into the local media cache and mark it as just used, '
+        'so it is never evicted and served from the object store'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--creators',
+            type=int,
+            default=settings.MEDIA_CACHE_WARM_CREATORS,
+            help='Number of creators to warm, by rank',
+        )
+
+    def handle(self, *args, **options):
+        creator_ids = list(
+            CreatorRank.objects.order_by('-score').values_list('creator_id', flat=True)[:options['creators']]
+        )
+        media = Media.objects.filter(post__creator_id__in=creator_ids, post__is_published=True)
+        files = []
+        for item in media.only('file', 'poster', 'hls_playlist').iterator():
+            for field in (item.file, item.poster, item.hls_playlist):
+                if field:
+                    files.append((field.storage, field.name))
+            if item.hls_playlist:
+                files.extend(self.renditions(item.hls_playlist))
+        for variant in MediaVariant.objects.filter(media__in=media).only('file').iterator():
+            files.append((variant.file.storage, variant.file.name))
+
+        downloaded = 0
+        for storage, name in files:
+            # Storages without a cache have nothing to warm
+            warm = getattr(storage, 'warm', None)
+            if warm is not None:
+                try:
+                    downloaded += warm(name)
+                except FileNotFoundError:
+                    continue
+        self.stdout.write(self.style.SUCCESS(
+            f'Warmed {len(files)} file(s) of {len(creator_ids)} creator(s), {downloaded} downloaded'
+        ))
+
+    def renditions(self, playlist):
+        """(storage, name) of every file of the renditions listed in ``playlist``"""
+        storage = playlist.storage
+        directory = transcoding.rendition_scope(playlist.name)
+        try:
+            subdirectories = storage.listdir(directory)[0]
+        except FileNotFoundError:
+            return []
+        return [
+            (storage, f'{directory}{subdirectory}/{filename}')
+            for subdirectory in subdirectories
+            for filename in storage.listdir(f'{directory}{subdirectory}')[1]
+        ]
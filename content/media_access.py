@@ -0,0 +1,184 @@
+"""
+Access-checked serving of uploaded files.
+
+Every file under MEDIA_URL goes through protected_media: the viewer's
+entitlements are checked once, then the bytes are handed to the front proxy
+(X-Accel-Redirect for nginx, X-Sendfile for Apache) so no worker is tied up
+streaming video. Without a proxy configured, Django serves the file itself,
+honouring Range and conditional requests so seeking in a video fetches only
+the part that is played.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+from . import entitlements, transcoding
+from .models import Post, Media, MediaVariant, Message
+
+# Anyone may see these: they are shown on public profile pages
+PUBLIC_PREFIXES = ('profile_pictures/', 'cover_photos/')
+# Access depends on the viewer, so shared caches must not keep a copy
+CACHE_CONTROL = 'private, max-age=3600'
+CHUNK_SIZE = 64 * 1024
+# Types mimetypes gets wrong or doesn't know
+CONTENT_TYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.ts': 'video/mp2t',
+}
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def clean_name(path):
+    """
+    The stored file name a URL path refers to, or None for paths that could
+    leave the directory they name: absolute ones and any with a ".." segment.
+    Access checks must run on this, the name that is actually served.
+    """
+    if path.startswith('/') or '\\' in path or '\x00' in path or '..' in path.split('/'):
+        return None
+    name = posixpath.normpath(path)
+    if name.startswith(('/', '..')) or name == '.':
+        return None
+    return name
+
+
+def can_access(user, name):
+    """Whether ``user`` may download the stored file ``name``"""
+    if name.startswith(PUBLIC_PREFIXES):
+        return True
+    if user.is_staff:
+        return True
+    # A file may be shared by several posts and chats; any one that the user can see is enough
+    # Renditions of a video are looked up by its master playlist
+    scope = transcoding.rendition_scope(name)
+    media = Q(hls_playlist=scope + transcoding.MASTER_PLAYLIST) if scope else Q(file=name) | Q(poster=name)
+    posts = Post.objects.filter(
+        Q(pk__in=Media.objects.filter(media).values('post_id')) |
+        Q(pk__in=MediaVariant.objects.filter(file=name).values('media__post_id'))
+    )
+    if entitlements.visible_posts(user, posts).exists():
+        return True
+    return user.is_authenticated and Message.objects.filter(
+        Q(chat__creator=user) | Q(chat__subscriber=user), media=name
+    ).exists()
+
+
+def parse_range(header, size):
+    """
+    (first, last) byte positions of a single-range Range header.
+
+    None when the header is malformed or asks for several ranges, which the
+    caller answers with the whole file as RFC 9110 allows.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # bytes=-500 is the last 500 bytes
+        if int(last) == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - int(last)), size - 1
+    first = int(first)
+    if last and int(last) < first:
+        return None
+    if first >= size:
+        raise RangeNotSatisfiable
+    return first, (min(int(last), size - 1) if last else size - 1)
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if if_range is None:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _iter_range(path, first, length):
+    with open(path, 'rb') as media:
+        media.seek(first)
+        while length > 0:
+            data = media.read(min(CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def _file_response(request, path, size, content_type, etag, last_modified):
+    range_header = request.headers.get('Range')
+    byte_range = None
+    if range_header and _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    if byte_range is None:
+        # FileResponse lets the WSGI server use sendfile() for the whole file
+        return FileResponse(open(path, 'rb'), content_type=content_type)
+
+    first, last = byte_range
+    response = StreamingHttpResponse(
+        _iter_range(path, first, last - first + 1), status=206, content_type=content_type
+    )
+    response['Content-Length'] = str(last - first + 1)
+    response['Content-Range'] = f'bytes {first}-{last}/{size}'
+    return response
+
+
+def _serve_file(request, path, size, mtime, content_type, cache_control):
+    etag = f'"{size:x}-{int(mtime * 1000):x}"'
+    last_modified = int(mtime)
+    # Answers If-None-Match and If-Modified-Since with a 304 before the file is opened
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _file_response(request, path, size, content_type, etag, last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = cache_control
+    return response
+
+
+def serve(request, name, cache_control=CACHE_CONTROL):
+    """Send the stored file ``name``; access must already have been checked"""
+    try:
+        path = default_storage.path(name)
+        stat_result = os.stat(path)
+    except (SuspiciousFileOperation, FileNotFoundError, NotADirectoryError):
+        raise Http404
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404
+    content_type = CONTENT_TYPES.get(os.path.splitext(path)[1]) or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    if settings.MEDIA_ACCEL_MODE == 'x-accel-redirect':
+        # nginx serves the internal location, including Range and conditional requests
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + quote(name)
+    elif settings.MEDIA_ACCEL_MODE == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+    else:
+        return _serve_file(request, path, stat_result.st_size, stat_result.st_mtime, content_type, cache_control)
+    response['Cache-Control'] = cache_control
+    return response
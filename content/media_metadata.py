@@ -0,0 +1,164 @@
+"""
+Dimensions, placeholders and EXIF stripping for uploaded images, posters
+and probing for uploaded videos.
+
+Once an image upload commits, a background task reads it once and records
+its displayed size, orientation and a tiny blurred preview on the row, so
+templates can reserve the image's space and paint the preview before the
+image loads. Originals carrying EXIF (camera, GPS) are rewritten without it
+at the same time; the rewritten file is stored like any other upload and
+the row is pointed at it, which releases the original blob.
+
+Videos are probed with ffprobe for their duration, resolution, codec and
+bitrate, and ffmpeg grabs a poster frame, so a video card renders from the
+poster and the browser fetches nothing of the video until it is played.
+"""
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from . import derivatives, imaging, video
+from .models import Media, Message
+
+logger = logging.getLogger(__name__)
+
+# File field of each model holding the image
+IMAGE_FIELDS = {
+    Media: 'file',
+    Message: 'media',
+}
+METADATA_FIELDS = ['width', 'height', 'orientation', 'placeholder', 'exif_stripped', 'metadata_extracted_at']
+VIDEO_FIELDS = ['duration', 'video_codec', 'bitrate']
+
+
+def extract(instance):
+    """Fill in the metadata of an image Media or Message and strip its EXIF; returns whether it was read"""
+    field = IMAGE_FIELDS[type(instance)]
+    image = getattr(instance, field)
+    if instance.media_type != 'image' or not image:
+        return False
+
+    try:
+        with image.open('rb') as upload:
+            data = upload.read()
+        info = derivatives.run(imaging.inspect, data, settings.MEDIA_PLACEHOLDER_SIZE)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.warning('Could not read %s %s', type(instance).__name__, instance.pk, exc_info=True)
+        return False
+
+    update_fields = list(METADATA_FIELDS)
+    if info['stripped'] is not None:
+        image.save(os.path.basename(image.name), ContentFile(info['stripped']), save=False)
+        update_fields.append(field)
+    instance.width = info['width']
+    instance.height = info['height']
+    instance.orientation = info['orientation']
+    instance.placeholder = info['placeholder']
+    # Animated images and other formats that can't be rewritten keep their EXIF
+    instance.exif_stripped = not info['exif'] or info['stripped'] is not None
+    instance.metadata_extracted_at = timezone.now()
+    instance.save(update_fields=update_fields)
+    return True
+
+
+def reset(instance):
+    """Forget what was read from the previous file of ``instance``; saving it is left to the caller"""
+    names = METADATA_FIELDS + (VIDEO_FIELDS if isinstance(instance, Media) else [])
+    for name in names:
+        field = instance._meta.get_field(name)
+        setattr(instance, name, field.get_default())
+
+
+@contextmanager
+def local_path(file):
+    """Path of a stored file on local disk, downloading it to a temporary file if the storage is remote"""
+    try:
+        path = file.storage.path(file.name)
+    except NotImplementedError:
+        path = None
+    if path is not None:
+        yield path
+        return
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(file.name)[1]) as temp:
+        with file.storage.open(file.name, 'rb') as stored:
+            shutil.copyfileobj(stored, temp)
+        temp.flush()
+        yield temp.name
+
+
+def extract_video(media):
+    """Probe a video Media and store a poster frame; returns whether it was read"""
+    if media.media_type != 'video' or not media.file:
+        return False
+
+    try:
+        with local_path(media.file) as path:
+            info = video.probe(path, settings.FFPROBE_BINARY, settings.VIDEO_PROBE_TIMEOUT)
+            # Skip a black first frame, but stay inside short clips
+            at = min(settings.VIDEO_POSTER_AT, (info['duration'] or 0) / 2)
+            frame = video.poster(path, at, settings.VIDEO_POSTER_WIDTH, settings.FFMPEG_BINARY, settings.VIDEO_PROBE_TIMEOUT)
+        still = derivatives.run(imaging.inspect, frame, settings.MEDIA_PLACEHOLDER_SIZE)
+    except (video.VideoError, OSError, ValueError) as e:
+        # OSError includes ffmpeg not being installed
+        logger.warning('Could not probe video media %s: %s', media.pk, e)
+        return False
+
+    old_poster = media.poster.name
+    stem = os.path.splitext(os.path.basename(media.file.name))[0]
+    media.poster.save(f'{stem}.jpg', ContentFile(frame), save=False)
+    if old_poster and old_poster != media.poster.name:
+        storage = media.poster.storage
+        transaction.on_commit(lambda: storage.delete(old_poster))
+    for name in VIDEO_FIELDS:
+        setattr(media, name, info[name])
+    media.width = info['width'] or still['width']
+    media.height = info['height'] or still['height']
+    media.orientation = imaging.orientation(media.width, media.height)
+    media.placeholder = still['placeholder']
+    media.metadata_extracted_at = timezone.now()
+    media.save(update_fields=METADATA_FIELDS + VIDEO_FIELDS + ['poster'])
+    return True
+
+
+def process_media(media_id):
+    """
+    Background task for a saved Media. Image metadata comes first, so
+    variants are made from the stripped file.
+    """
+    media = Media.objects.filter(pk=media_id).first()
+    if media is None:
+        return
+    if media.media_type == 'video':
+        if media.metadata_extracted_at is None:
+            extract_video(media)
+        return
+    if media.metadata_extracted_at is None:
+        extract(media)
+    derivatives.generate_variants(media.pk)
+
+
+def process_message(message_id):
+    message = Message.objects.filter(pk=message_id, media_type='image').first()
+    if message is not None and message.metadata_extracted_at is None:
+        extract(message)
+
+
+def is_metadata_update(update_fields):
+    """Whether a save only recorded what background processing found, so the upload need not be processed again"""
+    extracted = set(METADATA_FIELDS) | set(VIDEO_FIELDS) | set(IMAGE_FIELDS.values())
+    extracted |= {'poster', 'processing_status', 'hls_playlist'}
+    return bool(update_fields) and set(update_fields) <= extracted
+
+
+def pending(model):
+    """Image rows of ``model``, and videos of Media, that have not been read yet"""
+    media_types = ['image', 'video'] if model is Media else ['image']
+    return model.objects.filter(media_type__in=media_types, metadata_extracted_at__isnull=True)
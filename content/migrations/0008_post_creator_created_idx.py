@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0007_message_media_message_media_type_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['creator', '-created_at', '-id'], name='post_creator_created_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('content', '0008_post_creator_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_items', to='content.post')),
+                ('subscriber', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_items', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Feed Item',
+                'verbose_name_plural': 'Feed Items',
+                'indexes': [models.Index(fields=['subscriber', '-created_at', '-post'], name='feeditem_inbox_idx'), models.Index(fields=['subscriber', 'creator'], name='feeditem_prune_idx')],
+                'unique_together': {('subscriber', 'post')},
+            },
+        ),
+    ]
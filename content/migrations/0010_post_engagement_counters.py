@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:56
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    Post = apps.get_model('content', 'Post')
+    counted = {
+        'like_count': apps.get_model('content', 'Like'),
+        'comment_count': apps.get_model('content', 'Comment'),
+        'share_count': apps.get_model('content', 'Share'),
+        'save_count': apps.get_model('content', 'Save'),
+    }
+    Post.objects.update(**{
+        field: Coalesce(
+            Subquery(
+                model.objects.filter(post=OuterRef('pk'))
+                .order_by()
+                .values('post')
+                .annotate(total=Count('pk'))
+                .values('total')
+            ),
+            Value(0)
+        )
+        for field, model in counted.items()
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0009_feeditem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='save_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='share_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
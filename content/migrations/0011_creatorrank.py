@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def seed_ranks(apps, schema_editor):
+    # Rows start stale so the next refresh_creator_ranks run scores them
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    CreatorRank = apps.get_model('content', 'CreatorRank')
+    CreatorRank.objects.bulk_create([
+        CreatorRank(
+            creator_id=creator_id,
+            subscription_price=price,
+            joined_at=joined_at,
+            is_stale=True
+        )
+        for creator_id, price, joined_at in User.objects.filter(is_creator=True).values_list(
+            'id', 'subscription_price', 'date_joined'
+        ).iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_user_is_verified_user_verification_document'),
+        ('content', '0010_post_engagement_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreatorRank',
+            fields=[
+                ('creator', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rank', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('score', models.FloatField(default=0)),
+                ('active_subscribers', models.PositiveIntegerField(default=0)),
+                ('recent_posts', models.PositiveIntegerField(default=0)),
+                ('recent_engagement', models.PositiveIntegerField(default=0)),
+                ('subscription_price', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('joined_at', models.DateTimeField()),
+                ('is_stale', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Creator Rank',
+                'verbose_name_plural': 'Creator Ranks',
+                'indexes': [models.Index(fields=['-score', '-creator'], name='creatorrank_trending_idx'), models.Index(fields=['-joined_at', '-creator'], name='creatorrank_new_idx'), models.Index(fields=['subscription_price', 'creator'], name='creatorrank_price_idx')],
+            },
+        ),
+        migrations.RunPython(seed_ranks, migrations.RunPython.noop),
+    ]
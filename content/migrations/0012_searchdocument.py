@@ -0,0 +1,118 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE content_searchdocument ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX content_searchdocument_vector_idx ON content_searchdocument USING GIN (search_vector)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS content_searchdocument_vector_idx",
+    "ALTER TABLE content_searchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE content_searchdocument_fts USING fts5(
+        title, body,
+        content='content_searchdocument', content_rowid='post_id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER content_searchdocument_ai AFTER INSERT ON content_searchdocument BEGIN
+        INSERT INTO content_searchdocument_fts(rowid, title, body) VALUES (new.post_id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER content_searchdocument_ad AFTER DELETE ON content_searchdocument BEGIN
+        INSERT INTO content_searchdocument_fts(content_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.post_id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER content_searchdocument_au AFTER UPDATE ON content_searchdocument BEGIN
+        INSERT INTO content_searchdocument_fts(content_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.post_id, old.title, old.body);
+        INSERT INTO content_searchdocument_fts(rowid, title, body) VALUES (new.post_id, new.title, new.body);
+    END
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS content_searchdocument_au",
+    "DROP TRIGGER IF EXISTS content_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS content_searchdocument_ai",
+    "DROP TABLE IF EXISTS content_searchdocument_fts",
+]
+
+
+def _execute(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_fulltext_index(apps, schema_editor):
+    # Other databases fall back to LIKE queries in content.search
+    _execute(schema_editor, {'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD})
+
+
+def drop_fulltext_index(apps, schema_editor):
+    _execute(schema_editor, {'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE})
+
+
+def index_existing_posts(apps, schema_editor):
+    Post = apps.get_model('content', 'Post')
+    SearchDocument = apps.get_model('content', 'SearchDocument')
+    posts = Post.objects.select_related('creator').prefetch_related('categories', 'tags')
+    batch = []
+    for post in posts.iterator(chunk_size=500):
+        batch.append(SearchDocument(
+            post_id=post.id,
+            title=post.title,
+            body='\n'.join(filter(None, [
+                post.text,
+                post.creator.username,
+                post.creator.bio,
+                *(category.name for category in post.categories.all()),
+                *(tag.name for tag in post.tags.all()),
+            ]))
+        ))
+        if len(batch) >= 500:
+            SearchDocument.objects.bulk_create(batch)
+            batch = []
+    SearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0011_creatorrank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='content.post')),
+                ('title', models.TextField(blank=True)),
+                ('body', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(index_existing_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0012_searchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(choices=[('webp', 'WebP'), ('jpeg', 'JPEG')], max_length=4)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('file', models.FileField(max_length=255, upload_to='post_media/variants/')),
+                ('size', models.PositiveIntegerField(help_text='Size in bytes')),
+                ('source', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('media', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variants', to='content.media')),
+            ],
+            options={
+                'verbose_name': 'Media Variant',
+                'verbose_name_plural': 'Media Variants',
+                'ordering': ['format', 'width'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='mediavariant',
+            constraint=models.UniqueConstraint(fields=('media', 'format', 'width'), name='unique_media_variant'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:46
+
+import content.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0014_uploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.PositiveBigIntegerField(default=0, help_text='Size in bytes')),
+                ('ref_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Blob',
+                'verbose_name_plural': 'Blobs',
+            },
+        ),
+        migrations.AlterField(
+            model_name='media',
+            name='file',
+            field=models.FileField(storage=content.storage.ContentAddressedStorage(), upload_to='post_media/'),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='media',
+            field=models.FileField(blank=True, null=True, storage=content.storage.ContentAddressedStorage(), upload_to='chat_media/'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:50
+
+import content.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0015_blob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='media',
+            name='file',
+            field=models.FileField(db_index=True, storage=content.storage.ContentAddressedStorage(), upload_to='post_media/'),
+        ),
+        migrations.AlterField(
+            model_name='mediavariant',
+            name='file',
+            field=models.FileField(db_index=True, max_length=255, upload_to='post_media/variants/'),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='media',
+            field=models.FileField(blank=True, db_index=True, null=True, storage=content.storage.ContentAddressedStorage(), upload_to='chat_media/'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0017_media_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='bitrate',
+            field=models.PositiveIntegerField(blank=True, help_text='Bits per second', null=True),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='duration',
+            field=models.FloatField(blank=True, help_text='Seconds', null=True),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='poster',
+            field=models.FileField(blank=True, db_index=True, upload_to='post_media/posters/'),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='video_codec',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0018_video_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='hls_playlist',
+            field=models.FileField(blank=True, db_index=True, max_length=255, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_published',
+            field=models.BooleanField(default=True),
+        ),
+    ]
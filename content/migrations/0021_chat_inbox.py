@@ -0,0 +1,77 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:35
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def populate_inbox(apps, schema_editor):
+    Chat = apps.get_model('content', 'Chat')
+    ChatParticipant = apps.get_model('content', 'ChatParticipant')
+    Message = apps.get_model('content', 'Message')
+    for chat in Chat.objects.iterator():
+        last = Message.objects.filter(chat=chat).order_by('-created_at', '-id').first()
+        if last is not None:
+            chat.last_message_at = last.created_at
+            chat.last_message_preview = last.content[:100] or (last.media_type or '').capitalize()
+            chat.last_sender_id = last.sender_id
+            chat.save(update_fields=['last_message_at', 'last_message_preview', 'last_sender'])
+        unread = dict(
+            Message.objects.filter(chat=chat, is_read=False)
+            .order_by()
+            .values('sender')
+            .annotate(total=Count('pk'))
+            .values_list('sender', 'total')
+        )
+        ChatParticipant.objects.bulk_create([
+            ChatParticipant(
+                chat=chat,
+                user_id=user_id,
+                last_message_at=chat.last_message_at or chat.created_at,
+                # Sent by the other side
+                unread_count=unread.get(other_id, 0)
+            )
+            for user_id, other_id in ((chat.creator_id, chat.subscriber_id), (chat.subscriber_id, chat.creator_id))
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('content', '0020_chat_history_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='last_message_preview',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='last_sender',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.CreateModel(
+            name='ChatParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField()),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('chat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='content.chat')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_participations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-last_message_at', '-chat'], name='chatparticipant_inbox_idx')],
+                'unique_together': {('chat', 'user')},
+            },
+        ),
+        migrations.RunPython(populate_inbox, migrations.RunPython.noop),
+    ]
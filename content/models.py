@@ -1,7 +1,12 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .storage import blob_storage
+
 class Category(models.Model):
     """
     Category model for content categorization
@@ -64,16 +69,142 @@ class Post(models.Model):
     tags = models.ManyToManyField(Tag, related_name='posts', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Held back while a video of the post waits for its first HLS rendition
+    is_published = models.BooleanField(default=True)
     
+    # Engagement counters, kept in sync by content.counters
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    share_count = models.PositiveIntegerField(default=0, editable=False)
+    save_count = models.PositiveIntegerField(default=0, editable=False)
+    COUNTER_FIELDS = ('like_count', 'comment_count', 'share_count', 'save_count')
+
     def __str__(self):
         return f"{self.creator.username}'s post: {self.title}"
-    
+
+    def save(self, *args, **kwargs):
+        # Counters are only ever written by content.counters: saving the whole
+        # row would put back the values loaded with it, losing concurrent likes
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = _('Post')
         verbose_name_plural = _('Posts')
+        indexes = [
+            # Keyset pagination of a creator's posts walks (created_at, id) backwards
+            models.Index(fields=['creator', '-created_at', '-id'], name='post_creator_created_idx'),
+        ]
+
+class FeedItem(models.Model):
+    """
+    A post delivered to a subscriber's home feed inbox (fan-out on write)
+    """
+    subscriber = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='feed_items')
+    post = models.ForeignKey('Post', on_delete=models.CASCADE, related_name='feed_items')
+    creator = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    # Copied from the post so the feed can be read from this table alone
+    created_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"Post {self.post_id} in {self.subscriber_id}'s feed"
+    
+    class Meta:
+        unique_together = ['subscriber', 'post']
+        verbose_name = _('Feed Item')
+        verbose_name_plural = _('Feed Items')
+        indexes = [
+            models.Index(fields=['subscriber', '-created_at', '-post'], name='feeditem_inbox_idx'),
+            models.Index(fields=['subscriber', 'creator'], name='feeditem_prune_idx'),
+        ]
+
+class CreatorRank(models.Model):
+    """
+    Precomputed popularity of a creator, used to page through Discover
+    """
+    creator = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rank'
+    )
+    score = models.FloatField(default=0)
+    active_subscribers = models.PositiveIntegerField(default=0)
+    recent_posts = models.PositiveIntegerField(default=0)
+    recent_engagement = models.PositiveIntegerField(default=0)
+    # Copied from the creator so every Discover sort is served by an index on this table
+    subscription_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    joined_at = models.DateTimeField()
+    is_stale = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.creator_id} ranked {self.score:.2f}"
+    
+    class Meta:
+        verbose_name = _('Creator Rank')
+        verbose_name_plural = _('Creator Ranks')
+        indexes = [
+            models.Index(fields=['-score', '-creator'], name='creatorrank_trending_idx'),
+            models.Index(fields=['-joined_at', '-creator'], name='creatorrank_new_idx'),
+            models.Index(fields=['subscription_price', 'creator'], name='creatorrank_price_idx'),
+        ]
+
+class SearchDocument(models.Model):
+    """
+    Denormalized text of a post for full-text search.
+
+    The full-text index itself is database specific and created by migration:
+    a generated tsvector column with a GIN index on PostgreSQL, an FTS5 table
+    kept in sync by triggers on SQLite.
+    """
+    post = models.OneToOneField(
+        'Post',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document'
+    )
+    title = models.TextField(blank=True)
+    # Post text, creator username and bio, category and tag names
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Search document for post {self.post_id}"
+    
+    class Meta:
+        verbose_name = _('Search Document')
+        verbose_name_plural = _('Search Documents')
+
+class MediaMetadata(models.Model):
+    """
+    What is known about an uploaded image once the background extractor has
+    read it, so pages can reserve its space and paint a placeholder before
+    the image itself loads
+    """
+    ORIENTATIONS = [
+        ('landscape', _('Landscape')),
+        ('portrait', _('Portrait')),
+        ('square', _('Square')),
+    ]
+    
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    orientation = models.CharField(max_length=10, choices=ORIENTATIONS, blank=True)
+    # Tiny blurred preview as a data: URI
+    placeholder = models.TextField(blank=True)
+    exif_stripped = models.BooleanField(default=False)
+    metadata_extracted_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        abstract = True
 
-class Media(models.Model):
+class Media(MediaMetadata):
     """
     Media model for images and videos attached to posts
     """
@@ -81,11 +212,25 @@ class Media(models.Model):
         ('image', _('Image')),
         ('video', _('Video')),
     ]
+    PROCESSING_STATUSES = [
+        ('pending', _('Pending')),
+        ('processing', _('Processing')),
+        ('ready', _('Ready')),
+        ('failed', _('Failed')),
+    ]
     
-    file = models.FileField(upload_to='post_media/')
+    file = models.FileField(upload_to='post_media/', storage=blob_storage, db_index=True)
     media_type = models.CharField(max_length=10, choices=MEDIA_TYPES)
     post = models.ForeignKey('Post', on_delete=models.CASCADE, related_name='media_files')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Videos only, read by ffprobe; width and height are the displayed resolution
+    poster = models.FileField(upload_to='post_media/posters/', blank=True, db_index=True)
+    duration = models.FloatField(null=True, blank=True, help_text=_('Seconds'))
+    video_codec = models.CharField(max_length=32, blank=True)
+    bitrate = models.PositiveIntegerField(null=True, blank=True, help_text=_('Bits per second'))
+    # HLS transcoding of videos, see content.transcoding
+    processing_status = models.CharField(max_length=10, choices=PROCESSING_STATUSES, default='ready')
+    hls_playlist = models.FileField(max_length=255, blank=True, db_index=True)
     
     def __str__(self):
         return f"{self.media_type} for {self.post.title}"
@@ -94,6 +239,82 @@ class Media(models.Model):
         verbose_name = _('Media')
         verbose_name_plural = _('Media')
 
+class Blob(models.Model):
+    """
+    A file in content-addressed storage and the number of Media and Message
+    rows using it. The file is deleted when the last one goes.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0, help_text=_('Size in bytes'))
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+    
+    class Meta:
+        verbose_name = _('Blob')
+        verbose_name_plural = _('Blobs')
+
+class MediaVariant(models.Model):
+    """
+    Resized copy of an image Media, generated in the background and served
+    through srcset instead of the original upload
+    """
+    FORMATS = [
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+    ]
+    
+    media = models.ForeignKey(Media, on_delete=models.CASCADE, related_name='variants')
+    format = models.CharField(max_length=4, choices=FORMATS)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    file = models.FileField(upload_to='post_media/variants/', max_length=255, db_index=True)
+    size = models.PositiveIntegerField(help_text=_('Size in bytes'))
+    # Media.file name the variant was made from, a replaced upload gets new variants
+    source = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.width}w {self.format} of media {self.media_id}"
+    
+    class Meta:
+        verbose_name = _('Media Variant')
+        verbose_name_plural = _('Media Variants')
+        ordering = ['format', 'width']
+        constraints = [
+            models.UniqueConstraint(fields=['media', 'format', 'width'], name='unique_media_variant'),
+        ]
+
+class UploadSession(models.Model):
+    """
+    A resumable upload in progress. Chunks are appended to a temporary file
+    and ``offset`` counts the bytes received; once it reaches ``size`` the
+    file becomes a Media of ``post``.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    post = models.ForeignKey('Post', on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    media_type = models.CharField(max_length=10, choices=Media.MEDIA_TYPES)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    media = models.OneToOneField(Media, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_session')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+    
+    @property
+    def is_complete(self):
+        return self.offset >= self.size
+    
+    class Meta:
+        verbose_name = _('Upload Session')
+        verbose_name_plural = _('Upload Sessions')
+
 class Comment(models.Model):
     """
     Comment model for post comments
@@ -170,6 +391,12 @@ class Chat(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # The latest message, kept up to date by content.inbox so the inbox never reads Message
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=100, blank=True)
+    last_sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
 
     class Meta:
         unique_together = ('creator', 'subscriber')
@@ -178,17 +405,41 @@ class Chat(models.Model):
     def __str__(self):
         return f"Chat between {self.creator.username} and {self.subscriber.username}"
 
-class Message(models.Model):
+class ChatParticipant(models.Model):
+    """
+    One side of a chat, listed in that user's inbox
+    """
+    chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='participants')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='chat_participations')
+    # Copied from the chat, its creation time until the first message, so the inbox is read from this table alone
+    last_message_at = models.DateTimeField()
+    # Messages from the other side not read yet
+    unread_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"User {self.user_id} in chat {self.chat_id}"
+
+    class Meta:
+        unique_together = ['chat', 'user']
+        indexes = [
+            models.Index(fields=['user', '-last_message_at', '-chat'], name='chatparticipant_inbox_idx'),
+        ]
+
+class Message(MediaMetadata):
     chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     content = models.TextField(blank=True)
-    media = models.FileField(upload_to='chat_media/', null=True, blank=True)
+    media = models.FileField(upload_to='chat_media/', storage=blob_storage, null=True, blank=True, db_index=True)
     media_type = models.CharField(max_length=10, choices=[('image', 'Image'), ('video', 'Video')], null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Pages of chat history, see content.chat_history
+            models.Index(fields=['chat', 'created_at', 'id'], name='message_chat_history_idx'),
+        ]
 
     def __str__(self):
         return f'{self.sender.username}: {self.content[:50]}'
@@ -0,0 +1,135 @@
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import DateTimeField, Q
+from django.utils import timezone
+
+
+BIGINT_MIN, BIGINT_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder rounds datetimes to milliseconds, which breaks ties in keyset order"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    """Turn the ordering values of the last row into an opaque, URL-safe token"""
+    raw = json.dumps(list(values), cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def ordering_fields(model, ordering):
+    """The model fields of an ordering like ('-created_at', '-id'), to parse cursors with"""
+    return [model._meta.get_field(field.lstrip('-')) for field in ordering]
+
+
+def _parse_value(field, value, cursor):
+    if field.is_relation:
+        field = field.target_field
+    # Ordering columns are never null, and None would turn the keyset filter into an error
+    if value is None:
+        raise InvalidCursor(cursor)
+    try:
+        value = field.to_python(value)
+    except (ValidationError, TypeError, ValueError, OverflowError):
+        raise InvalidCursor(cursor)
+    # A number the database can't hold would fail in the query
+    if isinstance(value, int) and not BIGINT_MIN <= value <= BIGINT_MAX:
+        raise InvalidCursor(cursor)
+    if isinstance(field, DateTimeField) and timezone.is_naive(value):
+        value = timezone.make_aware(value, datetime.timezone.utc)
+    return value
+
+
+def decode_cursor(cursor, size, fields=None):
+    """
+    Decode a token produced by encode_cursor back into its ordering values.
+
+    With ``fields`` (see ordering_fields) every value is parsed as the field
+    it orders by, so a cursor that decodes but holds the wrong types is
+    refused like any other we did not issue.
+    """
+    if not isinstance(cursor, str):
+        raise InvalidCursor(cursor)
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor(cursor)
+    if fields is not None:
+        values = [_parse_value(field, value, cursor) for field, value in zip(fields, values)]
+    return values
+
+
+def keyset_filter(ordering, values):
+    """
+    Build the "strictly after this row" condition for a composite ordering, e.g.
+    for ('-created_at', '-id'): created_at < v0 OR (created_at = v0 AND id < v1)
+    """
+    condition = Q()
+    equal_so_far = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal_so_far & Q(**{f'{name}__{lookup}': value})
+        equal_so_far &= Q(**{name: value})
+    return condition
+
+
+class KeysetPage:
+    """A single page of keyset-paginated results"""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+def paginate_keyset(queryset, cursor=None, per_page=20, ordering=('-created_at', '-id')):
+    """
+    Return one page of ``queryset`` ordered by ``ordering``, starting after ``cursor``.
+
+    The last field in ``ordering`` must be unique (normally the primary key) so
+    that every row has a stable position. Each call costs one indexed range scan
+    of ``per_page + 1`` rows regardless of how deep into the results the client is.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor, len(ordering), ordering_fields(queryset.model, ordering))
+        queryset = queryset.filter(keyset_filter(ordering, values))
+
+    rows = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            getattr(last, field.lstrip('-')) for field in ordering
+        )
+    return KeysetPage(rows, next_cursor)
@@ -0,0 +1,24 @@
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
+
+from .models import Comment
+
+
+def latest_comments(limit=3, to_attr='preview_comments'):
+    """
+    Prefetch the newest ``limit`` comments of every post in one query.
+
+    Comments are ranked with ROW_NUMBER() OVER (PARTITION BY post_id) and only
+    the top ``limit`` rows per post are returned, with their authors joined in.
+    The result is stored as a list on ``to_attr``.
+    """
+    ranked = Comment.objects.annotate(
+        preview_rank=Window(
+            RowNumber(),
+            partition_by=F('post_id'),
+            order_by=[F('created_at').desc(), F('id').desc()]
+        )
+    ).filter(
+        preview_rank__lte=limit
+    ).select_related('user').order_by('-created_at', '-id')
+    return Prefetch('comments', queryset=ranked, to_attr=to_attr)
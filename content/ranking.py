@@ -0,0 +1,134 @@
+"""
+Creator popularity ranking for Discover.
+
+Each creator has a CreatorRank row holding a score computed in bulk from
+active subscribers, posting cadence and engagement over TRENDING_WINDOW.
+Subscriptions and new posts only flag the row as stale; refresh() rescores
+stale and expired rows in chunks, so Discover reads never aggregate.
+"""
+import math
+from datetime import timedelta
+
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from accounts.models import User
+from subscriptions.models import Subscription
+from .models import CreatorRank, Post
+
+TRENDING_WINDOW = timedelta(days=14)
+# Engagement keeps changing after a post goes out, so rescore at least this often
+MAX_AGE = timedelta(hours=6)
+REFRESH_CHUNK_SIZE = 500
+
+SUBSCRIBER_WEIGHT = 1.0
+CADENCE_WEIGHT = 0.5
+ENGAGEMENT_WEIGHT = 1.5
+
+
+def score(active_subscribers, recent_posts, recent_engagement):
+    # Logarithmic so one viral post or a huge back catalogue cannot dominate
+    return (
+        SUBSCRIBER_WEIGHT * math.log1p(active_subscribers) +
+        CADENCE_WEIGHT * math.log1p(recent_posts) +
+        ENGAGEMENT_WEIGHT * math.log1p(recent_engagement)
+    )
+
+
+def _per_creator(queryset, aggregate):
+    """A correlated subquery aggregating ``queryset`` for the outer creator"""
+    return Coalesce(
+        Subquery(
+            queryset.filter(creator=OuterRef('pk'))
+            .order_by()
+            .values('creator')
+            .annotate(total=aggregate)
+            .values('total'),
+            output_field=IntegerField()
+        ),
+        Value(0)
+    )
+
+
+def _rescore(creator_ids, now):
+    since = now - TRENDING_WINDOW
+    recent = Post.objects.filter(created_at__gte=since)
+    creators = User.objects.filter(id__in=creator_ids, is_creator=True).annotate(
+        active_subscribers=_per_creator(Subscription.objects.filter(active=True), Count('pk')),
+        recent_posts=_per_creator(recent, Count('pk')),
+        recent_engagement=_per_creator(recent, Sum(F('like_count') + F('comment_count') + F('share_count')))
+    ).values_list(
+        'id', 'subscription_price', 'date_joined',
+        'active_subscribers', 'recent_posts', 'recent_engagement'
+    )
+
+    ranks = [
+        CreatorRank(
+            creator_id=creator_id,
+            score=score(subscribers, posts, engagement),
+            active_subscribers=subscribers,
+            recent_posts=posts,
+            recent_engagement=engagement,
+            subscription_price=price,
+            joined_at=joined_at,
+            is_stale=False,
+            updated_at=now
+        )
+        for creator_id, price, joined_at, subscribers, posts, engagement in creators
+    ]
+    CreatorRank.objects.bulk_create(
+        ranks,
+        update_conflicts=True,
+        unique_fields=['creator'],
+        update_fields=[
+            'score', 'active_subscribers', 'recent_posts', 'recent_engagement',
+            'subscription_price', 'joined_at', 'is_stale', 'updated_at'
+        ]
+    )
+    return len(ranks)
+
+
+def refresh(full=False, chunk_size=REFRESH_CHUNK_SIZE):
+    """
+    Rescore creators and return how many rows were written.
+
+    By default only creators without a rank, with a stale rank or with a rank
+    older than MAX_AGE are rescored; ``full`` rescores everyone.
+    """
+    now = timezone.now()
+    # Users who stopped being creators drop out of Discover
+    CreatorRank.objects.filter(creator__is_creator=False).delete()
+
+    creators = User.objects.filter(is_creator=True)
+    if not full:
+        creators = creators.filter(
+            Q(rank__isnull=True) |
+            Q(rank__is_stale=True) |
+            Q(rank__updated_at__lt=now - MAX_AGE)
+        )
+    creator_ids = list(creators.order_by('pk').values_list('pk', flat=True))
+
+    refreshed = 0
+    for start in range(0, len(creator_ids), chunk_size):
+        refreshed += _rescore(creator_ids[start:start + chunk_size], now)
+    return refreshed
+
+
+def mark_stale(creator_id):
+    CreatorRank.objects.filter(creator_id=creator_id, is_stale=False).update(is_stale=True)
+
+
+def sync_creator(user):
+    """Keep a creator's rank row and its copied columns in step with the user"""
+    if not user.is_creator:
+        CreatorRank.objects.filter(creator_id=user.pk).delete()
+        return
+    CreatorRank.objects.update_or_create(
+        creator_id=user.pk,
+        defaults={
+            'subscription_price': user.subscription_price,
+            'joined_at': user.date_joined,
+            'is_stale': True,
+        }
+    )
@@ -0,0 +1,126 @@
+"""
+Full-text search over posts.
+
+Each post has a SearchDocument holding its title and the rest of its
+searchable text (post text, creator username and bio, category and tag
+names). The documents are written in the same transaction as the post, so
+the index never lags behind single-post edits; edits that touch many posts
+at once (a creator renaming themselves, a tag being renamed) reindex in the
+background.
+
+The matching and ranking run in the database: a weighted tsvector column
+with a GIN index on PostgreSQL, an FTS5 table with bm25() on SQLite. Other
+backends fall back to substring matching without ranking.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Post, SearchDocument
+
+INDEX_BATCH_SIZE = 500
+# bm25() column weights for (title, body); a title match counts ten times more
+FTS_WEIGHTS = (10.0, 1.0)
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _body(post):
+    return '\n'.join(filter(None, [
+        post.text,
+        post.creator.username,
+        post.creator.bio,
+        *(category.name for category in post.categories.all()),
+        *(tag.name for tag in post.tags.all()),
+    ]))
+
+
+def reindex(**lookup):
+    """Rebuild the search documents of the posts matching ``lookup`` (all posts by default)"""
+    posts = Post.objects.filter(**lookup).select_related('creator').prefetch_related('categories', 'tags')
+    batch = []
+    indexed = 0
+    for post in posts.order_by('pk').iterator(chunk_size=INDEX_BATCH_SIZE):
+        batch.append(SearchDocument(post_id=post.id, title=post.title, body=_body(post)))
+        if len(batch) >= INDEX_BATCH_SIZE:
+            indexed += _write(batch)
+            batch = []
+    if batch:
+        indexed += _write(batch)
+    return indexed
+
+
+def _write(documents):
+    SearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=['post'],
+        update_fields=['title', 'body', 'updated_at']
+    )
+    return len(documents)
+
+
+def index_post(post_id):
+    reindex(pk=post_id)
+
+
+def _terms(query):
+    return TERM_RE.findall(query.lower())
+
+
+def _fts5_query(terms):
+    # Every term is quoted so user input can never be parsed as FTS5 syntax
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def search_posts(query, queryset=None):
+    """
+    Filter ``queryset`` (all posts by default) to posts matching ``query``.
+
+    Posts are annotated with ``search_rank`` (higher is better) and ordered by
+    it. A query without any word characters, e.g. "@#$%", is matched as a
+    plain substring of the title or text.
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    terms = _terms(query)
+
+    if terms and connection.vendor == 'postgresql':
+        tsquery = "plainto_tsquery('english', %s)"
+        queryset = queryset.filter(pk__in=RawSQL(
+            f'SELECT post_id FROM content_searchdocument WHERE search_vector @@ {tsquery}',
+            [query]
+        )).annotate(search_rank=RawSQL(
+            f'SELECT ts_rank(search_vector, {tsquery}) FROM content_searchdocument '
+            f'WHERE content_searchdocument.post_id = content_post.id',
+            [query],
+            output_field=FloatField()
+        ))
+    elif terms and connection.vendor == 'sqlite':
+        match = _fts5_query(terms)
+        queryset = queryset.filter(pk__in=RawSQL(
+            'SELECT rowid FROM content_searchdocument_fts WHERE content_searchdocument_fts MATCH %s',
+            [match]
+        )).annotate(search_rank=RawSQL(
+            # bm25() is lower for better matches
+            f'SELECT -bm25(content_searchdocument_fts, {FTS_WEIGHTS[0]}, {FTS_WEIGHTS[1]}) '
+            f'FROM content_searchdocument_fts '
+            f'WHERE content_searchdocument_fts MATCH %s AND rowid = content_post.id',
+            [match],
+            output_field=FloatField()
+        ))
+    else:
+        condition = Q()
+        for term in terms or [query.strip()]:
+            condition &= (
+                Q(title__icontains=term) |
+                Q(text__icontains=term) |
+                Q(creator__username__icontains=term)
+            )
+        queryset = queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+    return queryset.order_by('-search_rank', '-created_at', '-id')
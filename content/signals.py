@@ -0,0 +1,296 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_init, pre_save, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from accounts.signals import changed_fields, note_changed_fields, remember_fields
+from subscriptions.models import Subscription, PaymentHistory
+from . import blobs, counters, entitlements, facets, feed, inbox, media_metadata, ranking, search, transcoding, typeahead
+from .models import Post, Media, MediaVariant, Chat, Message, Like, Comment, Share, Save, Category, Tag
+from .tasks import enqueue_on_commit, enqueue_in_queue_on_commit
+
+
+# Post fields whose changes post_save receivers act on
+TRACKED_POST_FIELDS = ('visibility', 'is_published')
+
+
+@receiver(post_init, sender=Post)
+def remember_tracked_post_fields(sender, instance, **kwargs):
+    remember_fields(instance, TRACKED_POST_FIELDS)
+
+
+@receiver(pre_save, sender=Post)
+def note_changed_post_fields(sender, instance, update_fields=None, **kwargs):
+    note_changed_fields(instance, TRACKED_POST_FIELDS, update_fields)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    """Deliver a new post to subscriber inboxes once it is committed, or once it stops being private"""
+    if created or ('visibility' in changed_fields(instance) and instance.visibility != 'private'):
+        enqueue_on_commit(feed.fan_out_post, instance.id)
+
+
+@receiver(post_save, sender=Subscription)
+def sync_feed_on_subscription_change(sender, instance, **kwargs):
+    """Backfill the inbox on subscribe and prune it on cancel"""
+    if instance.active:
+        enqueue_on_commit(feed.backfill_subscription, instance.subscriber_id, instance.creator_id)
+    else:
+        enqueue_on_commit(feed.prune_subscription, instance.subscriber_id, instance.creator_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def prune_feed_on_subscription_delete(sender, instance, **kwargs):
+    enqueue_on_commit(feed.prune_subscription, instance.subscriber_id, instance.creator_id)
+
+
+@receiver(post_save, sender=Chat)
+def add_chat_to_inboxes(sender, instance, created, **kwargs):
+    if created:
+        inbox.add_participants(instance)
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Share)
+@receiver(post_save, sender=Save)
+def increment_engagement_counter(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust(instance.post_id, counters.counter_field_for(sender), 1)
+
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Share)
+@receiver(post_delete, sender=Save)
+def decrement_engagement_counter(sender, instance, **kwargs):
+    counters.adjust(instance.post_id, counters.counter_field_for(sender), -1)
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+@receiver(post_save, sender=PaymentHistory)
+@receiver(post_delete, sender=PaymentHistory)
+def invalidate_entitlements(sender, instance, **kwargs):
+    """Forget cached access sets and facet counts when a subscription or purchase changes"""
+    user_id = instance.subscriber_id if sender is Subscription else instance.user_id
+    entitlements.invalidate(user_id)
+    # Facet counts only cover posts the user may see
+    facets.invalidate_user(user_id)
+    # Again after commit, in case a concurrent request re-cached the old state
+    transaction.on_commit(lambda: entitlements.invalidate(user_id))
+    transaction.on_commit(lambda: facets.invalidate_user(user_id))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def mark_creator_rank_stale(sender, instance, **kwargs):
+    """Queue the creator for the next incremental rank refresh"""
+    if sender is Post and not kwargs.get('created'):
+        return
+    ranking.mark_stale(instance.creator_id)
+
+
+RANK_USER_FIELDS = {'is_creator', 'subscription_price', 'date_joined'}
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def sync_creator_rank(sender, instance, **kwargs):
+    # Logins and chat presence touch none of these; skip anything that cannot affect the rank row
+    if not RANK_USER_FIELDS.intersection(changed_fields(instance)):
+        return
+    ranking.sync_creator(instance)
+
+
+@receiver(post_save, sender=Post)
+def index_post_for_search(sender, instance, **kwargs):
+    # In the same transaction, so search results never show a stale edit
+    search.index_post(instance.id)
+
+
+@receiver(m2m_changed, sender=Post.categories.through)
+@receiver(m2m_changed, sender=Post.tags.through)
+def reindex_on_label_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            search.index_post(instance.pk)
+    elif action in ('post_add', 'post_remove') and pk_set:
+        enqueue_on_commit(search.reindex, pk__in=list(pk_set))
+    elif action == 'pre_clear':
+        # The affected posts cannot be found once the links are gone
+        enqueue_on_commit(search.reindex, pk__in=list(instance.posts.values_list('pk', flat=True)))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+def reindex_renamed_label(sender, instance, created, **kwargs):
+    if not created:
+        field = 'categories' if sender is Category else 'tags'
+        enqueue_on_commit(search.reindex, **{field: instance.pk})
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Tag)
+def reindex_deleted_label(sender, instance, **kwargs):
+    enqueue_on_commit(search.reindex, pk__in=list(instance.posts.values_list('pk', flat=True)))
+
+
+SEARCH_USER_FIELDS = {'username', 'bio'}
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_creator_posts(sender, instance, created, **kwargs):
+    """A creator's username and bio are part of every one of their posts' documents"""
+    if created or not instance.is_creator:
+        return
+    # Not on saves that leave both alone, e.g. chat presence updates
+    if not SEARCH_USER_FIELDS.intersection(changed_fields(instance)):
+        return
+    enqueue_on_commit(search.reindex, creator_id=instance.pk)
+
+
+TYPEAHEAD_USER_FIELDS = {'username', 'is_creator', 'is_active'}
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def sync_creator_typeahead(sender, instance, created, **kwargs):
+    if created and not instance.is_creator:
+        return
+    # A Redis round trip with that backend, so not for saves that change nothing indexed
+    if not TYPEAHEAD_USER_FIELDS.intersection(changed_fields(instance)):
+        return
+    enqueue_on_commit(typeahead.sync_creator, instance)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def remove_creator_typeahead(sender, instance, **kwargs):
+    enqueue_on_commit(typeahead.remove, 'creator', instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+def sync_label_typeahead(sender, instance, **kwargs):
+    enqueue_on_commit(typeahead.sync_label, instance)
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+def remove_label_typeahead(sender, instance, **kwargs):
+    enqueue_on_commit(typeahead.remove, 'tag' if sender is Tag else 'category', instance.pk)
+
+
+@receiver(m2m_changed, sender=Post.categories.through)
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_facets_on_label_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        facets.invalidate()
+
+
+@receiver(post_save, sender=Post)
+def invalidate_facets_on_post_change(sender, instance, **kwargs):
+    # Visibility and publication move a post in or out of other viewers' counts; edits and counters don't
+    if changed_fields(instance):
+        facets.invalidate()
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_facets_on_post_delete(sender, instance, **kwargs):
+    facets.invalidate()
+
+
+@receiver(post_save, sender=Media)
+def process_uploaded_media(sender, instance, update_fields=None, **kwargs):
+    # Metadata, then variants of images; no-ops when already done for the stored file
+    if not media_metadata.is_metadata_update(update_fields):
+        enqueue_on_commit(media_metadata.process_media, instance.pk)
+
+
+@receiver(pre_save, sender=Media)
+def mark_video_for_transcoding(sender, instance, update_fields=None, **kwargs):
+    if instance.media_type != 'video' or not settings.HLS_TRANSCODING:
+        return
+    if media_metadata.is_metadata_update(update_fields):
+        return
+    replaced = instance.pk and instance.file.name != getattr(instance, '_stored_blob', instance.file.name)
+    if instance._state.adding or replaced:
+        instance.processing_status = 'pending'
+        instance.hls_playlist = ''
+
+
+@receiver(post_save, sender=Media)
+def transcode_uploaded_video(sender, instance, update_fields=None, **kwargs):
+    """Hold the post back until the video has a rendition, and queue the transcoding"""
+    if instance.processing_status == 'pending' and not media_metadata.is_metadata_update(update_fields):
+        transcoding.sync_publication(instance.post_id)
+        enqueue_in_queue_on_commit(transcoding.QUEUE, transcoding.transcode, instance.pk)
+
+
+@receiver(post_delete, sender=Media)
+def release_held_post(sender, instance, **kwargs):
+    if instance.processing_status in transcoding.IN_PROGRESS:
+        transcoding.sync_publication(instance.post_id)
+
+
+@receiver(post_save, sender=Message)
+def process_chat_image(sender, instance, update_fields=None, **kwargs):
+    if instance.media_type == 'image' and not media_metadata.is_metadata_update(update_fields):
+        enqueue_on_commit(media_metadata.process_message, instance.pk)
+
+
+@receiver(post_delete, sender=MediaVariant)
+def delete_variant_file(sender, instance, **kwargs):
+    name = instance.file.name
+    storage = instance.file.storage
+    transaction.on_commit(lambda: storage.delete(name))
+
+
+@receiver(post_delete, sender=Media)
+def delete_poster_file(sender, instance, **kwargs):
+    if instance.poster:
+        name = instance.poster.name
+        storage = instance.poster.storage
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+@receiver(post_init, sender=Media)
+@receiver(post_init, sender=Message)
+def remember_blob(sender, instance, **kwargs):
+    # What the row points at in the database, to spot a replaced file on save
+    field = blobs.BLOB_FIELDS[sender]
+    if field not in instance.get_deferred_fields():
+        instance._stored_blob = getattr(instance, field).name
+
+
+@receiver(pre_save, sender=Media)
+@receiver(pre_save, sender=Message)
+def reset_replaced_image_metadata(sender, instance, update_fields=None, **kwargs):
+    # A new file is read again; the extractor's own rewrite keeps what it found
+    name = getattr(instance, blobs.BLOB_FIELDS[sender]).name
+    replaced = instance.pk and name != getattr(instance, '_stored_blob', name)
+    if replaced and not media_metadata.is_metadata_update(update_fields):
+        media_metadata.reset(instance)
+
+
+@receiver(post_save, sender=Media)
+@receiver(post_save, sender=Message)
+def count_blob_reference(sender, instance, created, **kwargs):
+    name = getattr(instance, blobs.BLOB_FIELDS[sender]).name
+    # Loaded with the file deferred: assume the file was not replaced
+    previous = None if created else getattr(instance, '_stored_blob', name)
+    if name != previous:
+        if name:
+            blobs.acquire(name)
+        if previous:
+            blobs.release(previous)
+    instance._stored_blob = name
+
+
+@receiver(post_delete, sender=Media)
+@receiver(post_delete, sender=Message)
+def release_blob_reference(sender, instance, **kwargs):
+    # The stored name, in case the instance was given another file and not saved
+    name = getattr(instance, '_stored_blob', None) or getattr(instance, blobs.BLOB_FIELDS[sender]).name
+    if name:
+        blobs.release(name)
@@ -0,0 +1,274 @@
+"""
+File storage for uploads.
+
+TieredStorage keeps every file in an S3-compatible object store
+(MEDIA_REMOTE_STORAGE) and uses the local media directory as a cache of it:
+saved files are written locally and uploaded before save() returns, and
+reads are served from the local copy, downloading it first on a miss. The
+cache is bounded by MEDIA_CACHE_MAX_SIZE; when it outgrows that the least
+recently read files are evicted, so media that is read all the time (the
+popular creators', kept warm by the warm_media_cache command) never goes
+back to the object store. Without MEDIA_REMOTE_STORAGE the local directory
+holds the only copy and nothing is ever evicted.
+
+ContentAddressedStorage stores every file once, named after the SHA-256 of
+its bytes, which is computed while the upload is copied to disk. Saving a
+file that is already stored only costs the hash; the copy is dropped and the
+existing name is returned. Which rows use a stored file is tracked by Blob,
+see content.blobs.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, Storage
+from django.core.signals import setting_changed
+from django.utils.deconstruct import deconstructible
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+
+# Evicting stops once the cache is this much of its maximum size
+CACHE_LOW_WATER = 0.9
+# Reading a file marks it as used at most this often, in seconds
+TOUCH_INTERVAL = 60
+COPY_BUFFER_SIZE = 1024 * 1024
+# Partial downloads, never evicted
+FETCH_PREFIX = '.fetch-'
+
+
+class _CacheUsage:
+    """Bytes used by one cache directory, shared by every storage using it"""
+
+    def __init__(self):
+        self.size = None
+        self.lock = threading.Lock()
+
+
+_usage = {}
+_usage_lock = threading.Lock()
+
+
+def _cache_usage(location):
+    with _usage_lock:
+        return _usage.setdefault(location, _CacheUsage())
+
+
+@deconstructible
+class TieredStorage(Storage):
+    # Directories of scratch files, relative to the cache, never evicted
+    scratch_dirs = ()
+
+    def __init__(self, location=None, base_url=None, remote=None, max_cache_size=None):
+        self.local = FileSystemStorage(location=location, base_url=base_url)
+        self._remote = remote
+        self._max_cache_size = max_cache_size
+        setting_changed.connect(self._clear_cached_properties)
+
+    def _clear_cached_properties(self, setting, **kwargs):
+        if setting == 'MEDIA_REMOTE_STORAGE':
+            self.__dict__.pop('remote', None)
+
+    @cached_property
+    def remote(self):
+        """The object store, or None when files are only stored locally"""
+        if self._remote is not None:
+            return self._remote
+        config = settings.MEDIA_REMOTE_STORAGE
+        if not config:
+            return None
+        return import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+
+    @property
+    def max_cache_size(self):
+        return self._max_cache_size if self._max_cache_size is not None else settings.MEDIA_CACHE_MAX_SIZE
+
+    def _save(self, name, content):
+        name = self.local._save(name, content)
+        self._stored(name)
+        return name
+
+    def _stored(self, name):
+        """Upload a file just written to the cache"""
+        if self.remote is None:
+            return
+        local_path = self.local.path(name)
+        with open(local_path, 'rb') as cached:
+            self.remote.save(name, File(cached))
+        self._grow(os.path.getsize(local_path))
+
+    def _open(self, name, mode='rb'):
+        return File(open(self.path(name), mode))
+
+    def path(self, name):
+        """Local path of the file, downloaded into the cache if it isn't there"""
+        return self._fetch(name)
+
+    def _fetch(self, name, touch_interval=TOUCH_INTERVAL):
+        local_path = self.local.path(name)
+        try:
+            stat_result = os.stat(local_path)
+        except FileNotFoundError:
+            stat_result = None
+        if stat_result is not None:
+            now = time.time()
+            # Explicit, as media directories are often mounted noatime
+            if now - stat_result.st_atime >= touch_interval:
+                os.utime(local_path, (now, stat_result.st_mtime))
+            return local_path
+        if self.remote is None:
+            return local_path
+
+        directory = os.path.dirname(local_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=FETCH_PREFIX)
+        try:
+            with os.fdopen(fd, 'wb') as temp, self.remote.open(name, 'rb') as stored:
+                shutil.copyfileobj(stored, temp, COPY_BUFFER_SIZE)
+            # Two requests fetching the same file write the same bytes
+            os.replace(temp_path, local_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._grow(os.path.getsize(local_path))
+        return local_path
+
+    def warm(self, name):
+        """Make sure the file is cached and mark it as just used; returns whether it had to be downloaded"""
+        cached = self.local.exists(name)
+        self._fetch(name, touch_interval=0)
+        return not cached
+
+    def is_cached(self, name):
+        return self.local.exists(name)
+
+    def delete(self, name):
+        self.local.delete(name)
+        if self.remote is not None:
+            self.remote.delete(name)
+
+    def exists(self, name):
+        return self.local.exists(name) or (self.remote is not None and self.remote.exists(name))
+
+    def listdir(self, path):
+        return (self.remote or self.local).listdir(path)
+
+    def size(self, name):
+        if self.remote is None or self.local.exists(name):
+            return self.local.size(name)
+        return self.remote.size(name)
+
+    def url(self, name):
+        # Served by protected_media from the cache, never straight from the object store
+        return self.local.url(name)
+
+    def get_accessed_time(self, name):
+        return self._timestamps(name).get_accessed_time(name)
+
+    def get_created_time(self, name):
+        return self._timestamps(name).get_created_time(name)
+
+    def get_modified_time(self, name):
+        return self._timestamps(name).get_modified_time(name)
+
+    def _timestamps(self, name):
+        return self.local if self.remote is None or self.local.exists(name) else self.remote
+
+    def _grow(self, size):
+        usage = _cache_usage(self.local.location)
+        with usage.lock:
+            if usage.size is None:
+                usage.size = sum(size for _, size, _ in self._cached_files())
+            else:
+                usage.size += size
+            if usage.size > self.max_cache_size:
+                usage.size = self._evict(usage.size)
+
+    def _cached_files(self):
+        """(name, size, last access) of every cached file that may be evicted"""
+        root = self.local.location
+        scratch = {os.path.join(root, directory) for directory in self.scratch_dirs}
+        for directory, subdirectories, filenames in os.walk(root):
+            subdirectories[:] = [d for d in subdirectories if os.path.join(directory, d) not in scratch]
+            for filename in filenames:
+                if filename.startswith(FETCH_PREFIX):
+                    continue
+                full_path = os.path.join(directory, filename)
+                try:
+                    stat_result = os.stat(full_path)
+                except FileNotFoundError:
+                    continue
+                name = os.path.relpath(full_path, root).replace(os.sep, '/')
+                yield name, stat_result.st_size, stat_result.st_atime
+
+    def _evict(self, used):
+        """Delete least recently read files until the cache is under its low-water mark; returns the new size"""
+        files = sorted(self._cached_files(), key=lambda cached: cached[2])
+        # Measured again: other processes share the directory
+        used = sum(size for _, size, _ in files)
+        target = self.max_cache_size * CACHE_LOW_WATER
+        for name, size, _ in files:
+            if used <= target:
+                break
+            # Files stored before the object store was configured are the only copy
+            if not self.remote.exists(name):
+                continue
+            try:
+                os.remove(self.local.path(name))
+            except FileNotFoundError:
+                continue
+            used -= size
+        return used
+
+
+@deconstructible
+class ContentAddressedStorage(TieredStorage):
+    prefix = 'blobs'
+    scratch_dirs = (f'{prefix}/tmp',)
+
+    def get_available_name(self, name, max_length=None):
+        # Names come from the content, identical content is meant to share one
+        return name
+
+    def blob_name(self, digest, ext):
+        return f'{self.prefix}/{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+    def is_blob(self, name):
+        return bool(name) and name.startswith(f'{self.prefix}/')
+
+    def _save(self, name, content):
+        # The extension is kept so the file is served with the right content type
+        ext = os.path.splitext(name)[1].lower()
+        scratch = self.local.path(f'{self.prefix}/tmp')
+        os.makedirs(scratch, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=scratch)
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+            name = self.blob_name(digest.hexdigest(), ext)
+            if self.exists(name):
+                os.remove(temp_path)
+            else:
+                path = self.local.path(name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if self.local.file_permissions_mode is not None:
+                    os.chmod(temp_path, self.local.file_permissions_mode)
+                # Atomic, and two uploads of the same bytes racing here write the same file
+                os.replace(temp_path, path)
+                self._stored(name)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
+
+
+blob_storage = ContentAddressedStorage()
@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+DEFAULT_QUEUE = 'default'
+
+_executors = {}
+
+
+def _get_executor(queue=DEFAULT_QUEUE):
+    # Long jobs get a queue of their own so they can't hold up quick ones
+    if queue not in _executors:
+        _executors[queue] = ThreadPoolExecutor(
+            max_workers=settings.BACKGROUND_QUEUE_WORKERS.get(queue, settings.BACKGROUND_TASK_WORKERS),
+            thread_name_prefix=f'fanshub-{queue}'
+        )
+    return _executors[queue]
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    finally:
+        # Worker threads get their own DB connection, don't leak it
+        close_old_connections()
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Run ``func`` off the request thread.
+
+    With BACKGROUND_TASKS_EAGER (the default in development and tests) the
+    function runs inline so behaviour is deterministic.
+    """
+    run_in_queue(DEFAULT_QUEUE, func, *args, **kwargs)
+
+
+def run_in_queue(queue, func, *args, **kwargs):
+    """run_in_background() on the workers of ``queue`` (see BACKGROUND_QUEUE_WORKERS)"""
+    if settings.BACKGROUND_TASKS_EAGER:
+        func(*args, **kwargs)
+        return
+    _get_executor(queue).submit(_run, func, args, kwargs)
+
+
+def enqueue_on_commit(func, *args, **kwargs):
+    """Schedule ``func`` to run in the background once the current transaction commits"""
+    transaction.on_commit(lambda: run_in_background(func, *args, **kwargs))
+
+
+def enqueue_in_queue_on_commit(queue, func, *args, **kwargs):
+    transaction.on_commit(lambda: run_in_queue(queue, func, *args, **kwargs))
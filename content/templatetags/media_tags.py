@@ -0,0 +1,86 @@
+import mimetypes
+
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from content.derivatives import is_current
+
+register = template.Library()
+
+
+@register.filter
+def media_url(obj):
+    """Signed URL of a Media or MediaVariant when the view signed it, its plain URL otherwise"""
+    return getattr(obj, 'signed_url', None) or obj.file.url
+
+
+def _placeholder_style(media):
+    # Painted behind the image until it loads
+    if not media.placeholder:
+        return ''
+    return format_html(' style="background: url({}) center / cover no-repeat"', media.placeholder)
+
+
+def _dimensions(width, height):
+    if not width or not height:
+        return ''
+    return format_html(' width="{}" height="{}"', width, height)
+
+
+def _srcset(variants):
+    return format_html_join(', ', '{} {}w', ((media_url(variant), variant.width) for variant in variants))
+
+
+@register.simple_tag
+def responsive_image(media, sizes='(max-width: 768px) 100vw, 720px', css_class='post-media img-fluid', alt=''):
+    """
+    <picture> offering the WebP and JPEG variants of ``media`` at every width.
+
+    Falls back to the original upload until the variants exist. Once the
+    image's metadata is extracted its size is always given, so the page
+    doesn't reflow, and its placeholder is painted while it loads. Prefetch
+    ``media_files__variants`` when rendering a list of posts.
+    """
+    variants = list(media.variants.all())
+    if not is_current(media, variants):
+        return format_html(
+            '<img src="{}"{} class="{}" alt="{}" loading="lazy" decoding="async"{} />',
+            media_url(media), _dimensions(media.width, media.height), css_class, alt, _placeholder_style(media)
+        )
+    webp = [variant for variant in variants if variant.format == 'webp']
+    jpeg = [variant for variant in variants if variant.format == 'jpeg'] or webp
+    largest = max(jpeg, key=lambda variant: variant.width)
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}"{} class="{}" alt="{}" '
+        'loading="lazy" decoding="async"{} /></picture>',
+        format_html('<source type="image/webp" srcset="{}" sizes="{}" />', _srcset(webp), sizes) if webp else '',
+        media_url(largest), _srcset(jpeg), sizes, _dimensions(largest.width, largest.height), css_class, alt,
+        _placeholder_style(media)
+    )
+
+
+@register.simple_tag
+def video_player(media, css_class='post-media w-100'):
+    """
+    <video> that shows the poster of ``media`` and fetches nothing of the
+    video itself until it is played.
+
+    Offers the HLS renditions first when there are any: browsers that play
+    HLS natively pick them, others get them through hls.js (see base.html)
+    and fall back to the original upload.
+    """
+    poster = ''
+    if media.poster:
+        poster = format_html(' poster="{}"', getattr(media, 'signed_poster_url', None) or media.poster.url)
+    hls_attribute = hls_source = ''
+    if media.hls_playlist:
+        hls_url = getattr(media, 'signed_hls_url', None) or media.hls_playlist.url
+        hls_attribute = format_html(' data-hls="{}"', hls_url)
+        hls_source = format_html('<source src="{}" type="application/vnd.apple.mpegurl" />', hls_url)
+    content_type = mimetypes.guess_type(media.file.name)[0] or 'video/mp4'
+    return format_html(
+        '<video controls preload="none" playsinline{}{}{} class="{}"{}>{}<source src="{}" type="{}" />'
+        'Your browser does not support the video tag.</video>',
+        poster, hls_attribute, _dimensions(media.width, media.height), css_class, _placeholder_style(media),
+        hls_source, media_url(media), content_type
+    )
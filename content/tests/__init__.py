@@ -8,6 +8,27 @@ from .test_media import MediaTests
 from .test_ui import UITests
 from .test_landing import LandingPageTests
 from .test_posts import PostTests
+from .test_feed import FeedPaginationTests, FeedInboxTests
+from .test_counters import EngagementCounterTests
+from .test_prefetch import LatestCommentsPrefetchTests
+from .test_entitlements import EntitlementTests
+from .test_access_annotation import AccessAnnotationTests
+from .test_featured import FeaturedCreatorTests
+from .test_ranking import CreatorRankTests
+from .test_search_index import SearchIndexTests
+from .test_typeahead import PrefixTrieTests, AutocompleteTests
+from .test_facets import FacetCountTests
+from .test_media_variants import ImagingTests, MediaVariantTests
+from .test_uploads import ResumableUploadTests
+from .test_blobs import BlobStorageTests
+from .test_protected_media import ProtectedMediaTests
+from .test_media_signing import SignedMediaTests
+from .test_chat_media import FrameTests, BinaryChatMediaTests
+from .test_media_metadata import InspectTests, MediaMetadataTests, VideoProbeTests, VideoPosterTests
+from .test_transcoding import RenditionLadderTests, TranscodingTests
+from .test_tiered_storage import TieredStorageTests, MediaCacheTests
+from .test_chat_history import ChatHistoryTests, ChatHistorySocketTests
+from .test_inbox import InboxTests, InboxSocketTests
 
 __all__ = [
     'TemplateTests',
@@ -18,4 +39,36 @@ __all__ = [
     'UITests',
     'LandingPageTests',
     'PostTests',
+    'FeedPaginationTests',
+    'FeedInboxTests',
+    'EngagementCounterTests',
+    'LatestCommentsPrefetchTests',
+    'EntitlementTests',
+    'AccessAnnotationTests',
+    'FeaturedCreatorTests',
+    'CreatorRankTests',
+    'SearchIndexTests',
+    'PrefixTrieTests',
+    'AutocompleteTests',
+    'FacetCountTests',
+    'ImagingTests',
+    'MediaVariantTests',
+    'ResumableUploadTests',
+    'BlobStorageTests',
+    'ProtectedMediaTests',
+    'SignedMediaTests',
+    'FrameTests',
+    'BinaryChatMediaTests',
+    'InspectTests',
+    'MediaMetadataTests',
+    'VideoProbeTests',
+    'VideoPosterTests',
+    'RenditionLadderTests',
+    'TranscodingTests',
+    'TieredStorageTests',
+    'MediaCacheTests',
+    'ChatHistoryTests',
+    'ChatHistorySocketTests',
+    'InboxTests',
+    'InboxSocketTests',
 ] 
\ No newline at end of file
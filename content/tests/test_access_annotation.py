@@ -0,0 +1,99 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils import timezone
+from datetime import timedelta
+from content import entitlements
+from content.models import Post
+from subscriptions.models import Subscription, PaymentHistory
+
+User = get_user_model()
+
+class AccessAnnotationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True,
+            subscription_price=9.99
+        )
+        self.subscriber = User.objects.create_user(
+            username='subscriber',
+            email='subscriber@example.com',
+            password='testpass123'
+        )
+        Subscription.objects.create(
+            subscriber=self.subscriber,
+            creator=self.creator,
+            active=True,
+            expires_at=timezone.now() + timedelta(days=30),
+            price=9.99
+        )
+        self.public_post = Post.objects.create(creator=self.creator, title='Public', text='Public text', visibility='public')
+        self.subscribers_post = Post.objects.create(
+            creator=self.creator, title='Subs', text='Subscribers text', visibility='subscribers'
+        )
+        self.premium_post = Post.objects.create(
+            creator=self.creator, title='Premium', text='Premium text', visibility='premium', price=5
+        )
+        self.bought_post = Post.objects.create(
+            creator=self.creator, title='Bought', text='Bought text', visibility='premium', price=5
+        )
+        PaymentHistory.objects.create(
+            user=self.subscriber,
+            recipient=self.creator,
+            payment_type='post',
+            amount=5,
+            status='succeeded',
+            post=self.bought_post
+        )
+        self.private_post = Post.objects.create(creator=self.creator, title='Private', text='Private text', visibility='private')
+
+    def tearDown(self):
+        cache.clear()
+
+    def _flags(self, user):
+        posts = entitlements.annotate_access(Post.objects.all(), user)
+        return {post.id: (post.can_view, post.is_locked, post.needs_purchase) for post in posts}
+
+    def test_single_query_for_a_page(self):
+        """Test that the access flags of a whole page come back with the posts"""
+        user = User.objects.get(pk=self.subscriber.pk)
+        with self.assertNumQueries(1):
+            self._flags(user)
+
+    def test_subscriber_flags(self):
+        """Test the flags for a subscriber with one purchase"""
+        flags = self._flags(self.subscriber)
+        self.assertEqual(flags[self.public_post.id], (True, False, False))
+        self.assertEqual(flags[self.subscribers_post.id], (True, False, False))
+        self.assertEqual(flags[self.premium_post.id], (False, True, True))
+        self.assertEqual(flags[self.bought_post.id], (True, False, False))
+        self.assertEqual(flags[self.private_post.id], (False, True, False))
+
+    def test_flags_match_can_view(self):
+        """Test that the annotation agrees with the per-post check for every viewer"""
+        for user in (AnonymousUser(), self.subscriber, self.creator):
+            for post in entitlements.annotate_access(Post.objects.all(), user):
+                self.assertEqual(post.can_view, entitlements.can_view(user, post))
+
+    def test_creator_profile_renders_locked_cards(self):
+        """Test that non-subscribers get locked teasers without the content"""
+        response = self.client.get(reverse('creator_profile', args=[self.creator.username]))
+        self.assertContains(response, 'Public text')
+        self.assertNotContains(response, 'Subscribers text')
+        self.assertNotContains(response, 'Premium text')
+        self.assertNotContains(response, 'Private text')
+        self.assertContains(response, 'Subscribe for')
+
+        self.client.login(username='subscriber', password='testpass123')
+        response = self.client.get(reverse('creator_profile', args=[self.creator.username]))
+        self.assertContains(response, 'Subscribers text')
+        self.assertContains(response, 'Bought text')
+        self.assertNotContains(response, 'Premium text')
+        self.assertContains(response, 'Purchase for $5.00')
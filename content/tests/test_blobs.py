@@ -0,0 +1,125 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from io import StringIO
+import hashlib
+import os
+import shutil
+import tempfile
+from content.models import Post, Media, Chat, Message, Blob
+from content.storage import blob_storage
+
+User = get_user_model()
+
+class BlobStorageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.fan = User.objects.create_user(
+            username='fan',
+            email='fan@example.com',
+            password='testpass123'
+        )
+        self.post = Post.objects.create(creator=self.creator, title='Post', text='x', visibility='public')
+        self.chat = Chat.objects.create(creator=self.creator, subscriber=self.fan)
+        self.content = b'the same video bytes' * 1000
+        self.digest = hashlib.sha256(self.content).hexdigest()
+
+    def add_media(self, content=None, name='clip.mp4'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Media.objects.create(
+                post=self.post,
+                media_type='video',
+                file=SimpleUploadedFile(name, content or self.content)
+            )
+
+    def test_files_are_named_by_their_hash(self):
+        name = blob_storage.save('chat_media/upload.MP4', ContentFile(self.content))
+        self.assertEqual(name, f'blobs/{self.digest[:2]}/{self.digest[2:4]}/{self.digest}.mp4')
+        with blob_storage.open(name) as stored:
+            self.assertEqual(stored.read(), self.content)
+
+    def test_identical_uploads_share_one_file(self):
+        first = self.add_media(name='first.mp4')
+        second = self.add_media(name='second.mp4')
+        with self.captureOnCommitCallbacks(execute=True):
+            message = Message.objects.create(
+                chat=self.chat, sender=self.creator, media=ContentFile(self.content, name='chat.mp4'), media_type='video'
+            )
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(message.media.name, first.file.name)
+        blob = Blob.objects.get()
+        self.assertEqual((blob.name, blob.ref_count, blob.size), (first.file.name, 3, len(self.content)))
+        self.assertEqual(os.listdir(os.path.dirname(blob_storage.path(blob.name))), [os.path.basename(blob.name)])
+
+    def test_file_is_deleted_with_its_last_reference(self):
+        first = self.add_media()
+        self.add_media()
+        name = first.file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(blob_storage.exists(name))
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.delete()
+        self.assertFalse(blob_storage.exists(name))
+        self.assertFalse(Blob.objects.exists())
+
+    def test_file_uploaded_again_before_cleanup_is_kept(self):
+        media = self.add_media()
+        name = media.file.name
+        with self.captureOnCommitCallbacks() as callbacks:
+            media.delete()
+        self.assertEqual(Blob.objects.get().ref_count, 0)
+        self.add_media()
+        for callback in callbacks:
+            callback()
+        self.assertTrue(blob_storage.exists(name))
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+
+    def test_replacing_a_file_moves_the_reference(self):
+        media = self.add_media()
+        old_name = media.file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            media.file = SimpleUploadedFile('new.mp4', b'different bytes')
+            media.save()
+        self.assertFalse(blob_storage.exists(old_name))
+        self.assertEqual(list(Blob.objects.values_list('name', 'ref_count')), [(media.file.name, 1)])
+
+        # Saving without touching the file keeps the count
+        media = Media.objects.get(pk=media.pk)
+        media.save()
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+
+    def test_existing_files_are_imported(self):
+        legacy = [
+            blob_storage.path('post_media/a.mp4'),
+            blob_storage.path('post_media/b.mp4'),
+        ]
+        os.makedirs(os.path.dirname(legacy[0]))
+        for path in legacy:
+            with open(path, 'wb') as legacy_file:
+                legacy_file.write(self.content)
+        Media.objects.bulk_create([
+            Media(post=self.post, media_type='video', file='post_media/a.mp4'),
+            Media(post=self.post, media_type='video', file='post_media/b.mp4'),
+        ])
+        output = StringIO()
+        call_command('deduplicate_media', stdout=output)
+
+        names = set(Media.objects.values_list('file', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertEqual(Blob.objects.get(name=names.pop()).ref_count, 2)
+        self.assertFalse(any(os.path.exists(path) for path in legacy))
+        self.assertIn('Moved 2', output.getvalue())
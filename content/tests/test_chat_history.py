@@ -0,0 +1,102 @@
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from channels.routing import URLRouter
+from datetime import timedelta
+from unittest import mock
+from content import chat_history
+from content.models import Chat, Message
+from content.pagination import InvalidCursor, encode_cursor
+from content.routing import websocket_urlpatterns
+
+User = get_user_model()
+
+
+def make_chat(count):
+    creator = User.objects.create_user(
+        username='creator',
+        email='creator@example.com',
+        password='testpass123',
+        is_creator=True
+    )
+    fan = User.objects.create_user(username='fan', email='fan@example.com', password='testpass123')
+    chat = Chat.objects.create(creator=creator, subscriber=fan)
+    sent_at = timezone.now() - timedelta(days=1)
+    for index in range(count):
+        message = Message.objects.create(chat=chat, sender=fan, content=f'message {index}')
+        # Pairs of messages sent in the same instant, which the id orders
+        Message.objects.filter(pk=message.pk).update(created_at=sent_at + timedelta(seconds=index // 2))
+    return chat
+
+
+@mock.patch.object(chat_history, 'PAGE_SIZE', 3)
+class ChatHistoryTests(TestCase):
+    def setUp(self):
+        self.chat = make_chat(8)
+
+    def test_pages_walk_back_to_the_first_message(self):
+        pages = []
+        cursor = None
+        while True:
+            messages, cursor = chat_history.page(self.chat.pk, cursor)
+            pages.append([message.content for message in messages])
+            if cursor is None:
+                break
+        self.assertEqual(pages, [
+            ['message 5', 'message 6', 'message 7'],
+            ['message 2', 'message 3', 'message 4'],
+            ['message 0', 'message 1'],
+        ])
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            chat_history.page(self.chat.pk, 'not a cursor')
+
+    def test_page_renders_only_the_newest_messages(self):
+        client = Client()
+        client.login(username='fan', password='testpass123')
+        response = client.get(reverse('chat_detail', args=[self.chat.pk]))
+        self.assertContains(response, 'message 7')
+        self.assertNotContains(response, 'message 4')
+        self.assertContains(response, f'data-history-cursor="{response.context["history_cursor"]}"')
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+@mock.patch.object(chat_history, 'PAGE_SIZE', 3)
+class ChatHistorySocketTests(TransactionTestCase):
+    def setUp(self):
+        self.chat = make_chat(5)
+
+    async def connect(self, username):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/chat/{self.chat.id}/')
+        communicator.scope['user'] = await sync_to_async(User.objects.get)(username=username)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        # Our own online status
+        await communicator.receive_json_from()
+        return communicator
+
+    async def test_older_messages_are_sent_on_request(self):
+        _, cursor = await sync_to_async(chat_history.page)(self.chat.pk)
+        communicator = await self.connect('fan')
+        await communicator.send_json_to({'type': 'history', 'cursor': cursor})
+        response = await communicator.receive_json_from()
+        self.assertEqual(response['type'], 'history')
+        self.assertEqual([message['message'] for message in response['messages']], ['message 0', 'message 1'])
+        self.assertIsNone(response['cursor'])
+        await communicator.send_json_to({'type': 'history', 'cursor': 'garbage'})
+        self.assertEqual((await communicator.receive_json_from())['type'], 'history_error')
+        await communicator.send_json_to({'type': 'history', 'cursor': encode_cursor(['nope', 1])})
+        self.assertEqual((await communicator.receive_json_from())['type'], 'history_error')
+        await communicator.disconnect()
+
+    async def test_history_is_only_sent_to_participants(self):
+        await sync_to_async(User.objects.create_user)(username='other', email='other@example.com', password='x')
+        communicator = await self.connect('other')
+        await communicator.send_json_to({'type': 'history', 'cursor': None})
+        response = await communicator.receive_json_from()
+        self.assertEqual((response['messages'], response['cursor']), ([], None))
+        await communicator.disconnect()
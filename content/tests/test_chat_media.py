@@ -0,0 +1,103 @@
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.contrib.auth import get_user_model
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from channels.routing import URLRouter
+import shutil
+import tempfile
+from content import chat_media
+from content.models import Chat, Message
+from content.routing import websocket_urlpatterns
+
+User = get_user_model()
+
+class FrameTests(TestCase):
+    def test_round_trip(self):
+        data = chat_media.build_frame(7, 3, 16, b'payload', final=True)
+        self.assertEqual(len(data), chat_media.HEADER.size + 7)
+        frame = chat_media.parse_frame(data)
+        self.assertEqual(
+            (frame.transfer_id, frame.index, frame.content_type, frame.final, bytes(frame.payload)),
+            (7, 3, 16, True, b'payload')
+        )
+
+    def test_invalid_frames(self):
+        with self.assertRaises(chat_media.FrameError):
+            chat_media.parse_frame(b'short')
+        with self.assertRaises(chat_media.FrameError):
+            chat_media.parse_frame(chat_media.build_frame(1, 0, 99, b'x'))
+
+    def test_chunks_must_arrive_in_order(self):
+        transfer = chat_media.Transfer(1, 2)
+        self.addCleanup(transfer.close)
+        transfer.append(chat_media.parse_frame(chat_media.build_frame(1, 0, 2, b'a')))
+        with self.assertRaises(chat_media.FrameError):
+            transfer.append(chat_media.parse_frame(chat_media.build_frame(1, 2, 2, b'c')))
+
+    @override_settings(CHAT_MEDIA_MAX_SIZE=4)
+    def test_size_limit(self):
+        transfer = chat_media.Transfer(1, 2)
+        self.addCleanup(transfer.close)
+        with self.assertRaises(chat_media.FrameError):
+            transfer.append(chat_media.parse_frame(chat_media.build_frame(1, 0, 2, b'12345')))
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class BinaryChatMediaTests(TransactionTestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.fan = User.objects.create_user(
+            username='fan',
+            email='fan@example.com',
+            password='testpass123'
+        )
+        self.chat = Chat.objects.create(creator=self.creator, subscriber=self.fan)
+
+    async def connect(self):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f'/ws/chat/{self.chat.id}/', headers=[(b'host', b'testserver')]
+        )
+        communicator.scope['user'] = self.fan
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        # Our own online status
+        await communicator.receive_json_from()
+        return communicator
+
+    async def test_file_is_assembled_from_chunks(self):
+        communicator = await self.connect()
+        video = b'0123456789' * 1000
+        chunks = [video[i:i + 4096] for i in range(0, len(video), 4096)]
+        for index, chunk in enumerate(chunks):
+            await communicator.send_to(bytes_data=chat_media.build_frame(
+                42, index, 16, chunk, final=index == len(chunks) - 1
+            ))
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'media_ack', 'transfer_id': 42})
+        event = await communicator.receive_json_from()
+        self.assertEqual((event['type'], event['media_type']), ('message', 'video'))
+
+        message = await sync_to_async(Message.objects.get)()
+        self.assertEqual(message.media_type, 'video')
+        self.assertTrue(message.media.name.endswith('.mp4'))
+        with message.media.open('rb') as stored:
+            self.assertEqual(stored.read(), video)
+        await communicator.disconnect()
+
+    async def test_out_of_order_chunk_drops_the_transfer(self):
+        communicator = await self.connect()
+        await communicator.send_to(bytes_data=chat_media.build_frame(5, 0, 1, b'abc'))
+        await communicator.send_to(bytes_data=chat_media.build_frame(5, 2, 1, b'ghi', final=True))
+        error = await communicator.receive_json_from()
+        self.assertEqual((error['type'], error['transfer_id']), ('media_error', 5))
+        self.assertFalse(await sync_to_async(Message.objects.exists)())
+        await communicator.disconnect()
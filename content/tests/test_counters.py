@@ -0,0 +1,77 @@
+from io import StringIO
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from content.models import Post, Comment, Like, Share, Save
+
+User = get_user_model()
+
+class EngagementCounterTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.subscriber = User.objects.create_user(
+            username='subscriber',
+            email='subscriber@example.com',
+            password='testpass123'
+        )
+        self.post = Post.objects.create(
+            creator=self.creator,
+            title='Test Post',
+            text='Test content',
+            visibility='public'
+        )
+
+    def test_counters_follow_writes_and_deletes(self):
+        """Test that creating and deleting engagement rows updates the counters"""
+        like = Like.objects.create(user=self.subscriber, post=self.post)
+        Comment.objects.create(user=self.subscriber, post=self.post, content='Nice')
+        Share.objects.create(user=self.subscriber, post=self.post, platform='twitter')
+        Save.objects.create(user=self.subscriber, post=self.post)
+        self.post.refresh_from_db()
+        self.assertEqual(
+            (self.post.like_count, self.post.comment_count, self.post.share_count, self.post.save_count),
+            (1, 1, 1, 1)
+        )
+        like.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_like_view_returns_counter(self):
+        """Test that the like endpoint reports the denormalized count"""
+        self.client.login(username='subscriber', password='testpass123')
+        response = self.client.post(reverse('like_post', args=[self.post.id]))
+        self.assertEqual(response.json()['likes_count'], 1)
+        response = self.client.post(reverse('like_post', args=[self.post.id]))
+        self.assertEqual(response.json()['likes_count'], 0)
+
+    def test_saving_a_loaded_post_keeps_newer_counters(self):
+        """Test that saving a post doesn't write back the counters it was loaded with"""
+        post = Post.objects.get(pk=self.post.pk)
+        Like.objects.create(user=self.subscriber, post=self.post)
+        Comment.objects.create(user=self.subscriber, post=self.post, content='Nice')
+        post.title = 'Edited'
+        post.save()
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.title, self.post.like_count, self.post.comment_count), ('Edited', 1, 1))
+
+    def test_reconcile_counters_repairs_drift(self):
+        """Test that the reconcile command fixes counters changed behind the signals' back"""
+        Like.objects.create(user=self.subscriber, post=self.post)
+        Comment.objects.create(user=self.subscriber, post=self.post, content='Nice')
+        Post.objects.filter(pk=self.post.pk).update(like_count=7, comment_count=0)
+        untouched = Post.objects.create(creator=self.creator, title='Other', text='Other')
+
+        out = StringIO()
+        call_command('reconcile_counters', chunk_size=1, stdout=out)
+        self.assertIn('Repaired counters on 1 post(s)', out.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (1, 1))
+        untouched.refresh_from_db()
+        self.assertEqual(untouched.like_count, 0)
@@ -0,0 +1,115 @@
+from unittest.mock import patch
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from datetime import timedelta
+from content import entitlements
+from content.models import Post
+from subscriptions.models import Subscription, PaymentHistory
+
+User = get_user_model()
+
+class EntitlementTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.subscriber = User.objects.create_user(
+            username='subscriber',
+            email='subscriber@example.com',
+            password='testpass123'
+        )
+        self.subscription = Subscription.objects.create(
+            subscriber=self.subscriber,
+            creator=self.creator,
+            active=True,
+            expires_at=timezone.now() + timedelta(days=30),
+            price=9.99,
+            stripe_subscription_id='sub_test123'
+        )
+        self.public_post = Post.objects.create(creator=self.creator, title='Public', text='x', visibility='public')
+        self.subscribers_post = Post.objects.create(creator=self.creator, title='Subs', text='x', visibility='subscribers')
+        self.premium_post = Post.objects.create(
+            creator=self.creator, title='Premium', text='x', visibility='premium', price=5
+        )
+        self.private_post = Post.objects.create(creator=self.creator, title='Private', text='x', visibility='private')
+
+    def tearDown(self):
+        cache.clear()
+
+    def _fresh_user(self):
+        # A new object, like request.user on the next request
+        return User.objects.get(pk=self.subscriber.pk)
+
+    def test_can_view_rules(self):
+        """Test access to each visibility level"""
+        user = self._fresh_user()
+        self.assertTrue(entitlements.can_view(user, self.public_post))
+        self.assertTrue(entitlements.can_view(user, self.subscribers_post))
+        self.assertFalse(entitlements.can_view(user, self.premium_post))
+        self.assertFalse(entitlements.can_view(user, self.private_post))
+        self.assertTrue(entitlements.can_view(self.creator, self.private_post))
+
+    def test_premium_purchase_unlocks_post(self):
+        """Test that a succeeded post payment unlocks a premium post"""
+        PaymentHistory.objects.create(
+            user=self.subscriber,
+            recipient=self.creator,
+            payment_type='post',
+            amount=5,
+            status='succeeded',
+            post=self.premium_post
+        )
+        self.assertTrue(entitlements.can_view(self._fresh_user(), self.premium_post))
+
+    def test_visible_posts(self):
+        """Test that visible_posts filters a queryset with the same rules"""
+        visible = entitlements.visible_posts(self._fresh_user(), Post.objects.all())
+        self.assertEqual(set(visible), {self.public_post, self.subscribers_post})
+
+    def test_lookups_are_memoized_and_cached(self):
+        """Test that repeated checks hit the database once per user, then not at all"""
+        user = self._fresh_user()
+        with self.assertNumQueries(1):
+            for _ in range(3):
+                entitlements.can_view(user, self.subscribers_post)
+                entitlements.is_subscribed(user, self.creator)
+        next_request_user = self._fresh_user()
+        with self.assertNumQueries(0):
+            entitlements.can_view(next_request_user, self.subscribers_post)
+
+    def test_cancel_invalidates_cache(self):
+        """Test that cancelling a subscription revokes access on the next request"""
+        self.assertTrue(entitlements.can_view(self._fresh_user(), self.subscribers_post))
+        self.subscription.active = False
+        self.subscription.save()
+        self.assertFalse(entitlements.can_view(self._fresh_user(), self.subscribers_post))
+
+    def test_like_requires_access(self):
+        """Test that liking a post the user cannot see is refused"""
+        self.client.login(username='subscriber', password='testpass123')
+        response = self.client.post(reverse('like_post', args=[self.private_post.id]))
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post(reverse('like_post', args=[self.subscribers_post.id]))
+        self.assertEqual(response.status_code, 200)
+
+    @patch('stripe.Webhook.construct_event')
+    def test_stripe_cancellation_webhook(self, construct_event):
+        """Test that a Stripe subscription deletion deactivates the subscription and revokes access"""
+        self.assertTrue(entitlements.can_view(self._fresh_user(), self.subscribers_post))
+        construct_event.return_value = {
+            'type': 'customer.subscription.deleted',
+            'data': {'object': {'id': 'sub_test123'}}
+        }
+        response = self.client.post(reverse('subscriptions:stripe_webhook'), data='{}', content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.subscription.refresh_from_db()
+        self.assertFalse(self.subscription.active)
+        self.assertFalse(entitlements.can_view(self._fresh_user(), self.subscribers_post))
@@ -0,0 +1,123 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils import timezone
+from datetime import timedelta
+from content import facets
+from content.models import Post, Category, Tag
+from subscriptions.models import Subscription
+
+User = get_user_model()
+
+class FacetCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.photography = Category.objects.create(name='Photography')
+        self.art = Category.objects.create(name='Art')
+        self.nature = Tag.objects.create(name='nature')
+        self.portrait = Tag.objects.create(name='portrait')
+        for i in range(3):
+            post = Post.objects.create(creator=self.creator, title=f'Photo {i}', text='x', visibility='public')
+            post.categories.add(self.photography)
+            post.tags.add(self.nature)
+        self.portrait_post = Post.objects.create(creator=self.creator, title='Portrait', text='x', visibility='public')
+        self.portrait_post.categories.add(self.art, self.photography)
+        self.portrait_post.tags.add(self.portrait)
+        private = Post.objects.create(creator=self.creator, title='Private', text='x', visibility='private')
+        private.categories.add(self.art)
+
+    def tearDown(self):
+        cache.clear()
+
+    def _counts(self, posts=None, **filters):
+        if posts is None:
+            posts = Post.objects.filter(visibility='public')
+        result = facets.facet_counts(posts, filters, AnonymousUser())
+        return (
+            {facet['name']: facet['count'] for facet in result['categories']},
+            {facet['name']: facet['count'] for facet in result['tags']},
+        )
+
+    def test_counts_in_one_query(self):
+        """Test that category and tag counts come back together from one query"""
+        with self.assertNumQueries(1):
+            categories, tags = self._counts()
+        self.assertEqual(categories, {'Photography': 4, 'Art': 1})
+        self.assertEqual(tags, {'nature': 3, 'portrait': 1})
+
+    def test_counts_follow_filters(self):
+        """Test that counts only cover the filtered posts"""
+        categories, tags = self._counts(Post.objects.filter(visibility='public', tags=self.portrait), tag='portrait')
+        self.assertEqual(categories, {'Photography': 1, 'Art': 1})
+        self.assertEqual(tags, {'portrait': 1})
+
+    def test_cached_per_normalized_filters(self):
+        """Test that equivalent filter sets share a cache entry"""
+        self._counts(q='Nature  Photo', tag='')
+        with self.assertNumQueries(0):
+            self._counts(q=' nature photo ')
+        self.assertNotEqual(
+            facets.cache_key({'q': 'a'}, AnonymousUser()),
+            facets.cache_key({'q': 'a'}, self.creator)
+        )
+
+    def test_tagging_invalidates(self):
+        """Test that tagging and untagging posts makes cached counts stale"""
+        self._counts()
+        self.portrait_post.tags.add(self.nature)
+        self.assertEqual(self._counts()[1], {'nature': 4, 'portrait': 1})
+        self.portrait_post.tags.remove(self.portrait)
+        self.assertEqual(self._counts()[1], {'nature': 4})
+
+    def test_only_visibility_changes_invalidate(self):
+        """Test that editing a post keeps cached counts and changing who sees it drops them"""
+        key = facets.cache_key({}, AnonymousUser())
+        post = Post.objects.get(pk=self.portrait_post.pk)
+        post.title = 'Portrait, retouched'
+        post.save()
+        self.assertEqual(facets.cache_key({}, AnonymousUser()), key)
+        post.visibility = 'subscribers'
+        post.save()
+        self.assertNotEqual(facets.cache_key({}, AnonymousUser()), key)
+        key = facets.cache_key({}, AnonymousUser())
+        post.delete()
+        self.assertNotEqual(facets.cache_key({}, AnonymousUser()), key)
+
+    def test_entitlement_changes_invalidate(self):
+        """Test that subscribing or cancelling makes the subscriber's cached counts stale"""
+        fan = User.objects.create_user(username='fan', email='fan@example.com', password='testpass123')
+        key = facets.cache_key({}, fan)
+        creator_key = facets.cache_key({}, self.creator)
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription = Subscription.objects.create(
+                subscriber=fan,
+                creator=self.creator,
+                active=True,
+                expires_at=timezone.now() + timedelta(days=30),
+                price=9.99
+            )
+        subscribed_key = facets.cache_key({}, fan)
+        self.assertNotEqual(subscribed_key, key)
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription.delete()
+        self.assertNotEqual(facets.cache_key({}, fan), subscribed_key)
+        # Other viewers keep their cached counts
+        self.assertEqual(facets.cache_key({}, self.creator), creator_key)
+
+    def test_search_page_shows_counts(self):
+        """Test that the search page lists facets for visible posts only"""
+        response = self.client.get(reverse('search'))
+        self.assertEqual(
+            [(facet['name'], facet['count']) for facet in response.context['category_facets']],
+            [('Photography', 4), ('Art', 1)]
+        )
+        self.assertContains(response, '#nature 3')
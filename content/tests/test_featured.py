@@ -0,0 +1,92 @@
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from content import featured
+from content.models import Post
+from subscriptions.models import Subscription
+
+User = get_user_model()
+
+class FeaturedCreatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.creators = [
+            User.objects.create_user(
+                username=f'creator{i}',
+                email=f'creator{i}@example.com',
+                password='testpass123',
+                is_creator=True
+            )
+            for i in range(8)
+        ]
+        self.fan = User.objects.create_user(username='fan', email='fan@example.com', password='testpass123')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_pool_weights(self):
+        """Test that verification, recent posts and subscribers raise a creator's weight"""
+        idle, verified, active, popular = self.creators[:4]
+        verified.is_verified = True
+        verified.save()
+        Post.objects.create(creator=active, title='Post', text='Content', visibility='public')
+        Subscription.objects.create(
+            subscriber=self.fan,
+            creator=popular,
+            active=True,
+            expires_at=timezone.now() + timedelta(days=30),
+            price=9.99
+        )
+        weights = dict(featured.refresh_pool())
+        self.assertNotIn(self.fan.id, weights)
+        self.assertGreater(weights[verified.id], weights[idle.id])
+        self.assertGreater(weights[active.id], weights[idle.id])
+        self.assertGreater(weights[popular.id], weights[idle.id])
+
+    def test_pool_size(self):
+        """Test that only the heaviest creators are kept"""
+        with self.settings(FEATURED_POOL_SIZE=3):
+            self.assertEqual(len(featured.refresh_pool()), 3)
+
+    def test_sample_is_distinct(self):
+        """Test that a sample has no duplicates and honours exclusions"""
+        featured.refresh_pool()
+        for _ in range(20):
+            sample = featured.sample_creator_ids(5, exclude={self.creators[0].id})
+            self.assertEqual(len(sample), len(set(sample)))
+            self.assertEqual(len(sample), 5)
+            self.assertNotIn(self.creators[0].id, sample)
+
+    def test_landing_page_uses_one_query(self):
+        """Test that a warm pool costs a single primary key lookup"""
+        featured.refresh_pool()
+        with self.assertNumQueries(1):
+            creators = featured.featured_creators(5)
+        self.assertEqual(len(creators), 5)
+        self.assertTrue(all(creator.is_creator for creator in creators))
+
+    def test_command_refreshes_pool(self):
+        """Test the refresh_featured_creators command"""
+        out = StringIO()
+        call_command('refresh_featured_creators', stdout=out)
+        self.assertIn('8 creator(s)', out.getvalue())
+        self.assertEqual(len(cache.get(featured.POOL_CACHE_KEY)), 8)
+
+    def test_cold_pool_is_refreshed_once_in_the_background(self):
+        """Test that requests missing the pool don't recompute it themselves"""
+        with self.settings(BACKGROUND_TASKS_EAGER=False), \
+                mock.patch('content.featured.run_in_background') as run_in_background:
+            with self.assertNumQueries(0):
+                self.assertEqual(featured.get_pool(), [])
+                self.assertEqual(featured.featured_creators(5), [])
+        run_in_background.assert_called_once_with(featured._refresh_and_unlock)
+
+        run_in_background.call_args.args[0]()
+        self.assertIsNone(cache.get(featured.REFRESH_LOCK_KEY))
+        self.assertEqual(len(featured.get_pool()), 8)
@@ -0,0 +1,215 @@
+from django.test import TestCase, Client, override_settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from datetime import timedelta
+from content import feed
+from content.models import Post, FeedItem
+from content.pagination import paginate_keyset, encode_cursor, decode_cursor, InvalidCursor
+from content.views import FEED_PAGE_SIZE
+from subscriptions.models import Subscription
+
+User = get_user_model()
+
+class FeedPaginationTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.other_creator = User.objects.create_user(
+            username='other_creator',
+            email='other@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.subscriber = User.objects.create_user(
+            username='subscriber',
+            email='subscriber@example.com',
+            password='testpass123'
+        )
+        # More posts than fit on one page, several sharing a timestamp
+        self.posts = [
+            Post.objects.create(creator=self.creator, title=f'Post {i}', text='Feed content')
+            for i in range(FEED_PAGE_SIZE + 5)
+        ]
+        same_time = timezone.now() - timedelta(hours=1)
+        Post.objects.filter(id__in=[p.id for p in self.posts[:10]]).update(created_at=same_time)
+        self.hidden_post = Post.objects.create(creator=self.other_creator, title='Not subscribed', text='Hidden')
+        # Subscribing backfills the inbox once the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            Subscription.objects.create(
+                subscriber=self.subscriber,
+                creator=self.creator,
+                active=True,
+                expires_at=timezone.now() + timedelta(days=30),
+                price=9.99
+            )
+        self.client.login(username='subscriber', password='testpass123')
+
+    def test_cursor_round_trip(self):
+        """Test that cursors decode back to the values they were built from"""
+        cursor = encode_cursor(['2024-01-01T00:00:00Z', 42])
+        self.assertEqual(decode_cursor(cursor, 2), ['2024-01-01T00:00:00Z', 42])
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('not-a-cursor', 2)
+
+    def test_pages_cover_every_post_once(self):
+        """Test that walking the cursor visits each post exactly once, even with timestamp ties"""
+        seen = []
+        cursor = None
+        while True:
+            page = paginate_keyset(Post.objects.filter(creator=self.creator), cursor=cursor, per_page=7)
+            seen.extend(post.id for post in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(len(seen), len(self.posts))
+        self.assertEqual(set(seen), {p.id for p in self.posts})
+
+    def test_home_renders_first_page_only(self):
+        """Test that the home feed only renders one page and links to the next"""
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['posts']), FEED_PAGE_SIZE)
+        self.assertIsNotNone(response.context['next_cursor'])
+        self.assertContains(response, 'data-action="load-more"')
+        self.assertNotContains(response, 'Not subscribed')
+
+    def test_feed_page_partial(self):
+        """Test that the load more fragment returns the remaining posts"""
+        first = self.client.get(reverse('home'))
+        response = self.client.get(reverse('feed_page'), {'cursor': first.context['next_cursor']})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'content/partials/feed_page.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(len(response.context['posts']), 5)
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_feed_api(self):
+        """Test the JSON variant of the feed"""
+        response = self.client.get(reverse('feed_api'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['posts']), FEED_PAGE_SIZE)
+        response = self.client.get(reverse('feed_api'), {'cursor': data['next_cursor']})
+        data = response.json()
+        self.assertEqual(len(data['posts']), 5)
+        self.assertIsNone(data['next_cursor'])
+
+    def test_invalid_cursor(self):
+        """Test that a tampered cursor is rejected"""
+        response = self.client.get(reverse('feed_api'), {'cursor': '!!!'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('feed_page'), {'cursor': '!!!'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_wrongly_typed_cursor(self):
+        """Test that cursors which decode but hold values of the wrong type are rejected too"""
+        for values in (['nope', 1], ['2024-01-01T00:00:00', 'x'], [None, None], [[1], {}], ['2024-01-01T00:00:00', 10 ** 30]):
+            response = self.client.get(reverse('feed_api'), {'cursor': encode_cursor(values)})
+            self.assertEqual(response.status_code, 400, values)
+        response = self.client.get(reverse('discover'), {'cursor': encode_cursor(['high', 'x'])})
+        self.assertEqual(response.status_code, 400)
+        # Naive times are read as UTC
+        response = self.client.get(reverse('feed_api'), {'cursor': encode_cursor(['2024-01-01T00:00:00', 1])})
+        self.assertEqual(response.status_code, 200)
+
+class FeedInboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.subscriber = User.objects.create_user(
+            username='subscriber',
+            email='subscriber@example.com',
+            password='testpass123'
+        )
+        self.old_post = Post.objects.create(creator=self.creator, title='Before subscribing', text='Old')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subscription = Subscription.objects.create(
+                subscriber=self.subscriber,
+                creator=self.creator,
+                active=True,
+                expires_at=timezone.now() + timedelta(days=30),
+                price=9.99
+            )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_subscribe_backfills_inbox(self):
+        """Test that existing posts are copied into a new subscriber's inbox"""
+        self.assertTrue(FeedItem.objects.filter(subscriber=self.subscriber, post=self.old_post).exists())
+
+    def test_new_post_is_fanned_out(self):
+        """Test that a new post lands in the inbox of every active subscriber"""
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(creator=self.creator, title='Fresh', text='New')
+        item = FeedItem.objects.get(subscriber=self.subscriber, post=post)
+        self.assertEqual(item.created_at, post.created_at)
+        self.assertEqual(item.creator_id, self.creator.id)
+
+    def test_private_posts_stay_out_of_the_feed(self):
+        """Test that private posts are neither fanned out nor shown, even if made private afterwards"""
+        with self.captureOnCommitCallbacks(execute=True):
+            private = Post.objects.create(creator=self.creator, title='Just for me', text='Draft', visibility='private')
+        self.assertFalse(FeedItem.objects.filter(post=private).exists())
+        Post.objects.filter(pk=self.old_post.pk).update(visibility='private')
+        self.assertEqual(list(feed.feed_page(self.subscriber)), [])
+        feed.rebuild_inbox(self.subscriber.id)
+        self.assertFalse(FeedItem.objects.filter(subscriber=self.subscriber).exists())
+        self.client.login(username='subscriber', password='testpass123')
+        self.assertNotContains(self.client.get(reverse('feed_api')), 'Just for me')
+
+    def test_post_made_visible_is_fanned_out(self):
+        """Test that a post created private reaches subscribers once it is no longer private"""
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(creator=self.creator, title='Draft', text='Soon', visibility='private')
+        post = Post.objects.get(pk=post.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.visibility = 'subscribers'
+            post.save()
+        self.assertTrue(FeedItem.objects.filter(subscriber=self.subscriber, post=post).exists())
+
+    def test_cancel_prunes_inbox(self):
+        """Test that cancelling a subscription removes the creator's posts from the inbox"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subscription.active = False
+            self.subscription.save()
+        self.assertFalse(FeedItem.objects.filter(subscriber=self.subscriber).exists())
+
+    def test_feed_read_is_one_range_scan(self):
+        """Test that reading a feed page only touches the inbox and the posts on the page"""
+        with self.assertNumQueries(2):
+            page = feed.feed_page(self.subscriber)
+        self.assertEqual([post.id for post in page], [self.old_post.id])
+
+    @override_settings(FEED_FANOUT_MAX_SUBSCRIBERS=0)
+    def test_large_creator_is_pulled_at_read_time(self):
+        """Test that creators above the threshold are merged in at read time instead of fanned out"""
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(creator=self.creator, title='Pulled', text='Big creator')
+        self.assertFalse(FeedItem.objects.filter(post=post).exists())
+        page = feed.feed_page(self.subscriber)
+        # The backfilled post is still in the inbox but must only appear once
+        self.assertEqual([p.id for p in page], [post.id, self.old_post.id])
+
+    def test_creator_leaving_pull_mode_is_backfilled(self):
+        """Test that posts of a creator back under the threshold reach the inboxes"""
+        with self.settings(FEED_FANOUT_MAX_SUBSCRIBERS=0):
+            self.assertEqual(feed.pull_creator_ids(refresh=True), {self.creator.id})
+            with self.captureOnCommitCallbacks(execute=True):
+                post = Post.objects.create(creator=self.creator, title='Pulled', text='Big creator')
+        self.assertFalse(FeedItem.objects.filter(post=post).exists())
+        self.assertEqual(feed.pull_creator_ids(refresh=True), set())
+        self.assertTrue(FeedItem.objects.filter(subscriber=self.subscriber, post=post).exists())
@@ -0,0 +1,99 @@
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from channels.routing import URLRouter
+from content import inbox
+from content.models import Chat, ChatParticipant, Message
+from content.routing import websocket_urlpatterns
+
+User = get_user_model()
+
+
+class InboxTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.fan = User.objects.create_user(username='fan', email='fan@example.com', password='testpass123')
+        self.other_fan = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        self.chat = Chat.objects.create(creator=self.creator, subscriber=self.fan)
+        self.quiet_chat = Chat.objects.create(creator=self.creator, subscriber=self.other_fan)
+
+    def send(self, chat, sender, content):
+        message = Message.objects.create(chat=chat, sender=sender, content=content)
+        inbox.record_message(message)
+        return message
+
+    def unread(self, chat, user):
+        return ChatParticipant.objects.get(chat=chat, user=user).unread_count
+
+    def test_new_chats_join_both_inboxes(self):
+        self.assertEqual(
+            set(ChatParticipant.objects.filter(chat=self.chat).values_list('user', flat=True)),
+            {self.creator.pk, self.fan.pk}
+        )
+
+    def test_messages_update_the_chat_and_the_recipients_count(self):
+        self.send(self.chat, self.fan, 'hello')
+        message = self.send(self.chat, self.fan, 'are you there?')
+        self.chat.refresh_from_db()
+        self.assertEqual(
+            (self.chat.last_message_at, self.chat.last_message_preview, self.chat.last_sender_id),
+            (message.created_at, 'are you there?', self.fan.pk)
+        )
+        self.assertEqual((self.unread(self.chat, self.creator), self.unread(self.chat, self.fan)), (2, 0))
+
+    def test_inbox_lists_latest_first_without_reading_messages(self):
+        self.send(self.chat, self.fan, 'hello')
+        self.send(self.quiet_chat, self.other_fan, 'hi')
+        with self.assertNumQueries(1):
+            chats = inbox.chats(self.creator)
+            self.assertEqual([(chat, chat.subscriber.username, chat.unread_count) for chat in chats], [
+                (self.quiet_chat, 'other', 1),
+                (self.chat, 'fan', 1),
+            ])
+
+    def test_opening_a_chat_resets_the_count(self):
+        self.send(self.chat, self.fan, 'hello')
+        self.client.login(username='creator', password='testpass123')
+        response = self.client.get(reverse('chat_list'))
+        self.assertContains(response, 'hello')
+        self.assertContains(response, '<span class="badge bg-primary rounded-pill">1</span>', html=True)
+        self.client.get(reverse('chat_detail', args=[self.chat.pk]))
+        self.assertEqual(self.unread(self.chat, self.creator), 0)
+        self.assertTrue(Message.objects.get().is_read)
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class InboxSocketTests(TransactionTestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.fan = User.objects.create_user(username='fan', email='fan@example.com', password='testpass123')
+        self.chat = Chat.objects.create(creator=self.creator, subscriber=self.fan)
+
+    async def test_sent_messages_reach_the_inbox(self):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/chat/{self.chat.id}/')
+        communicator.scope['user'] = self.fan
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        # Our own online status
+        await communicator.receive_json_from()
+        await communicator.send_json_to({'type': 'message', 'message': 'hello'})
+        await communicator.receive_json_from()
+        await communicator.disconnect()
+
+        participant = await sync_to_async(ChatParticipant.objects.get)(chat=self.chat, user=self.creator)
+        chat = await sync_to_async(Chat.objects.get)(pk=self.chat.pk)
+        self.assertEqual((participant.unread_count, chat.last_message_preview), (1, 'hello'))
+        self.assertEqual(participant.last_message_at, chat.last_message_at)
@@ -0,0 +1,254 @@
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from io import BytesIO, StringIO
+from PIL import Image
+from unittest import skipUnless
+import os
+import shutil
+import subprocess
+import tempfile
+from content import imaging, media_access, media_metadata, media_signing, video
+from content.models import Post, Media, Message, Chat
+
+User = get_user_model()
+
+def make_photo(width, height, orientation=None, image_format='JPEG'):
+    # A camera-like JPEG, optionally rotated through its EXIF orientation
+    exif = Image.Exif()
+    exif[0x010F] = 'Camera Maker'
+    if orientation is not None:
+        exif[imaging.ORIENTATION_TAG] = orientation
+    output = BytesIO()
+    Image.new('RGB', (width, height), (200, 120, 40)).save(output, image_format, exif=exif.tobytes())
+    return output.getvalue()
+
+def make_image(width, height, image_format='PNG'):
+    output = BytesIO()
+    Image.new('RGB', (width, height), (40, 120, 200)).save(output, image_format)
+    return output.getvalue()
+
+
+class InspectTests(TestCase):
+    def test_reads_size_orientation_and_placeholder(self):
+        info = imaging.inspect(make_image(300, 600), 16)
+        self.assertEqual((info['width'], info['height'], info['orientation']), (300, 600, 'portrait'))
+        self.assertIsNone(info['stripped'])
+        self.assertFalse(info['exif'])
+        self.assertTrue(info['placeholder'].startswith('data:image/webp;base64,'))
+        self.assertLess(len(info['placeholder']), 400)
+
+    def test_rotated_photos_are_stored_upright_without_exif(self):
+        info = imaging.inspect(make_photo(400, 200, orientation=6), 16)
+        self.assertEqual((info['width'], info['height'], info['orientation']), (200, 400, 'portrait'))
+        with Image.open(BytesIO(info['stripped'])) as image:
+            self.assertEqual((image.format, image.size), ('JPEG', (200, 400)))
+            self.assertFalse(image.getexif())
+
+    def test_upright_jpeg_keeps_its_quantization(self):
+        original = make_photo(320, 320)
+        info = imaging.inspect(original, 16)
+        self.assertEqual(info['orientation'], 'square')
+        with Image.open(BytesIO(original)) as source, Image.open(BytesIO(info['stripped'])) as image:
+            self.assertFalse(image.getexif())
+            self.assertEqual(image.quantization, source.quantization)
+
+    def test_rejects_non_images(self):
+        with self.assertRaises(OSError):
+            imaging.inspect(b'not an image', 16)
+
+
+class MediaMetadataTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = Client()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.post = Post.objects.create(creator=self.creator, title='Photo', text='x', visibility='public')
+
+    def add_media(self, content, name='photo.jpg'):
+        with self.captureOnCommitCallbacks(execute=True):
+            media = Media.objects.create(
+                post=self.post,
+                media_type='image',
+                file=SimpleUploadedFile(name, content, content_type='image/jpeg')
+            )
+        media.refresh_from_db()
+        return media
+
+    def test_metadata_is_extracted_after_upload(self):
+        media = self.add_media(make_photo(400, 200, orientation=6))
+        self.assertEqual((media.width, media.height, media.orientation), (200, 400, 'portrait'))
+        self.assertTrue(media.placeholder.startswith('data:image/webp;base64,'))
+        self.assertTrue(media.exif_stripped)
+        self.assertIsNotNone(media.metadata_extracted_at)
+
+    def test_exif_is_stripped_from_the_stored_file(self):
+        original = make_photo(400, 200, orientation=6)
+        media = self.add_media(original)
+        original_name = media.file.storage.save('post_media/original.jpg', SimpleUploadedFile('o.jpg', original))
+        self.assertNotEqual(media.file.name, original_name)
+        with media.file.open('rb') as stored, Image.open(stored) as image:
+            self.assertFalse(image.getexif())
+            self.assertEqual(image.size, (200, 400))
+        # Variants are made from the stripped file
+        self.assertTrue(media.variants.exists())
+        self.assertEqual(set(media.variants.values_list('source', flat=True)), {media.file.name})
+
+    def test_images_without_exif_are_left_as_they_are(self):
+        content = make_image(300, 300)
+        media = self.add_media(content, name='photo.png')
+        with media.file.open('rb') as stored:
+            self.assertEqual(stored.read(), content)
+        self.assertTrue(media.exif_stripped)
+        self.assertEqual(media.orientation, 'square')
+
+    def test_replaced_file_is_read_again(self):
+        media = self.add_media(make_image(600, 300), name='photo.png')
+        with self.captureOnCommitCallbacks(execute=True):
+            media.file = SimpleUploadedFile('other.png', make_image(100, 300), content_type='image/png')
+            media.save()
+        media.refresh_from_db()
+        self.assertEqual((media.width, media.height, media.orientation), (100, 300, 'portrait'))
+
+    def test_unreadable_uploads_are_skipped(self):
+        with self.assertLogs('content.media_metadata', 'WARNING'), self.assertLogs('content.derivatives', 'WARNING'):
+            media = self.add_media(b'not an image', name='broken.jpg')
+        self.assertIsNone(media.metadata_extracted_at)
+        self.assertFalse(media.exif_stripped)
+
+    def test_chat_images_are_extracted(self):
+        fan = User.objects.create_user(username='fan', email='fan@example.com', password='testpass123')
+        chat = Chat.objects.create(creator=self.creator, subscriber=fan)
+        with self.captureOnCommitCallbacks(execute=True):
+            message = Message.objects.create(
+                chat=chat,
+                sender=fan,
+                media=SimpleUploadedFile('chat.jpg', make_photo(300, 200, orientation=8)),
+                media_type='image'
+            )
+        message.refresh_from_db()
+        self.assertEqual((message.width, message.height), (200, 300))
+        self.assertTrue(message.exif_stripped)
+
+    def test_cards_reserve_space_and_paint_the_placeholder(self):
+        media = self.add_media(make_image(1200, 800), name='photo.png')
+        response = self.client.get(reverse('creator_profile', args=['creator']))
+        self.assertContains(response, f'style="background: url({media.placeholder}) center / cover no-repeat"')
+        self.assertContains(response, 'width="1080" height="720"')
+
+    def test_command_backfills_pending_images(self):
+        media = self.add_media(make_photo(200, 100))
+        media_metadata.reset(media)
+        media.save()
+        output = StringIO()
+        call_command('extract_media_metadata', stdout=output)
+        media.refresh_from_db()
+        self.assertEqual((media.width, media.height), (200, 100))
+        self.assertIn('Extracted metadata of 1 file(s)', output.getvalue())
+
+
+PROBE_OUTPUT = '''{
+    "streams": [
+        {"codec_type": "audio", "codec_name": "aac", "bit_rate": "128000"},
+        {"codec_type": "video", "codec_name": "h264", "width": 1920, "height": 1080,
+         "side_data_list": [{"side_data_type": "Display Matrix", "rotation": -90}]}
+    ],
+    "format": {"duration": "12.480000", "bit_rate": "4200000"}
+}'''
+
+
+class VideoProbeTests(TestCase):
+    def test_parses_ffprobe_output(self):
+        self.assertEqual(video.parse_probe(PROBE_OUTPUT), {
+            'width': 1080,
+            'height': 1920,
+            'duration': 12.48,
+            'video_codec': 'h264',
+            'bitrate': 4200000,
+        })
+
+    def test_rejects_files_without_video(self):
+        with self.assertRaises(video.VideoError):
+            video.parse_probe('{"streams": [{"codec_type": "audio"}], "format": {}}')
+
+
+class VideoPosterTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = Client()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.post = Post.objects.create(creator=self.creator, title='Clip', text='x', visibility='public')
+
+    def add_video(self, content=b'not really a video'):
+        with self.captureOnCommitCallbacks(execute=True):
+            media = Media.objects.create(
+                post=self.post,
+                media_type='video',
+                file=SimpleUploadedFile('clip.mp4', content, content_type='video/mp4')
+            )
+        media.refresh_from_db()
+        return media
+
+    @override_settings(FFPROBE_BINARY='/nonexistent/ffprobe')
+    def test_missing_ffmpeg_leaves_the_video_unprobed(self):
+        with self.assertLogs('content.media_metadata', 'WARNING'):
+            media = self.add_video()
+        self.assertIsNone(media.metadata_extracted_at)
+        self.assertFalse(media.poster)
+
+    @override_settings(FFPROBE_BINARY='/nonexistent/ffprobe')
+    def test_cards_render_from_the_poster(self):
+        with self.assertLogs('content.media_metadata', 'WARNING'):
+            media = self.add_video()
+        media.poster.save('clip.jpg', SimpleUploadedFile('clip.jpg', make_image(320, 180, 'JPEG')), save=False)
+        media.width, media.height, media.duration = 320, 180, 4.0
+        media.save(update_fields=['poster', 'width', 'height', 'duration'])
+
+        response = self.client.get(reverse('creator_profile', args=['creator']))
+        signer = media_signing.Signer(AnonymousUser())
+        self.assertContains(response, f'poster="{signer.url(self.post, media.poster.name)}"')
+        self.assertContains(response, 'preload="none"')
+        self.assertContains(response, 'width="320" height="180"')
+
+    def test_poster_is_served_to_viewers_of_the_post(self):
+        media = Media(post=self.post, media_type='video')
+        media.poster.save('clip.jpg', SimpleUploadedFile('clip.jpg', make_image(32, 18, 'JPEG')), save=False)
+        Media.objects.bulk_create([media])
+        self.assertTrue(media_access.can_access(AnonymousUser(), media.poster.name))
+
+    @skipUnless(shutil.which('ffmpeg') and shutil.which('ffprobe'), 'ffmpeg is not installed')
+    def test_probes_real_video(self):
+        path = os.path.join(tempfile.mkdtemp(), 'clip.mp4')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path), ignore_errors=True)
+        subprocess.run(
+            ['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc=size=320x240:rate=10', '-t', '3', path],
+            check=True
+        )
+        with open(path, 'rb') as clip:
+            media = self.add_video(clip.read())
+        self.assertEqual((media.width, media.height, media.orientation), (320, 240, 'landscape'))
+        self.assertAlmostEqual(media.duration, 3.0, places=1)
+        self.assertTrue(media.video_codec)
+        with media.poster.open('rb') as poster, Image.open(poster) as image:
+            self.assertEqual((image.format, image.size), ('JPEG', (320, 240)))
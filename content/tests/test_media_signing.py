@@ -0,0 +1,101 @@
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from datetime import timedelta
+import shutil
+import tempfile
+import time
+from content import entitlements, media_signing
+from content.models import Post, Media
+from subscriptions.models import Subscription
+
+User = get_user_model()
+
+@override_settings(MEDIA_URL_TTL=7200, MEDIA_URL_BUCKET=3600, MEDIA_ACCEL_MODE='', HLS_TRANSCODING=False)
+class SignedMediaTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = Client()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.subscriber = User.objects.create_user(
+            username='subscriber',
+            email='subscriber@example.com',
+            password='testpass123'
+        )
+        Subscription.objects.create(
+            subscriber=self.subscriber,
+            creator=self.creator,
+            active=True,
+            expires_at=timezone.now() + timedelta(days=30),
+            price=9.99
+        )
+        self.locked = Post.objects.create(creator=self.creator, title='Locked', text='x', visibility='subscribers')
+        self.public = Post.objects.create(creator=self.creator, title='Free', text='x', visibility='public')
+        self.locked_media = Media.objects.create(
+            post=self.locked, media_type='video', file=SimpleUploadedFile('locked.mp4', b'locked video')
+        )
+        self.public_media = Media.objects.create(
+            post=self.public, media_type='video', file=SimpleUploadedFile('free.mp4', b'free video')
+        )
+
+    def test_signatures_cover_every_part(self):
+        expires = int(time.time()) + 60
+        signed = media_signing.signature(1, 2, expires, 'blobs/a.mp4')
+        self.assertTrue(media_signing.verify(1, 2, expires, 'blobs/a.mp4', signed))
+        self.assertFalse(media_signing.verify(3, 2, expires, 'blobs/a.mp4', signed))
+        self.assertFalse(media_signing.verify(1, 4, expires, 'blobs/a.mp4', signed))
+        self.assertFalse(media_signing.verify(1, 2, expires + 1, 'blobs/a.mp4', signed))
+        self.assertFalse(media_signing.verify(1, 2, expires, 'blobs/b.mp4', signed))
+        self.assertFalse(media_signing.verify(1, 2, expires, 'blobs/a.mp4', signed, now=expires + 1))
+
+    def test_expiry_is_rounded_up_to_the_bucket(self):
+        self.assertEqual(media_signing.expiry(now=3600), 3 * 3600)
+        self.assertEqual(media_signing.expiry(now=3601), 4 * 3600)
+        self.assertEqual(media_signing.expiry(now=7199), 4 * 3600)
+
+    def test_profile_links_signed_urls(self):
+        self.client.login(username='subscriber', password='testpass123')
+        response = self.client.get(reverse('creator_profile', args=['creator']))
+        signer = media_signing.Signer(self.subscriber)
+        self.assertContains(response, signer.url(self.locked, self.locked_media.file.name))
+        # Public media are signed for everyone, so the edge can share them
+        self.assertContains(response, f'/m/{self.public.pk}/0/')
+        self.assertNotContains(response, f'src="{self.locked_media.file.url}"')
+
+    def test_locked_posts_are_not_signed(self):
+        posts = media_signing.sign_posts(
+            entitlements.annotate_access(Post.objects.prefetch_related('media_files__variants'), AnonymousUser()),
+            AnonymousUser()
+        )
+        signed = {post.pk: [hasattr(media, 'signed_url') for media in post.media_files.all()] for post in posts}
+        self.assertEqual(signed, {self.locked.pk: [False], self.public.pk: [True]})
+
+    def test_signed_url_is_served_without_queries(self):
+        url = media_signing.Signer(self.subscriber).url(self.locked, self.locked_media.file.name)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'locked video')
+        self.assertTrue(response['Cache-Control'].startswith('private, max-age='))
+
+        public_url = media_signing.Signer(AnonymousUser()).url(self.public, self.public_media.file.name)
+        self.assertTrue(self.client.get(public_url)['Cache-Control'].startswith('public, max-age='))
+
+    def test_tampered_or_expired_urls_are_refused(self):
+        url = media_signing.Signer(self.subscriber).url(self.public, self.public_media.file.name)
+        tampered = url.replace(self.public_media.file.name, self.locked_media.file.name)
+        self.assertEqual(self.client.get(tampered).status_code, 403)
+        expired = media_signing.Signer(self.subscriber, now=time.time() - 3 * 3600)
+        self.assertEqual(self.client.get(expired.url(self.public, self.public_media.file.name)).status_code, 403)
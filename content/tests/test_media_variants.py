@@ -0,0 +1,118 @@
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from io import BytesIO, StringIO
+from PIL import Image
+import shutil
+import tempfile
+from content import derivatives, imaging, media_signing
+from content.models import Post, Media, MediaVariant
+
+User = get_user_model()
+
+def make_image(width, height, image_format='PNG', mode='RGB', color=(200, 120, 40)):
+    output = BytesIO()
+    Image.new(mode, (width, height), color).save(output, image_format)
+    return output.getvalue()
+
+
+class ImagingTests(TestCase):
+    def test_never_upscales(self):
+        self.assertEqual(imaging.target_widths(700, [320, 640, 1080]), [320, 640])
+        self.assertEqual(imaging.target_widths(200, [320, 640]), [200])
+
+    def test_renders_every_width_and_format(self):
+        variants = imaging.render(make_image(1000, 500), [320, 640, 1080])
+        self.assertEqual(
+            [(output, width, height) for output, width, height, _ in variants],
+            [('webp', 320, 160), ('jpeg', 320, 160), ('webp', 640, 320), ('jpeg', 640, 320)]
+        )
+        with Image.open(BytesIO(variants[1][3])) as image:
+            self.assertEqual((image.format, image.size), ('JPEG', (320, 160)))
+
+    def test_transparent_images_are_flattened_for_jpeg(self):
+        variants = imaging.render(make_image(400, 400, mode='RGBA', color=(200, 120, 40, 128)), [320])
+        formats = {output: content for output, _, _, content in variants}
+        with Image.open(BytesIO(formats['jpeg'])) as image:
+            self.assertEqual(image.mode, 'RGB')
+        with Image.open(BytesIO(formats['webp'])) as image:
+            self.assertEqual(image.mode, 'RGBA')
+
+    def test_rejects_non_images(self):
+        with self.assertRaises(OSError):
+            imaging.render(b'not an image', [320])
+
+
+@override_settings(MEDIA_VARIANT_WIDTHS=[320, 640])
+class MediaVariantTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = Client()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.post = Post.objects.create(creator=self.creator, title='Photo', text='x', visibility='public')
+
+    def add_media(self, content, name='photo.png'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Media.objects.create(
+                post=self.post,
+                media_type='image',
+                file=SimpleUploadedFile(name, content, content_type='image/png')
+            )
+
+    def test_variants_are_generated_after_upload(self):
+        media = self.add_media(make_image(1200, 800))
+        variants = list(media.variants.all())
+        self.assertEqual(
+            [(variant.format, variant.width, variant.height) for variant in variants],
+            [('jpeg', 320, 213), ('jpeg', 640, 427), ('webp', 320, 213), ('webp', 640, 427)]
+        )
+        for variant in variants:
+            self.assertEqual(variant.source, media.file.name)
+            self.assertEqual(variant.file.size, variant.size)
+
+    def test_generation_is_idempotent_until_the_file_changes(self):
+        media = self.add_media(make_image(1200, 800))
+        self.assertEqual(derivatives.generate_variants(media.pk), 0)
+
+        old_name = media.variants.first().file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            media.file = SimpleUploadedFile('other.png', make_image(500, 500), content_type='image/png')
+            media.save()
+        self.assertEqual(
+            list(media.variants.values_list('format', 'width')),
+            [('jpeg', 320), ('webp', 320)]
+        )
+        self.assertFalse(media.file.storage.exists(old_name))
+
+    def test_unreadable_uploads_keep_the_original(self):
+        with self.assertLogs('content.media_metadata', 'WARNING'), self.assertLogs('content.derivatives', 'WARNING'):
+            media = self.add_media(b'not an image', name='broken.png')
+        self.assertFalse(media.variants.exists())
+
+    def test_post_card_uses_srcset(self):
+        media = self.add_media(make_image(1200, 800))
+        response = self.client.get(reverse('creator_profile', args=['creator']))
+        webp = media.variants.get(format='webp', width=640)
+        self.assertContains(response, f'{media_signing.Signer(AnonymousUser()).url(self.post, webp.file.name)} 640w')
+        self.assertContains(response, 'type="image/webp"')
+        self.assertNotContains(response, f'src="{media.file.url}"')
+
+    def test_command_backfills_missing_variants(self):
+        media = self.add_media(make_image(800, 800))
+        MediaVariant.objects.all().delete()
+        output = StringIO()
+        call_command('generate_media_variants', stdout=output)
+        self.assertEqual(media.variants.count(), 4)
+        self.assertIn('Generated 4 variant(s)', output.getvalue())
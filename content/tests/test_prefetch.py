@@ -0,0 +1,57 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from datetime import timedelta
+from content.models import Post, Comment
+from content.prefetch import latest_comments
+
+User = get_user_model()
+
+class LatestCommentsPrefetchTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.commenter = User.objects.create_user(
+            username='commenter',
+            email='commenter@example.com',
+            password='testpass123'
+        )
+        self.posts = [
+            Post.objects.create(creator=self.creator, title=f'Post {i}', text='Content', visibility='public')
+            for i in range(3)
+        ]
+        now = timezone.now()
+        for post in self.posts:
+            for i in range(5):
+                comment = Comment.objects.create(user=self.commenter, post=post, content=f'{post.title} comment {i}')
+                Comment.objects.filter(pk=comment.pk).update(created_at=now - timedelta(minutes=10 - i))
+
+    def test_single_query_for_all_posts(self):
+        """Test that the newest comments of a page of posts come back in one query with their authors"""
+        with self.assertNumQueries(2):
+            posts = list(Post.objects.filter(creator=self.creator).prefetch_related(latest_comments(limit=3)))
+            for post in posts:
+                self.assertEqual(len(post.preview_comments), 3)
+                # Authors are joined in, not fetched per comment
+                [comment.user.username for comment in post.preview_comments]
+
+    def test_newest_comments_first(self):
+        """Test that the preview holds the newest comments in order"""
+        post = Post.objects.prefetch_related(latest_comments(limit=2)).get(pk=self.posts[0].pk)
+        self.assertEqual(
+            [comment.content for comment in post.preview_comments],
+            ['Post 0 comment 4', 'Post 0 comment 3']
+        )
+
+    def test_creator_profile_shows_preview(self):
+        """Test that the creator profile renders the comment preview"""
+        response = self.client.get(reverse('creator_profile', args=[self.creator.username]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Post 0 comment 4')
+        self.assertNotContains(response, 'Post 0 comment 0')
@@ -0,0 +1,128 @@
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from datetime import timedelta
+import shutil
+import tempfile
+from content.models import Post, Media, Chat, Message
+from subscriptions.models import Subscription
+
+User = get_user_model()
+
+# The videos here are served as uploaded, without waiting for renditions
+@override_settings(HLS_TRANSCODING=False)
+class ProtectedMediaTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, MEDIA_ACCEL_MODE='')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = Client()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.subscriber = User.objects.create_user(
+            username='subscriber',
+            email='subscriber@example.com',
+            password='testpass123'
+        )
+        Subscription.objects.create(
+            subscriber=self.subscriber,
+            creator=self.creator,
+            active=True,
+            expires_at=timezone.now() + timedelta(days=30),
+            price=9.99
+        )
+        self.stranger = User.objects.create_user(
+            username='stranger',
+            email='stranger@example.com',
+            password='testpass123'
+        )
+        self.content = bytes(range(256)) * 40
+        self.post = Post.objects.create(creator=self.creator, title='Locked', text='x', visibility='subscribers')
+        self.media = Media.objects.create(
+            post=self.post, media_type='video', file=SimpleUploadedFile('clip.mp4', self.content)
+        )
+        self.url = self.media.file.url
+
+    def test_entitlements_are_checked(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.login(username='stranger', password='testpass123')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.login(username='subscriber', password='testpass123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], 'private, max-age=3600')
+
+    def test_shared_file_is_visible_through_any_public_post(self):
+        public = Post.objects.create(creator=self.creator, title='Free', text='x', visibility='public')
+        Media.objects.create(post=public, media_type='video', file=SimpleUploadedFile('again.mp4', self.content))
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_chat_media_is_limited_to_participants(self):
+        chat = Chat.objects.create(creator=self.creator, subscriber=self.subscriber)
+        message = Message.objects.create(
+            chat=chat, sender=self.creator, media=SimpleUploadedFile('dm.png', b'private image'), media_type='image'
+        )
+        self.client.login(username='stranger', password='testpass123')
+        self.assertEqual(self.client.get(message.media.url).status_code, 404)
+        self.client.login(username='subscriber', password='testpass123')
+        self.assertEqual(self.client.get(message.media.url).status_code, 200)
+
+    def test_range_requests(self):
+        self.client.login(username='subscriber', password='testpass123')
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:200])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-10:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+        # Several ranges are answered with the whole file
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-1,5-6')
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_requests(self):
+        self.client.login(username='subscriber', password='testpass123')
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # A stale If-Range gets the full, current file
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+
+    def test_proxy_hand_off(self):
+        self.client.login(username='subscriber', password='testpass123')
+        with override_settings(MEDIA_ACCEL_MODE='x-accel-redirect', MEDIA_ACCEL_PREFIX='/protected-media/'):
+            response = self.client.get(self.url)
+            self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.media.file.name}')
+            self.assertEqual(response.content, b'')
+        with override_settings(MEDIA_ACCEL_MODE='x-sendfile'):
+            response = self.client.get(self.url)
+            self.assertEqual(response['X-Sendfile'], self.media.file.path)
+
+    def test_paths_outside_media_root_are_refused(self):
+        with override_settings(MEDIA_ACCEL_MODE=''):
+            self.client.login(username='subscriber', password='testpass123')
+            self.assertEqual(self.client.get('/media/profile_pictures/../../settings.py').status_code, 404)
+
+    def test_parent_segments_are_refused(self):
+        # Normalizes to the locked file, but the prefix check saw profile_pictures/
+        self.assertEqual(self.client.get(f'/media/profile_pictures/../{self.media.file.name}').status_code, 404)
+        self.client.login(username='subscriber', password='testpass123')
+        self.assertEqual(self.client.get(f'/media/blobs/../{self.media.file.name}').status_code, 404)
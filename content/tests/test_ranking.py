@@ -0,0 +1,122 @@
+from unittest.mock import patch
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import timedelta
+from io import StringIO
+from content import ranking
+from content.models import Post, CreatorRank
+from subscriptions.models import Subscription
+
+User = get_user_model()
+
+class CreatorRankTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.creators = [
+            User.objects.create_user(
+                username=f'creator{i}',
+                email=f'creator{i}@example.com',
+                password='testpass123',
+                is_creator=True,
+                subscription_price=10 - i
+            )
+            for i in range(5)
+        ]
+        self.fan = User.objects.create_user(username='fan', email='fan@example.com', password='testpass123')
+
+    def _subscribe(self, creator):
+        return Subscription.objects.create(
+            subscriber=self.fan,
+            creator=creator,
+            active=True,
+            expires_at=timezone.now() + timedelta(days=30),
+            price=creator.subscription_price
+        )
+
+    def test_rank_rows_follow_creators(self):
+        """Test that becoming or leaving creator status adds or removes the rank row"""
+        self.assertEqual(CreatorRank.objects.count(), 5)
+        self.assertFalse(CreatorRank.objects.filter(creator=self.fan).exists())
+        self.fan.is_creator = True
+        self.fan.save()
+        self.assertTrue(CreatorRank.objects.filter(creator=self.fan).exists())
+        self.fan.is_creator = False
+        self.fan.save()
+        self.assertFalse(CreatorRank.objects.filter(creator=self.fan).exists())
+
+    def test_unrelated_saves_leave_the_rank_row_alone(self):
+        """Test that saving a creator without changing ranked fields skips the rank row"""
+        creator = User.objects.get(pk=self.creators[0].pk)
+        with patch.object(ranking, 'sync_creator') as sync_creator:
+            creator.last_login = timezone.now()
+            creator.save()
+            sync_creator.assert_not_called()
+            creator.subscription_price = 3
+            creator.save()
+            sync_creator.assert_called_once_with(creator)
+
+    def test_score_from_subscribers_and_activity(self):
+        """Test that subscribers, posts and engagement all raise the score"""
+        popular, active = self.creators[:2]
+        self._subscribe(popular)
+        post = Post.objects.create(creator=active, title='Post', text='Content', visibility='public')
+        Post.objects.filter(pk=post.pk).update(like_count=10)
+        ranking.refresh(full=True)
+
+        ranks = {rank.creator_id: rank for rank in CreatorRank.objects.all()}
+        self.assertEqual(ranks[popular.id].active_subscribers, 1)
+        self.assertEqual(ranks[active.id].recent_posts, 1)
+        self.assertEqual(ranks[active.id].recent_engagement, 10)
+        self.assertGreater(ranks[popular.id].score, ranks[self.creators[2].id].score)
+        self.assertGreater(ranks[active.id].score, ranks[popular.id].score)
+
+    def test_incremental_refresh(self):
+        """Test that only stale or expired ranks are rescored"""
+        ranking.refresh()
+        self.assertEqual(ranking.refresh(), 0)
+
+        self._subscribe(self.creators[3])
+        self.assertEqual(ranking.refresh(), 1)
+        self.assertEqual(CreatorRank.objects.get(creator=self.creators[3]).active_subscribers, 1)
+
+        CreatorRank.objects.filter(creator=self.creators[0]).update(
+            updated_at=timezone.now() - ranking.MAX_AGE - timedelta(minutes=1)
+        )
+        self.assertEqual(ranking.refresh(), 1)
+
+    def test_discover_sorts_and_pages(self):
+        """Test the Discover sorts and that the cursor walks every creator once"""
+        self._subscribe(self.creators[2])
+        ranking.refresh()
+
+        response = self.client.get(reverse('discover'))
+        self.assertEqual(response.context['creators'][0], self.creators[2])
+
+        response = self.client.get(reverse('discover'), {'sort': 'price'})
+        prices = [creator.subscription_price for creator in response.context['creators']]
+        self.assertEqual(prices, sorted(prices))
+
+        seen = []
+        params = {'sort': 'new'}
+        with patch('content.views.DISCOVER_PAGE_SIZE', 2):
+            while True:
+                response = self.client.get(reverse('discover'), params)
+                seen += response.context['creators']
+                if not response.context['next_cursor']:
+                    break
+                params['cursor'] = response.context['next_cursor']
+        self.assertEqual(seen, list(reversed(self.creators)))
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        response = self.client.get(reverse('discover'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_command(self):
+        """Test the refresh_creator_ranks command"""
+        out = StringIO()
+        call_command('refresh_creator_ranks', '--full', stdout=out)
+        self.assertIn('Refreshed 5 creator rank(s)', out.getvalue())
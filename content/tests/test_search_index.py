@@ -0,0 +1,91 @@
+from unittest.mock import patch
+from django.test import TestCase
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from io import StringIO
+from content import search
+from content.models import Post, Tag, SearchDocument
+
+User = get_user_model()
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user(
+            username='painter',
+            email='painter@example.com',
+            password='testpass123',
+            is_creator=True,
+            bio='Oil and watercolour'
+        )
+        self.title_match = Post.objects.create(
+            creator=self.creator, title='Sunset over the harbour', text='Evening sketch', visibility='public'
+        )
+        self.text_match = Post.objects.create(
+            creator=self.creator, title='Studio update', text='Another sunset study', visibility='public'
+        )
+
+    def _titles(self, query):
+        return [post.title for post in search.search_posts(query)]
+
+    def test_ranked_matches(self):
+        """Test that title matches rank above body matches and stems match"""
+        self.assertEqual(self._titles('sunset'), ['Sunset over the harbour', 'Studio update'])
+        self.assertEqual(self._titles('sunsets'), ['Sunset over the harbour', 'Studio update'])
+        self.assertEqual(self._titles('harbour sunset'), ['Sunset over the harbour'])
+
+    def test_creator_and_labels_are_indexed(self):
+        """Test that the creator's bio and the post's tags are searchable"""
+        self.assertEqual(len(self._titles('watercolour')), 2)
+        self.title_match.tags.add(Tag.objects.create(name='seascape'))
+        self.assertEqual(self._titles('seascape'), ['Sunset over the harbour'])
+
+    def test_document_follows_edits(self):
+        """Test that editing a post updates its document in the same transaction"""
+        self.text_match.text = 'A quiet morning'
+        self.text_match.save()
+        self.assertEqual(self._titles('sunset'), ['Sunset over the harbour'])
+        self.text_match.delete()
+        self.assertEqual(SearchDocument.objects.count(), 1)
+
+    def test_renames_reindex_in_background(self):
+        """Test that renaming a tag or creator reaches every affected post after commit"""
+        tag = Tag.objects.create(name='seascape')
+        self.title_match.tags.add(tag)
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.name = 'marine'
+            tag.save()
+        self.assertEqual(self._titles('marine'), ['Sunset over the harbour'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.creator.username = 'sculptor'
+            self.creator.save()
+        self.assertEqual(len(self._titles('sculptor')), 2)
+
+    def test_unrelated_creator_saves_do_not_reindex(self):
+        """Test that saving a creator without touching username or bio queues nothing"""
+        creator = User.objects.get(pk=self.creator.pk)
+        with patch.object(search, 'reindex') as reindex:
+            with self.captureOnCommitCallbacks(execute=True):
+                creator.last_login = timezone.now()
+                creator.save()
+            reindex.assert_not_called()
+            with self.captureOnCommitCallbacks(execute=True):
+                creator.bio = 'Charcoal'
+                creator.save()
+            reindex.assert_called_once_with(creator_id=creator.pk)
+
+    def test_query_syntax_is_not_interpreted(self):
+        """Test that FTS operators in user input are treated as plain words"""
+        self.assertEqual(self._titles('sunset OR"'), [])
+        self.assertEqual(self._titles('"sunset" NEAR'), [])
+        Post.objects.create(creator=self.creator, title='Special @#$% Post', text='x', visibility='public')
+        self.assertEqual(self._titles('@#$%'), ['Special @#$% Post'])
+
+    def test_rebuild_command(self):
+        """Test the rebuild_search_index command"""
+        SearchDocument.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 2 post(s)', out.getvalue())
+        self.assertEqual(len(self._titles('sunset')), 2)
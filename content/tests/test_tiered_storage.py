@@ -0,0 +1,130 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+from io import StringIO
+from unittest import mock
+import os
+import shutil
+import tempfile
+from content.models import Post, Media, CreatorRank
+from content.storage import TieredStorage, ContentAddressedStorage
+
+User = get_user_model()
+
+
+def temp_dir(test):
+    directory = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+    return directory
+
+
+class TieredStorageTests(TestCase):
+    def setUp(self):
+        self.cache_dir = temp_dir(self)
+        # Stands in for the S3 bucket
+        self.remote = FileSystemStorage(location=temp_dir(self))
+        self.storage = TieredStorage(location=self.cache_dir, remote=self.remote, max_cache_size=1000)
+
+    def age(self, name, seconds):
+        path = os.path.join(self.cache_dir, name)
+        stat_result = os.stat(path)
+        os.utime(path, (stat_result.st_atime - seconds, stat_result.st_mtime))
+
+    def test_saved_files_are_written_through(self):
+        name = self.storage.save('post_media/a.txt', ContentFile(b'first'))
+        self.assertTrue(self.storage.is_cached(name))
+        with self.remote.open(name) as stored:
+            self.assertEqual(stored.read(), b'first')
+
+    def test_misses_are_fetched_once(self):
+        self.remote.save('post_media/b.txt', ContentFile(b'remote only'))
+        self.assertTrue(self.storage.exists('post_media/b.txt'))
+        self.assertFalse(self.storage.is_cached('post_media/b.txt'))
+        with self.storage.open('post_media/b.txt') as cached:
+            self.assertEqual(cached.read(), b'remote only')
+        self.assertTrue(self.storage.is_cached('post_media/b.txt'))
+        with mock.patch.object(self.remote, 'open', side_effect=AssertionError('fetched twice')):
+            with open(self.storage.path('post_media/b.txt'), 'rb') as cached:
+                self.assertEqual(cached.read(), b'remote only')
+
+    def test_least_recently_read_files_are_evicted(self):
+        for index, name in enumerate(['read', 'old', 'new']):
+            self.storage.save(f'{name}.bin', ContentFile(b'x' * 300))
+            self.age(f'{name}.bin', 1000 - index)
+        # Reading marks the oldest file as used
+        self.storage.path('read.bin')
+        self.storage.save('newest.bin', ContentFile(b'x' * 300))
+        self.assertEqual(
+            [self.storage.is_cached(name) for name in ['old.bin', 'new.bin', 'read.bin', 'newest.bin']],
+            [False, True, True, True]
+        )
+        # Still stored, and fetched again when read
+        with self.storage.open('old.bin') as evicted:
+            self.assertEqual(evicted.read(), b'x' * 300)
+
+    def test_files_only_stored_locally_are_kept(self):
+        FileSystemStorage(location=self.cache_dir).save('local.bin', ContentFile(b'x' * 600))
+        self.age('local.bin', 1000)
+        self.storage.save('uploaded.bin', ContentFile(b'x' * 600))
+        self.assertTrue(self.storage.is_cached('local.bin'))
+
+    def test_nothing_is_evicted_without_a_remote(self):
+        storage = TieredStorage(location=temp_dir(self), max_cache_size=100)
+        storage.save('a.bin', ContentFile(b'x' * 300))
+        storage.save('b.bin', ContentFile(b'x' * 300))
+        self.assertTrue(storage.exists('a.bin') and storage.exists('b.bin'))
+
+    def test_deletes_both_copies(self):
+        name = self.storage.save('gone.txt', ContentFile(b'gone'))
+        self.storage.delete(name)
+        self.assertFalse(self.remote.exists(name) or self.storage.exists(name))
+
+    def test_blobs_are_written_through_once(self):
+        storage = ContentAddressedStorage(location=temp_dir(self), remote=self.remote, max_cache_size=1000)
+        name = storage.save('post_media/clip.mp4', ContentFile(b'video'))
+        self.assertTrue(self.remote.exists(name))
+        os.remove(storage.local.path(name))
+        # Already in the bucket: the same bytes aren't uploaded again
+        with mock.patch.object(self.remote, 'save', side_effect=AssertionError('uploaded twice')):
+            self.assertEqual(storage.save('post_media/again.mp4', ContentFile(b'video')), name)
+        self.assertEqual(os.listdir(storage.local.path('blobs/tmp')), [])
+
+
+@override_settings(MEDIA_ACCEL_MODE='', HLS_TRANSCODING=False)
+class MediaCacheTests(TestCase):
+    def setUp(self):
+        self.remote_dir = temp_dir(self)
+        settings_override = override_settings(
+            MEDIA_ROOT=temp_dir(self),
+            MEDIA_REMOTE_STORAGE={
+                'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                'OPTIONS': {'location': self.remote_dir},
+            }
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        CreatorRank.objects.update_or_create(creator=self.creator, defaults={'score': 10, 'joined_at': timezone.now()})
+        self.post = Post.objects.create(creator=self.creator, title='Clip', text='x', visibility='public')
+        self.media = Media.objects.create(
+            post=self.post, media_type='video', file=SimpleUploadedFile('clip.mp4', b'video')
+        )
+
+    def test_uploads_reach_the_bucket(self):
+        self.assertTrue(os.path.exists(os.path.join(self.remote_dir, self.media.file.name)))
+
+    def test_warm_fetches_popular_creators_media(self):
+        os.remove(self.media.file.path)
+        output = StringIO()
+        call_command('warm_media_cache', stdout=output)
+        self.assertIn('Warmed 1 file(s) of 1 creator(s), 1 downloaded', output.getvalue())
+        self.assertTrue(self.media.file.storage.is_cached(self.media.file.name))
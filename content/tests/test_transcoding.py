@@ -0,0 +1,180 @@
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from io import StringIO
+from unittest import skipUnless
+import os
+import shutil
+import subprocess
+import tempfile
+from content import media_access, media_signing, transcoding
+from content.models import Post, Media
+
+User = get_user_model()
+
+
+class RenditionLadderTests(TestCase):
+    def test_never_upscales(self):
+        renditions = [(720, 2800), (360, 800), (1080, 5000)]
+        self.assertEqual(transcoding.ladder(720, renditions), [(360, 800), (720, 2800)])
+        self.assertEqual(transcoding.ladder(240, renditions), [(360, 800)])
+
+    def test_master_playlist_lists_every_rendition(self):
+        self.assertEqual(
+            transcoding.master_playlist([(640, 360, 800000), (1280, 720, 2800000)]),
+            '#EXTM3U\n#EXT-X-VERSION:3\n'
+            '#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360\n360p/index.m3u8\n'
+            '#EXT-X-STREAM-INF:BANDWIDTH=2800000,RESOLUTION=1280x720\n720p/index.m3u8\n'
+        )
+
+    def test_renditions_are_stored_next_to_the_original(self):
+        self.assertEqual(transcoding.rendition_dir('blobs/ab/cd/abcd.mov'), 'blobs/ab/cd/abcd.hls/')
+        self.assertEqual(transcoding.rendition_scope('blobs/ab/cd/abcd.hls/360p/segment_00001.ts'), 'blobs/ab/cd/abcd.hls/')
+        self.assertIsNone(transcoding.rendition_scope('blobs/ab/cd/abcd.mov'))
+
+
+@override_settings(HLS_TRANSCODING=True, MEDIA_ACCEL_MODE='')
+class TranscodingTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = Client()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.post = Post.objects.create(creator=self.creator, title='Clip', text='Behind the scenes', visibility='public')
+
+    def add_video(self, content=b'not really a video'):
+        return Media.objects.create(
+            post=self.post,
+            media_type='video',
+            file=SimpleUploadedFile('clip.mp4', content, content_type='video/mp4')
+        )
+
+    def add_renditions(self, media):
+        # What transcode() leaves behind for a 360p rendition
+        directory = transcoding.rendition_dir(media.file.name)
+        default_storage.save(f'{directory}360p/index.m3u8', ContentFile(b'#EXTM3U\nsegment_00000.ts\n'))
+        default_storage.save(f'{directory}360p/segment_00000.ts', ContentFile(b'segment'))
+        master = directory + transcoding.MASTER_PLAYLIST
+        default_storage.save(master, ContentFile(transcoding.master_playlist([(640, 360, 800000)]).encode()))
+        Media.objects.filter(pk=media.pk).update(processing_status='ready', hls_playlist=master)
+        transcoding.sync_publication(self.post.pk)
+        media.refresh_from_db()
+        return directory
+
+    def test_posts_wait_for_the_first_rendition(self):
+        media = self.add_video()
+        self.assertEqual(media.processing_status, 'pending')
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.is_published)
+
+        User.objects.create_user(username='fan', email='fan@example.com', password='testpass123')
+        self.client.login(username='fan', password='testpass123')
+        self.assertEqual(self.client.get(reverse('post_detail', args=[self.post.pk])).status_code, 404)
+        self.assertNotContains(self.client.get(reverse('creator_profile', args=['creator'])), 'Behind the scenes')
+        self.client.login(username='creator', password='testpass123')
+        self.assertContains(self.client.get(reverse('creator_profile', args=['creator'])), 'Behind the scenes')
+
+        self.add_renditions(media)
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.is_published)
+
+    @override_settings(FFPROBE_BINARY='/nonexistent/ffprobe', FFMPEG_BINARY='/nonexistent/ffmpeg')
+    def test_failed_videos_are_published_as_uploaded(self):
+        with self.assertLogs('content.transcoding', 'WARNING'), self.assertLogs('content.media_metadata', 'WARNING'):
+            with self.captureOnCommitCallbacks(execute=True):
+                media = self.add_video()
+        media.refresh_from_db()
+        self.post.refresh_from_db()
+        self.assertEqual((media.processing_status, media.hls_playlist.name), ('failed', ''))
+        self.assertTrue(self.post.is_published)
+
+    def test_renditions_share_one_signature(self):
+        media = self.add_video()
+        directory = self.add_renditions(media)
+        response = self.client.get(reverse('creator_profile', args=['creator']))
+        self.assertContains(response, 'type="application/vnd.apple.mpegurl"')
+
+        signer = media_signing.Signer(AnonymousUser())
+        master_url = signer.url(self.post, media.hls_playlist.name, scope=directory)
+        self.assertContains(response, f'data-hls="{master_url}"')
+        response = self.client.get(master_url)
+        self.assertEqual(response['Content-Type'], 'application/vnd.apple.mpegurl')
+        # Relative links in the playlists resolve under the same signature
+        segment_url = master_url.replace(transcoding.MASTER_PLAYLIST, '360p/segment_00000.ts')
+        response = self.client.get(segment_url)
+        self.assertEqual((response.status_code, response['Content-Type']), (200, 'video/mp2t'))
+        self.assertEqual(b''.join(response.streaming_content), b'segment')
+        # But not for files outside the renditions
+        self.assertEqual(self.client.get(master_url.replace(directory, media.file.name)).status_code, 403)
+
+    def test_rendition_signatures_stay_in_their_directory(self):
+        media = self.add_video()
+        directory = self.add_renditions(media)
+        locked = Post.objects.create(creator=self.creator, title='Locked', text='x', visibility='subscribers')
+        locked_media = Media.objects.create(
+            post=locked, media_type='video', file=SimpleUploadedFile('locked.mp4', b'locked video')
+        )
+        master_url = media_signing.Signer(AnonymousUser()).url(self.post, media.hls_playlist.name, scope=directory)
+        depth = directory.count('/')
+        escape = master_url.replace(transcoding.MASTER_PLAYLIST, '../' * depth + locked_media.file.name)
+        self.assertEqual(self.client.get(escape).status_code, 404)
+        nested = master_url.replace(transcoding.MASTER_PLAYLIST, '360p/../../other.hls/master.m3u8')
+        self.assertEqual(self.client.get(nested).status_code, 404)
+
+    def test_renditions_pass_the_access_check(self):
+        media = self.add_video()
+        directory = self.add_renditions(media)
+        self.assertTrue(media_access.can_access(AnonymousUser(), f'{directory}360p/segment_00000.ts'))
+        Post.objects.filter(pk=self.post.pk).update(visibility='subscribers')
+        self.assertFalse(media_access.can_access(AnonymousUser(), f'{directory}360p/segment_00000.ts'))
+
+    def test_renditions_are_deleted_with_the_file(self):
+        media = self.add_video()
+        directory = self.add_renditions(media)
+        with self.captureOnCommitCallbacks(execute=True):
+            media.delete()
+        self.assertFalse(default_storage.exists(f'{directory}360p/segment_00000.ts'))
+        self.assertFalse(default_storage.exists(directory + transcoding.MASTER_PLAYLIST))
+
+    def test_command_skips_failed_videos_unless_asked(self):
+        media = self.add_video()
+        Media.objects.filter(pk=media.pk).update(processing_status='failed')
+        output = StringIO()
+        call_command('transcode_videos', stdout=output)
+        self.assertIn('Transcoded 0 video(s)', output.getvalue())
+        media.refresh_from_db()
+        self.assertEqual(media.processing_status, 'failed')
+
+    @skipUnless(shutil.which('ffmpeg') and shutil.which('ffprobe'), 'ffmpeg is not installed')
+    @override_settings(HLS_RENDITIONS=[(120, 200), (240, 400), (480, 800)], HLS_SEGMENT_SECONDS=2)
+    def test_transcodes_real_video(self):
+        path = os.path.join(tempfile.mkdtemp(), 'clip.mp4')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path), ignore_errors=True)
+        subprocess.run(
+            ['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc=size=320x240:rate=10', '-t', '5', path],
+            check=True
+        )
+        with open(path, 'rb') as clip, self.captureOnCommitCallbacks(execute=True):
+            media = self.add_video(clip.read())
+        media.refresh_from_db()
+        self.assertEqual(media.processing_status, 'ready')
+        with default_storage.open(media.hls_playlist.name) as master:
+            playlist = master.read().decode()
+        self.assertIn('RESOLUTION=160x120', playlist)
+        self.assertIn('240p/index.m3u8', playlist)
+        self.assertNotIn('480p', playlist)
+        directory = transcoding.rendition_dir(media.file.name)
+        self.assertGreaterEqual(len(default_storage.listdir(f'{directory}240p')[1]), 3)
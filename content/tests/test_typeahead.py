@@ -0,0 +1,129 @@
+from unittest.mock import patch
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from content import typeahead
+from content.models import Tag, Category, CreatorRank
+
+User = get_user_model()
+
+class PrefixTrieTests(TestCase):
+    def test_completions_ranked_by_score(self):
+        """Test that completions come back best score first, then alphabetically"""
+        trie = typeahead.PrefixTrie([
+            typeahead.Entry('creator', 1, 'anna', 1.0),
+            typeahead.Entry('creator', 2, 'Annabel', 3.0),
+            typeahead.Entry('creator', 3, 'andrew', 0.0),
+            typeahead.Entry('tag', 1, 'animals', 0.0),
+        ])
+        self.assertEqual([entry.label for entry in trie.search('ann')], ['Annabel', 'anna'])
+        self.assertEqual([entry.label for entry in trie.search('AN')], ['Annabel', 'anna', 'andrew', 'animals'])
+        self.assertEqual([entry.label for entry in trie.search('an', kinds=('tag',))], ['animals'])
+        self.assertEqual(trie.search('zz'), [])
+        self.assertEqual(trie.search(''), [])
+
+    def test_upsert_and_remove(self):
+        """Test that renames and removals keep the cached top lists correct"""
+        trie = typeahead.PrefixTrie(
+            typeahead.Entry('creator', i, f'user{i:03d}', 0.0) for i in range(typeahead.TOP_K + 5)
+        )
+        trie.remove('creator', 0)
+        results = trie.search('user', limit=typeahead.TOP_K)
+        self.assertEqual(len(results), typeahead.TOP_K)
+        self.assertNotIn('user000', [entry.label for entry in results])
+
+        trie.upsert(typeahead.Entry('creator', 1, 'renamed', 0.0))
+        self.assertEqual([entry.label for entry in trie.search('ren')], ['renamed'])
+        self.assertNotIn('user001', [entry.label for entry in trie.search('user001')])
+
+    def test_kind_filter_beyond_cached_top(self):
+        """Test that a kind crowded out of a node's top list is still found"""
+        trie = typeahead.PrefixTrie(
+            typeahead.Entry('creator', i, f'art{i:03d}', 1.0) for i in range(typeahead.TOP_K)
+        )
+        trie.upsert(typeahead.Entry('category', 1, 'Art', 0.0))
+        self.assertEqual([entry.label for entry in trie.search('art', kinds=('category',))], ['Art'])
+
+    def test_removal_promotes_from_siblings(self):
+        """Test that removing a top entry refills the ancestors' top lists from the other branches"""
+        trie = typeahead.PrefixTrie(
+            [typeahead.Entry('creator', i, f'a{i:03d}', float(i)) for i in range(typeahead.TOP_K * 2)]
+            + [typeahead.Entry('tag', 1, 'abc', 0.0)]
+        )
+        for pk in range(typeahead.TOP_K * 2 - 1, typeahead.TOP_K - 1, -1):
+            trie.remove('creator', pk)
+        with patch.object(typeahead.heapq, 'nsmallest', side_effect=AssertionError('search must not rank')):
+            results = trie.search('a', limit=typeahead.MAX_LIMIT)
+        self.assertEqual(
+            [entry.label for entry in results],
+            [f'a{i:03d}' for i in range(typeahead.TOP_K - 1, 0, -1)] + ['a000']
+        )
+        self.assertEqual([entry.label for entry in trie.search('a', kinds=('tag',))], ['abc'])
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        # A fresh in-memory index for every test
+        patcher = patch.object(typeahead, '_backend', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = Client()
+        self.creator = User.objects.create_user(
+            username='natalie',
+            email='natalie@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        User.objects.create_user(username='nathan', email='nathan@example.com', password='testpass123')
+        Tag.objects.create(name='nature')
+        Category.objects.create(name='Photography')
+        typeahead.rebuild()
+
+    def _labels(self, **params):
+        response = self.client.get(reverse('search_autocomplete'), params)
+        self.assertEqual(response.status_code, 200)
+        return [result['label'] for result in response.json()['results']]
+
+    def test_suggestions(self):
+        """Test that creators, tags and categories are suggested but not fans"""
+        self.assertEqual(self._labels(q='Nat'), ['natalie', 'nature'])
+        self.assertEqual(self._labels(q='photo'), ['Photography'])
+
+    def test_mentions(self):
+        """Test the @mention form restricted to creators"""
+        self.assertEqual(self._labels(q='@nat', types='creator'), ['natalie'])
+
+    def test_lookup_makes_no_queries(self):
+        """Test that lookups are served from the index"""
+        with self.assertNumQueries(0):
+            typeahead.suggest('nat')
+
+    def test_updated_after_commit(self):
+        """Test that saves reach the index once committed"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.creator.username = 'bella'
+            self.creator.save()
+            Tag.objects.create(name='beach')
+        self.assertEqual(self._labels(q='b'), ['beach', 'bella'])
+        self.assertEqual(self._labels(q='nat'), ['nature'])
+
+    def test_unrelated_saves_are_not_synced(self):
+        """Test that saving a creator without changing indexed fields skips the index"""
+        with patch.object(typeahead, 'sync_creator') as sync_creator:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.creator.bio = 'Portraits'
+                self.creator.save()
+            sync_creator.assert_not_called()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.creator.is_active = False
+                self.creator.save()
+            sync_creator.assert_called_once_with(self.creator)
+
+    def test_ranked_creators_first(self):
+        """Test that higher ranked creators are suggested first"""
+        other = User.objects.create_user(
+            username='nataliya', email='nataliya@example.com', password='testpass123', is_creator=True
+        )
+        CreatorRank.objects.filter(creator=other).update(score=5)
+        typeahead.rebuild()
+        self.assertEqual(self._labels(q='natal'), ['nataliya', 'natalie'])
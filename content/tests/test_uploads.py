@@ -0,0 +1,148 @@
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import timedelta
+from io import BytesIO, StringIO
+import os
+import shutil
+import tempfile
+from content import uploads
+from content.models import Post, Media, UploadSession
+
+User = get_user_model()
+
+class DroppedConnection:
+    """Request stream that fails after ``limit`` bytes"""
+
+    def __init__(self, data, limit):
+        self._stream = BytesIO(data[:limit])
+
+    def read(self, size):
+        data = self._stream.read(size)
+        if not data:
+            raise OSError('connection reset')
+        return data
+
+
+class ResumableUploadTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=os.path.join(root, 'media'),
+            RESUMABLE_UPLOAD_DIR=os.path.join(root, 'partial')
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = Client()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.other = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123',
+            is_creator=True
+        )
+        self.post = Post.objects.create(creator=self.creator, title='Video', text='x', visibility='public')
+        self.data = os.urandom(300 * 1024)
+        self.client.login(username='creator', password='testpass123')
+
+    def create(self, **overrides):
+        params = {'post_id': self.post.id, 'filename': 'clip.mp4', 'size': len(self.data), **overrides}
+        return self.client.post(reverse('create_upload'), params)
+
+    def patch(self, url, offset, chunk):
+        return self.client.generic(
+            'PATCH', url, chunk,
+            content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def test_chunks_are_assembled_into_media(self):
+        response = self.create()
+        self.assertEqual(response.status_code, 201)
+        url = response['Location']
+
+        response = self.patch(url, 0, self.data[:100 * 1024])
+        self.assertEqual(response.json()['offset'], 100 * 1024)
+        self.assertFalse(response.json()['complete'])
+        self.assertFalse(Media.objects.exists())
+
+        response = self.patch(url, 100 * 1024, self.data[100 * 1024:])
+        body = response.json()
+        self.assertTrue(body['complete'])
+        media = Media.objects.get(pk=body['media']['id'])
+        self.assertEqual((media.post, media.media_type), (self.post, 'video'))
+        with media.file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.data)
+        session = UploadSession.objects.get()
+        self.assertFalse(os.path.exists(uploads.temp_path(session)))
+
+    def test_resumes_after_a_dropped_connection(self):
+        url = self.create()['Location']
+        session = UploadSession.objects.get()
+        written = uploads.append_chunk(session, 0, DroppedConnection(self.data, 70000), len(self.data))
+        self.assertEqual(written, 70000)
+
+        response = self.client.head(url)
+        self.assertEqual(response['Upload-Offset'], '70000')
+        response = self.patch(url, 70000, self.data[70000:])
+        self.assertTrue(response.json()['complete'])
+        with Media.objects.get().file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.data)
+
+    def test_wrong_offset_is_a_conflict(self):
+        url = self.create()['Location']
+        self.patch(url, 0, self.data[:1000])
+        response = self.patch(url, 0, self.data[:1000])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '1000')
+
+    def test_chunk_in_progress_is_a_conflict(self):
+        self.create()
+        session = UploadSession.objects.get()
+        with open(uploads.temp_path(session), 'r+b') as part:
+            self.assertTrue(uploads._lock(part))
+            with self.assertRaises(uploads.UploadConflict):
+                uploads.append_chunk(session, 0, BytesIO(self.data[:1000]), 1000)
+        self.assertEqual(uploads.append_chunk(session, 0, BytesIO(self.data[:1000]), 1000), 1000)
+
+    def test_chunk_past_declared_size_is_rejected(self):
+        url = self.create(size=10)['Location']
+        response = self.patch(url, 0, self.data[:11])
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(UploadSession.objects.get().offset, 0)
+
+    def test_validation(self):
+        self.assertEqual(self.create(filename='notes.txt').status_code, 400)
+        self.assertEqual(self.create(size=0).status_code, 400)
+        with override_settings(RESUMABLE_UPLOAD_MAX_SIZE=1024):
+            self.assertEqual(self.create().status_code, 413)
+        other_post = Post.objects.create(creator=self.other, title='Theirs', text='x', visibility='public')
+        self.assertEqual(self.create(post_id=other_post.id).status_code, 404)
+
+    def test_other_users_cannot_touch_the_upload(self):
+        url = self.create()['Location']
+        self.client.login(username='other', password='testpass123')
+        self.assertEqual(self.patch(url, 0, self.data[:10]).status_code, 404)
+
+    def test_plain_body_is_refused(self):
+        url = self.create()['Location']
+        response = self.client.generic('PATCH', url, self.data[:10], content_type='application/json', HTTP_UPLOAD_OFFSET='0')
+        self.assertEqual(response.status_code, 415)
+
+    def test_stale_uploads_are_cleared(self):
+        self.create()
+        session = UploadSession.objects.get()
+        UploadSession.objects.update(updated_at=timezone.now() - timedelta(days=2))
+        output = StringIO()
+        call_command('clear_stale_uploads', stdout=output)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.path.exists(uploads.temp_path(session)))
+        self.assertIn('Removed 1 stale upload(s)', output.getvalue())
@@ -0,0 +1,158 @@
+"""
+HLS renditions of uploaded videos.
+
+Uploaded videos are queued on the "transcode" background queue, where
+ffmpeg turns them into HLS renditions of several heights and bitrates (see
+HLS_RENDITIONS), lowest first, each cut into HLS_SEGMENT_SECONDS segments.
+The renditions of blobs/ab/cd/<digest>.mov are stored next to it, in
+blobs/ab/cd/<digest>.hls/, with a master playlist listing every rendition
+made so far, so media sharing a blob share its renditions too.
+
+A post holding a video is unpublished until the video's first rendition is
+ready; viewers then get the lowest rendition straight away and better ones
+as they are made. A video that can't be transcoded is served as uploaded.
+"""
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+
+from . import facets, media_metadata, video
+from .models import Post, Media
+
+logger = logging.getLogger(__name__)
+
+QUEUE = 'transcode'
+MASTER_PLAYLIST = 'master.m3u8'
+# Statuses of a video whose renditions are still to come
+IN_PROGRESS = ('pending', 'processing')
+
+
+def rendition_dir(name):
+    """Where the renditions of the stored file ``name`` go"""
+    return f'{os.path.splitext(name)[0]}.hls/'
+
+
+def rendition_scope(name):
+    """The rendition directory a file is in, or None for files that are not renditions"""
+    head, separator, _ = name.partition('.hls/')
+    return head + separator if separator else None
+
+
+def in_rendition_dir(name, scope):
+    """Whether the normalized name ``name`` is a file of the renditions in ``scope``"""
+    if not name.startswith(scope):
+        return False
+    rest = name[len(scope):]
+    # <height>p/<file> or the master playlist, nothing further down or back up
+    return bool(rest) and '..' not in rest.split('/') and rest.count('/') <= 1
+
+
+def ladder(source_height, renditions):
+    """The (height, kbps) renditions not taller than the source; never upscale"""
+    smaller = [(height, kbps) for height, kbps in sorted(renditions) if height <= source_height]
+    return smaller or sorted(renditions)[:1]
+
+
+def master_playlist(variants):
+    """Master playlist text for (width, height, bits per second) renditions"""
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3']
+    for width, height, bandwidth in variants:
+        lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={width}x{height}')
+        lines.append(f'{height}p/index.m3u8')
+    return '\n'.join(lines) + '\n'
+
+
+def _storage():
+    return Media._meta.get_field('hls_playlist').storage
+
+
+def delete_renditions(name):
+    """Remove the renditions of the stored file ``name``"""
+    storage = _storage()
+    directory = rendition_dir(name)
+    # Not exists(): object stores have no directories, listing one that isn't there is just empty
+    try:
+        subdirectories, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for subdirectory in subdirectories:
+        for filename in storage.listdir(f'{directory}{subdirectory}')[1]:
+            storage.delete(f'{directory}{subdirectory}/{filename}')
+    for filename in files:
+        storage.delete(f'{directory}{filename}')
+
+
+def sync_publication(post_id):
+    """Publish a post unless one of its videos still waits for its first rendition"""
+    waiting = Media.objects.filter(
+        post_id=post_id, media_type='video', processing_status__in=IN_PROGRESS, hls_playlist=''
+    ).exists()
+    # An update, not save(): nothing indexed about the post changes, and this also runs while it is deleted
+    if Post.objects.filter(pk=post_id, is_published=waiting).update(is_published=not waiting):
+        # Search facet counts of other viewers change
+        facets.invalidate()
+
+
+def _set_status(media, status, **fields):
+    for name, value in fields.items():
+        setattr(media, name, value)
+    media.processing_status = status
+    media.save(update_fields=['processing_status', *fields])
+    # Only ever publishes: a video transcoded later (transcode_videos) doesn't take its post down meanwhile
+    if media.hls_playlist or status != 'processing':
+        sync_publication(media.post_id)
+
+
+def transcode(media_id):
+    """Background task: make the HLS renditions of a video Media"""
+    media = Media.objects.filter(pk=media_id, media_type='video', processing_status__in=IN_PROGRESS).first()
+    if media is None or not media.file:
+        return
+    storage = _storage()
+    directory = rendition_dir(media.file.name)
+    master = directory + MASTER_PLAYLIST
+
+    if Media.objects.filter(file=media.file.name, processing_status='ready', hls_playlist=master).exists():
+        # Transcoded before, for another upload of the same file
+        _set_status(media, 'ready', hls_playlist=master)
+        return
+
+    _set_status(media, 'processing')
+    # Left over from an interrupted run
+    delete_renditions(media.file.name)
+    variants = []
+    try:
+        with media_metadata.local_path(media.file) as path:
+            info = video.probe(path, settings.FFPROBE_BINARY, settings.VIDEO_PROBE_TIMEOUT)
+            if not info['width'] or not info['height']:
+                raise video.VideoError('Unknown frame size')
+            for height, kbps in ladder(info['height'], settings.HLS_RENDITIONS):
+                with tempfile.TemporaryDirectory() as output:
+                    video.transcode_hls(
+                        path, output, height, kbps, settings.HLS_AUDIO_BITRATE, settings.HLS_SEGMENT_SECONDS,
+                        settings.FFMPEG_BINARY, settings.HLS_TRANSCODE_TIMEOUT
+                    )
+                    for filename in sorted(os.listdir(output)):
+                        with open(os.path.join(output, filename), 'rb') as rendition:
+                            storage.save(f'{directory}{height}p/{filename}', File(rendition))
+                # scale=-2 rounds the width to an even number
+                width = round(info['width'] * height / info['height'] / 2) * 2
+                variants.append((width, height, kbps * 1000))
+                storage.delete(master)
+                storage.save(master, ContentFile(master_playlist(variants).encode('utf-8')))
+                if len(variants) == 1:
+                    _set_status(media, 'processing', hls_playlist=master)
+    except (video.VideoError, OSError, ValueError) as e:
+        logger.warning('Could not transcode video media %s: %s', media.pk, e)
+        _set_status(media, 'failed' if not variants else 'ready')
+        return
+    _set_status(media, 'ready')
+
+
+def untranscoded_videos():
+    """Videos without renditions that are not known to fail, including those uploaded before transcoding"""
+    return Media.objects.filter(media_type='video', hls_playlist='').exclude(processing_status='failed')
@@ -0,0 +1,323 @@
+"""
+Prefix typeahead for creators, tags and categories.
+
+Lookups never touch the database. The default backend is an in-process trie
+in which every node keeps the best TOP_K completions of each kind, so a
+lookup costs one walk down the prefix regardless of how many names share
+it. With several app servers set TYPEAHEAD_BACKEND to "redis": every kind
+and label prefix is then a sorted set ranked by score, shared by every
+process.
+
+Entries are updated from signals after commit and fully rebuilt by the
+rebuild_typeahead command.
+"""
+import bisect
+import heapq
+import itertools
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import F
+
+from accounts.models import User
+from .models import Category, Tag
+
+KINDS = ('creator', 'tag', 'category')
+TOP_K = 20
+MAX_LIMIT = 20
+
+Entry = namedtuple('Entry', 'kind id label score')
+
+
+def _normalize(text):
+    return text.strip().lstrip('@').lower()
+
+
+def _sort_key(entry):
+    return (-entry.score, entry.label.lower(), entry.kind, entry.id)
+
+
+def creator_entry(user):
+    rank = getattr(user, 'rank', None)
+    return Entry('creator', user.pk, user.username, rank.score if rank else 0.0)
+
+
+def label_entry(instance):
+    kind = 'tag' if isinstance(instance, Tag) else 'category'
+    return Entry(kind, instance.pk, instance.name, 0.0)
+
+
+def iter_entries():
+    """Every entry of the index, straight from the database"""
+    creators = User.objects.filter(is_creator=True, is_active=True).values_list(
+        'pk', 'username', F('rank__score')
+    )
+    for pk, username, score in creators.iterator(chunk_size=5000):
+        yield Entry('creator', pk, username, score or 0.0)
+    for model, kind in ((Tag, 'tag'), (Category, 'category')):
+        for pk, name in model.objects.values_list('pk', 'name').iterator(chunk_size=5000):
+            yield Entry(kind, pk, name, 0.0)
+
+
+class _Node:
+    __slots__ = ('children', 'top', 'entries')
+
+    def __init__(self):
+        self.children = {}
+        # Best TOP_K entries of each kind in the whole subtree, ordered by _sort_key
+        self.top = {}
+        # Entries whose label ends at this node
+        self.entries = []
+
+
+class PrefixTrie:
+    """Character trie with the best completions of every kind cached on every node"""
+
+    def __init__(self, entries=()):
+        self._root = _Node()
+        self._entries = {}
+        self._lock = threading.Lock()
+        for entry in entries:
+            self._insert(entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _path(self, label, create=False):
+        node = self._root
+        path = []
+        for char in _normalize(label):
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return path, None
+                child = node.children[char] = _Node()
+            path.append(child)
+            node = child
+        return path, node
+
+    def _insert(self, entry):
+        path, node = self._path(entry.label, create=True)
+        node.entries.append(entry)
+        key = _sort_key(entry)
+        for step in path:
+            top = step.top.setdefault(entry.kind, [])
+            position = bisect.bisect([_sort_key(item) for item in top], key)
+            if position < TOP_K:
+                top.insert(position, entry)
+                del top[TOP_K:]
+        self._entries[entry.kind, entry.id] = entry
+
+    def _remove(self, kind, pk):
+        entry = self._entries.pop((kind, pk), None)
+        if entry is None:
+            return
+        path, node = self._path(entry.label)
+        node.entries.remove(entry)
+        # Bottom up, so every node is rebuilt from children that are already right
+        for step in reversed(path):
+            top = step.top.get(kind, ())
+            if entry not in top:
+                # Not among the best of this subtree, so not of any subtree containing it
+                break
+            candidates = [item for item in step.entries if item.kind == kind]
+            candidates.extend(item for child in step.children.values() for item in child.top.get(kind, ()))
+            step.top[kind] = heapq.nsmallest(TOP_K, candidates, key=_sort_key)
+
+    def upsert(self, entry):
+        with self._lock:
+            self._remove(entry.kind, entry.id)
+            self._insert(entry)
+
+    def remove(self, kind, pk):
+        with self._lock:
+            self._remove(kind, pk)
+
+    def search(self, prefix, kinds=KINDS, limit=10):
+        _, node = self._path(prefix)
+        if node is None or not prefix.strip():
+            return []
+        # Each list holds TOP_K >= MAX_LIMIT entries, so the merge is exact
+        matches = heapq.merge(*(node.top.get(kind, ()) for kind in kinds), key=_sort_key)
+        return list(itertools.islice(matches, limit))
+
+
+class MemoryBackend:
+    def __init__(self):
+        self._trie = None
+        self._lock = threading.Lock()
+
+    @property
+    def trie(self):
+        if self._trie is None:
+            with self._lock:
+                if self._trie is None:
+                    self._trie = PrefixTrie(iter_entries())
+        return self._trie
+
+    def rebuild(self):
+        trie = PrefixTrie(iter_entries())
+        self._trie = trie
+        return len(trie)
+
+    def upsert(self, entry):
+        self.trie.upsert(entry)
+
+    def remove(self, kind, pk):
+        self.trie.remove(kind, pk)
+
+    def search(self, prefix, kinds, limit):
+        return self.trie.search(prefix, kinds, limit)
+
+
+class RedisBackend:
+    """
+    One sorted set per kind and label prefix (up to PREFIX_LENGTH
+    characters) holding every entry under it, scored by minus its score, so
+    ZRANGE reads the best completions first. Ties are ordered by member,
+    which starts with the lowercased label.
+
+    Members are "label\\0id\\0display"; a hash maps kind:id to the current
+    member so updates can remove it from the sets of its old prefixes.
+    Every rebuild writes a new generation of keys and switches to it.
+    """
+    KEY_PREFIX = 'typeahead'
+    # Longer prefixes are looked up in the set of their first PREFIX_LENGTH characters
+    PREFIX_LENGTH = 15
+
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(url)
+
+    def _generation(self):
+        return int(self._client.get(f'{self.KEY_PREFIX}:generation') or 0)
+
+    def _key(self, generation, kind, prefix):
+        return f'{self.KEY_PREFIX}:{generation}:{kind}:{prefix}'
+
+    def _members_key(self, generation):
+        return f'{self.KEY_PREFIX}:{generation}:members'
+
+    def _prefixes(self, label):
+        normalized = _normalize(label)[:self.PREFIX_LENGTH]
+        return [normalized[:end] for end in range(1, len(normalized) + 1)]
+
+    @staticmethod
+    def _member(entry):
+        # Zero padded so equal labels order by id, as _sort_key does
+        return f'{entry.label.lower()}\0{entry.id:020d}\0{entry.label}'
+
+    def _add(self, pipe, generation, entry):
+        member = self._member(entry)
+        for prefix in self._prefixes(entry.label):
+            pipe.zadd(self._key(generation, entry.kind, prefix), {member: -entry.score})
+        pipe.hset(self._members_key(generation), f'{entry.kind}:{entry.id}', member)
+
+    def _discard(self, pipe, generation, kind, member):
+        display = member.decode('utf-8').split('\0', 2)[2]
+        for prefix in self._prefixes(display):
+            pipe.zrem(self._key(generation, kind, prefix), member)
+
+    def rebuild(self):
+        old = self._generation()
+        generation = self._client.incr(f'{self.KEY_PREFIX}:generation:next')
+        pipe = self._client.pipeline(transaction=False)
+        count = 0
+        for entry in iter_entries():
+            self._add(pipe, generation, entry)
+            count += 1
+            if count % 1000 == 0:
+                pipe.execute()
+        pipe.execute()
+        self._client.set(f'{self.KEY_PREFIX}:generation', generation)
+
+        stale = []
+        for key in self._client.scan_iter(match=f'{self.KEY_PREFIX}:{old}:*', count=1000):
+            stale.append(key)
+            if len(stale) == 1000:
+                self._client.unlink(*stale)
+                stale = []
+        if stale:
+            self._client.unlink(*stale)
+        return count
+
+    def upsert(self, entry):
+        generation = self._generation()
+        old = self._client.hget(self._members_key(generation), f'{entry.kind}:{entry.id}')
+        pipe = self._client.pipeline(transaction=True)
+        if old is not None:
+            self._discard(pipe, generation, entry.kind, old)
+        self._add(pipe, generation, entry)
+        pipe.execute()
+
+    def remove(self, kind, pk):
+        generation = self._generation()
+        field = f'{kind}:{pk}'
+        old = self._client.hget(self._members_key(generation), field)
+        if old is not None:
+            pipe = self._client.pipeline(transaction=True)
+            self._discard(pipe, generation, kind, old)
+            pipe.hdel(self._members_key(generation), field)
+            pipe.execute()
+
+    def search(self, prefix, kinds, limit):
+        normalized = _normalize(prefix)
+        if not normalized:
+            return []
+        generation = self._generation()
+        longer = len(normalized) > self.PREFIX_LENGTH
+        pipe = self._client.pipeline(transaction=False)
+        for kind in kinds:
+            # Past PREFIX_LENGTH the set is narrowed down here, so read it whole
+            pipe.zrange(
+                self._key(generation, kind, normalized[:self.PREFIX_LENGTH]), 0, -1 if longer else limit - 1,
+                withscores=True
+            )
+        matches = []
+        for kind, members in zip(kinds, pipe.execute()):
+            for member, score in members:
+                _, pk, label = member.decode('utf-8').split('\0', 2)
+                if not longer or _normalize(label).startswith(normalized):
+                    matches.append(Entry(kind, int(pk), label, -score))
+        return heapq.nsmallest(limit, matches, key=_sort_key)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if settings.TYPEAHEAD_BACKEND == 'redis':
+                    _backend = RedisBackend(settings.REDIS_URL)
+                else:
+                    _backend = MemoryBackend()
+    return _backend
+
+
+def suggest(prefix, kinds=KINDS, limit=10):
+    """Best entries whose label starts with ``prefix`` (case-insensitive, a leading @ is ignored)"""
+    return get_backend().search(prefix, tuple(kinds), min(limit, MAX_LIMIT))
+
+
+def rebuild():
+    return get_backend().rebuild()
+
+
+def sync_creator(user):
+    if user.is_creator and user.is_active:
+        get_backend().upsert(creator_entry(user))
+    else:
+        get_backend().remove('creator', user.pk)
+
+
+def sync_label(instance):
+    get_backend().upsert(label_entry(instance))
+
+
+def remove(kind, pk):
+    get_backend().remove(kind, pk)
@@ -0,0 +1,143 @@
+"""
+Resumable uploads, loosely following the tus protocol.
+
+The browser creates an UploadSession for a file, then PATCHes it in chunks,
+each starting at the session's current offset. Chunk bodies are streamed
+from the socket straight into a temporary file, so a large video never sits
+in worker memory. If a connection drops mid-chunk, whatever arrived is kept
+and the browser asks for the offset (HEAD) and resumes from there. The
+chunk that brings the offset up to the declared size turns the file into a
+Media of the session's post.
+"""
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.http import UnreadablePostError
+from django.utils import timezone
+
+from .models import Media, UploadSession
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+READ_SIZE = 64 * 1024
+
+
+class UploadConflict(Exception):
+    """The chunk does not start at the session's offset"""
+
+
+class UploadTooLarge(Exception):
+    """The chunk would run past the declared size"""
+
+
+def temp_path(session):
+    return os.path.join(settings.RESUMABLE_UPLOAD_DIR, f'{session.pk}.part')
+
+
+def _lock(part):
+    """Take the exclusive lock of an open part file without waiting; False if someone else holds it"""
+    if fcntl is not None:
+        try:
+            fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+    # Its first byte; the lock goes with the handle when the file is closed
+    part.seek(0)
+    try:
+        msvcrt.locking(part.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def create_session(user, post, filename, media_type, size):
+    session = UploadSession.objects.create(
+        user=user, post=post, filename=filename, media_type=media_type, size=size
+    )
+    os.makedirs(settings.RESUMABLE_UPLOAD_DIR, exist_ok=True)
+    open(temp_path(session), 'wb').close()
+    return session
+
+
+def append_chunk(session, offset, stream, length):
+    """
+    Write ``length`` bytes read from ``stream`` at ``offset`` and advance the
+    session by however many bytes actually arrived.
+    """
+    if offset + length > session.size:
+        raise UploadTooLarge(session.size)
+
+    written = 0
+    with open(temp_path(session), 'r+b') as part:
+        # One writer per upload; a second request for it is a conflict, not a wait
+        if not _lock(part):
+            raise UploadConflict(session.offset)
+        session.refresh_from_db(fields=['offset', 'media'])
+        if offset != session.offset or session.media_id:
+            raise UploadConflict(session.offset)
+
+        # Drop bytes past the recorded offset left behind by an interrupted chunk
+        part.seek(offset)
+        part.truncate()
+        try:
+            while written < length:
+                data = stream.read(min(READ_SIZE, length - written))
+                if not data:
+                    break
+                part.write(data)
+                written += len(data)
+        except (OSError, UnreadablePostError):
+            # The client went away; keep what arrived so it can resume
+            pass
+        part.flush()
+        os.fsync(part.fileno())
+
+        session.offset = offset + written
+        session.save(update_fields=['offset', 'updated_at'])
+        if session.is_complete:
+            # Still under the lock, so the file becomes exactly one Media
+            finalize(session)
+    return written
+
+
+def finalize(session):
+    """Store the completed file as a Media of the session's post"""
+    path = temp_path(session)
+    with transaction.atomic():
+        media = Media(post=session.post, media_type=session.media_type)
+        with open(path, 'rb') as part:
+            # Storage copies the file in chunks
+            media.file.save(session.filename, File(part), save=False)
+        media.save()
+        session.media = media
+        session.save(update_fields=['media', 'updated_at'])
+    os.remove(path)
+    return media
+
+
+def discard(session):
+    if os.path.exists(temp_path(session)):
+        os.remove(temp_path(session))
+    session.delete()
+
+
+def clear_stale(hours=None):
+    """Delete unfinished sessions untouched for ``hours`` and their partial files"""
+    hours = settings.RESUMABLE_UPLOAD_EXPIRY_HOURS if hours is None else hours
+    stale = UploadSession.objects.filter(
+        media__isnull=True, updated_at__lt=timezone.now() - timedelta(hours=hours)
+    )
+    cleared = 0
+    for session in stale.iterator():
+        discard(session)
+        cleared += 1
+    return cleared
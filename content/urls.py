@@ -3,13 +3,20 @@ from . import views
 
 urlpatterns = [
     path('', views.home, name='home'),
+    path('feed/', views.feed_page, name='feed_page'),
+    path('api/feed/', views.feed_api, name='feed_api'),
     path('discover/', views.discover, name='discover'),
+    path('search/', views.search_view, name='search'),
+    path('api/autocomplete/', views.autocomplete, name='search_autocomplete'),
     path('post/create/', views.create_post, name='create_post'),
     path('post/<int:post_id>/', views.post_detail, name='post_detail'),
     path('post/<int:post_id>/edit/', views.edit_post, name='edit_post'),
     path('post/<int:post_id>/comment/', views.add_comment, name='add_comment'),
     path('post/<int:post_id>/delete/', views.delete_post, name='delete_post'),
     path('api/posts/<int:post_id>/like/', views.like_post, name='like_post'),
+    path('api/uploads/', views.create_upload, name='create_upload'),
+    path('api/uploads/<uuid:upload_id>/', views.upload_detail, name='upload_detail'),
+    path('m/<int:post_id>/<int:viewer_id>/<int:expires>/<str:signature>/<path:path>', views.signed_media, name='signed_media'),
     
     # Chat URLs
     path('chats/', views.chat_list, name='chat_list'),
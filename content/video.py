@@ -0,0 +1,104 @@
+"""
+ffprobe and ffmpeg wrappers for uploaded videos.
+
+Kept free of Django imports like content.imaging; callers pass the binaries
+and limits from settings. Both tools run as subprocesses, so the work never
+holds the GIL of the task thread that waits for them.
+"""
+import json
+import subprocess
+
+
+class VideoError(Exception):
+    pass
+
+
+def _run(args, timeout):
+    try:
+        result = subprocess.run(args, capture_output=True, timeout=timeout, check=False)
+    except subprocess.TimeoutExpired:
+        raise VideoError(f'{args[0]} timed out after {timeout}s')
+    if result.returncode != 0:
+        raise VideoError(result.stderr.decode('utf-8', 'replace').strip()[-500:] or f'{args[0]} failed')
+    return result.stdout
+
+
+def _number(value, convert=float):
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _rotation(stream):
+    # Phones record portrait video as landscape frames plus a rotation
+    for side_data in stream.get('side_data_list', ()):
+        if 'rotation' in side_data:
+            return _number(side_data['rotation'], int) or 0
+    return _number(stream.get('tags', {}).get('rotate'), int) or 0
+
+
+def parse_probe(output):
+    """
+    Duration, displayed resolution, codec and bitrate from ffprobe's JSON
+    output. Raises VideoError when there is no video stream.
+    """
+    data = json.loads(output)
+    stream = next((stream for stream in data.get('streams', ()) if stream.get('codec_type') == 'video'), None)
+    if stream is None:
+        raise VideoError('No video stream')
+    container = data.get('format', {})
+    width, height = stream.get('width'), stream.get('height')
+    if _rotation(stream) % 180:
+        width, height = height, width
+    return {
+        'width': width,
+        'height': height,
+        'duration': _number(container.get('duration')) or _number(stream.get('duration')),
+        'video_codec': stream.get('codec_name', ''),
+        'bitrate': _number(container.get('bit_rate'), int) or _number(stream.get('bit_rate'), int),
+    }
+
+
+def probe(path, ffprobe='ffprobe', timeout=60):
+    return parse_probe(_run(
+        [ffprobe, '-v', 'error', '-print_format', 'json', '-show_format', '-show_streams', path],
+        timeout
+    ))
+
+
+def poster(path, at, width, ffmpeg='ffmpeg', timeout=60):
+    """One frame, ``at`` seconds in, as a JPEG no wider than ``width``"""
+    return _run(
+        [
+            ffmpeg, '-v', 'error', '-nostdin',
+            # Seeking before the input jumps to the nearest keyframe instead of decoding up to it
+            '-ss', f'{at:.3f}', '-i', path,
+            '-frames:v', '1', '-vf', f"scale='min({width},iw)':-2", '-q:v', '3',
+            '-f', 'image2', '-c:v', 'mjpeg', 'pipe:1',
+        ],
+        timeout
+    )
+
+
+def transcode_hls(path, output_dir, height, video_kbps, audio_bitrate, segment_seconds, ffmpeg='ffmpeg', timeout=3600):
+    """
+    One HLS rendition of the video at ``path``: ``output_dir``/index.m3u8
+    and its segments, scaled to ``height`` at about ``video_kbps``.
+    """
+    _run(
+        [
+            ffmpeg, '-v', 'error', '-nostdin', '-y', '-i', path,
+            '-map', '0:v:0', '-map', '0:a:0?',
+            '-vf', f'scale=-2:{height}',
+            '-c:v', 'libx264', '-preset', 'veryfast', '-profile:v', 'main', '-pix_fmt', 'yuv420p',
+            '-b:v', f'{video_kbps}k', '-maxrate', f'{video_kbps * 107 // 100}k', '-bufsize', f'{video_kbps * 3 // 2}k',
+            # A keyframe at every segment boundary, so segments are equally long in every rendition
+            '-force_key_frames', f'expr:gte(t,n_forced*{segment_seconds})', '-sc_threshold', '0',
+            '-c:a', 'aac', '-b:a', audio_bitrate, '-ac', '2',
+            '-f', 'hls', '-hls_time', str(segment_seconds), '-hls_playlist_type', 'vod',
+            '-hls_segment_filename', f'{output_dir}/segment_%05d.ts',
+            f'{output_dir}/index.m3u8',
+        ],
+        timeout
+    )
@@ -2,52 +2,243 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseForbidden, Http404
 from django.urls import reverse
-from django.db.models import Q, F, Max, Count
-from django.db.models.functions import Coalesce
-from django.views.decorators.http import require_POST
-from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.views.decorators.http import require_POST, require_http_methods
+from django.conf import settings
+from django.core.paginator import Paginator
 from django.utils import timezone
 import os
+from urllib.parse import urlencode
 
-from .models import Post, Media, Like, Chat, Message
-from .forms import PostForm, MediaFormSet
+from .models import Post, Like, Chat, CreatorRank, Category, UploadSession
+from .forms import PostForm, MediaFormSet, media_type_for
+from . import chat_history, entitlements, facets, featured, feed, inbox, media_access, media_signing, search, transcoding, typeahead, uploads
+from .pagination import InvalidCursor, paginate_keyset
+from .storage import blob_storage
+from .prefetch import latest_comments
 from accounts.models import User
-from subscriptions.models import Subscription
+from accounts import creator_search
+
+FEED_PAGE_SIZE = 20
+DISCOVER_PAGE_SIZE = 24
+# Each ordering is covered by an index on CreatorRank and ends in the primary key
+DISCOVER_SORTS = {
+    'trending': ('-score', '-creator_id'),
+    'new': ('-joined_at', '-creator_id'),
+    'price': ('subscription_price', 'creator_id'),
+}
+SEARCH_PAGE_SIZE = 10
+SEARCH_SORTS = {
+    'date': ('-created_at', '-id'),
+    'popular': ('-like_count', '-created_at', '-id'),
+}
+
+def _feed_page(request, cursor=None):
+    """One page of the user's feed inbox with what the post cards render"""
+    page = feed.feed_page(
+        request.user,
+        cursor=cursor,
+        per_page=FEED_PAGE_SIZE,
+        queryset=entitlements.annotate_access(
+            Post.objects.select_related('creator').prefetch_related('media_files__variants', latest_comments()),
+            request.user
+        )
+    )
+    media_signing.sign_posts(page.object_list, request.user)
+    return page
+
+def _serialize_post(post):
+    locked = getattr(post, 'is_locked', False)
+    return {
+        'id': post.id,
+        'title': post.title,
+        'text': '' if locked else post.text,
+        'visibility': post.visibility,
+        'price': str(post.price) if post.price else None,
+        'created_at': post.created_at.isoformat(),
+        'creator': post.creator.username,
+        'url': reverse('post_detail', args=[post.id]),
+        'media': [
+            {
+                'id': media.id,
+                'url': getattr(media, 'signed_url', None) or media.file.url,
+                'type': media.media_type,
+                'poster': getattr(media, 'signed_poster_url', None) or (media.poster.url if media.poster else None),
+                'hls_url': getattr(media, 'signed_hls_url', None) or (media.hls_playlist.url if media.hls_playlist else None)
+            }
+            for media in ([] if locked else post.media_files.all())
+        ],
+        'can_view': not locked,
+        'is_locked': locked,
+        'needs_purchase': getattr(post, 'needs_purchase', False),
+        'like_count': post.like_count,
+        'comment_count': post.comment_count,
+        'comments': [
+            {
+                'id': comment.id,
+                'user': comment.user.username,
+                'content': comment.content,
+                'created_at': comment.created_at.isoformat()
+            }
+            for comment in ([] if locked else getattr(post, 'preview_comments', []))
+        ]
+    }
 
 def home(request):
     """Home page view"""
     # Check if user is authenticated
     if request.user.is_authenticated:
-        # Get subscribed creators
-        subscriptions = Subscription.objects.filter(
-            subscriber=request.user, 
-            active=True
-        ).values_list('creator_id', flat=True)
-        
-        # Get posts from subscribed creators with prefetched media
-        posts = Post.objects.filter(creator_id__in=subscriptions).prefetch_related('media_files').order_by('-created_at')
+        # Only the first page is rendered here, the rest is fetched with the cursor
+        page = _feed_page(request)
         
         # If user has no subscriptions, show featured creators
-        if not posts:
-            featured_creators = User.objects.filter(is_creator=True).order_by('?')[:5]
+        if not page:
+            featured_creators = featured.featured_creators(5, exclude={request.user.id})
             context = {
                 'featured_creators': featured_creators,
                 'no_subscriptions': True
             }
             return render(request, 'content/home.html', context)
         
-        return render(request, 'content/home.html', {'posts': posts})
+        return render(request, 'content/home.html', {
+            'posts': page.object_list,
+            'next_cursor': page.next_cursor
+        })
     else:
         # For non-authenticated users, show landing page with featured creators
-        featured_creators = User.objects.filter(is_creator=True).order_by('?')[:5]
+        featured_creators = featured.featured_creators(5)
         return render(request, 'content/landing.html', {'featured_creators': featured_creators})
 
+@login_required
+def feed_page(request):
+    """Render the next page of the home feed as an HTML fragment for the load more button"""
+    try:
+        page = _feed_page(request, cursor=request.GET.get('cursor'))
+    except InvalidCursor:
+        return HttpResponseBadRequest(_('Invalid cursor.'))
+    
+    return render(request, 'content/partials/feed_page.html', {
+        'posts': page.object_list,
+        'next_cursor': page.next_cursor
+    })
+
+@login_required
+def feed_api(request):
+    """JSON variant of the home feed, paginated with the same cursor"""
+    try:
+        page = _feed_page(request, cursor=request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({
+            'success': False,
+            'message': _('Invalid cursor.')
+        }, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'posts': [_serialize_post(post) for post in page.object_list],
+        'next_cursor': page.next_cursor
+    })
+
 def discover(request):
-    """Discover creators"""
-    creators = User.objects.filter(is_creator=True).order_by('?')
-    return render(request, 'content/discover.html', {'creators': creators})
+    """Discover creators, ranked by the precomputed popularity score or by date or price"""
+    sort = request.GET.get('sort')
+    if sort not in DISCOVER_SORTS:
+        sort = 'trending'
+    
+    try:
+        page = paginate_keyset(
+            CreatorRank.objects.select_related('creator'),
+            cursor=request.GET.get('cursor'),
+            per_page=DISCOVER_PAGE_SIZE,
+            ordering=DISCOVER_SORTS[sort]
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest(_('Invalid cursor.'))
+    
+    return render(request, 'content/discover.html', {
+        'creators': [rank.creator for rank in page.object_list],
+        'sort': sort,
+        'next_cursor': page.next_cursor
+    })
+
+def search_view(request):
+    """Search posts by text, category, tag and creator"""
+    q = request.GET.get('q', '').strip()
+    category = request.GET.get('category', '').strip()
+    tag = request.GET.get('tag', '').strip()
+    creator = request.GET.get('creator', '').strip()
+    sort = request.GET.get('sort', 'relevance' if q else 'date')
+    
+    posts = entitlements.visible_posts(request.user, Post.objects.all())
+    if category:
+        posts = posts.filter(categories__name__iexact=category)
+    if tag:
+        posts = posts.filter(tags__name__iexact=tag)
+    if creator:
+        posts = posts.filter(creator__username__iexact=creator)
+    if q:
+        # Ranked by relevance unless another sort is asked for
+        posts = search.search_posts(q, posts)
+    facet_counts = facets.facet_counts(
+        posts,
+        {'q': q, 'category': category, 'tag': tag, 'creator': creator},
+        request.user
+    )
+    if sort in SEARCH_SORTS or not q:
+        posts = posts.order_by(*SEARCH_SORTS.get(sort, SEARCH_SORTS['date']))
+    
+    paginator = Paginator(posts.select_related('creator'), SEARCH_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    # Keep the filters on the pagination links
+    params = request.GET.copy()
+    params.pop('page', None)
+    
+    return render(request, 'content/search.html', {
+        'page_obj': page_obj,
+        'posts': page_obj.object_list,
+        'q': q,
+        'category': category,
+        'tag': tag,
+        'creator': creator,
+        'sort': sort,
+        'categories': Category.objects.all(),
+        'category_facets': facet_counts['categories'],
+        'tag_facets': facet_counts['tags'],
+        # Typo-tolerant, so "jhon" still finds "john"
+        'creators': creator_search.search_creators(q, limit=5) if q and not page_obj.has_previous() else [],
+        'query_string': params.urlencode(),
+    })
+
+def autocomplete(request):
+    """Typeahead suggestions for the search box and @mentions"""
+    q = request.GET.get('q', '')
+    kinds = [kind for kind in request.GET.get('types', '').split(',') if kind in typeahead.KINDS]
+    try:
+        limit = max(1, int(request.GET.get('limit', 10)))
+    except ValueError:
+        limit = 10
+    
+    urls = {
+        'creator': lambda entry: reverse('creator_profile', args=[entry.label]),
+        'tag': lambda entry: f"{reverse('search')}?{urlencode({'tag': entry.label})}",
+        'category': lambda entry: f"{reverse('search')}?{urlencode({'category': entry.label})}",
+    }
+    results = typeahead.suggest(q, kinds=kinds or typeahead.KINDS, limit=limit)
+    return JsonResponse({
+        'success': True,
+        'results': [
+            {
+                'type': entry.kind,
+                'id': entry.id,
+                'label': entry.label,
+                'url': urls[entry.kind](entry)
+            }
+            for entry in results
+        ]
+    })
 
 @login_required
 def create_post(request):
@@ -110,48 +301,127 @@ def create_post(request):
     
     return render(request, 'content/create_post.html', {
         'form': form,
-        'formset': formset
+        'formset': formset,
+        'upload_chunk_size': settings.RESUMABLE_UPLOAD_CHUNK_SIZE
     })
 
 @login_required
 def post_detail(request, post_id):
     """View a post"""
-    post = get_object_or_404(Post, id=post_id)
-    
-    # Check if user can view this post
-    can_view = True
-    
-    # Check visibility permissions
-    if post.visibility in ['subscribers', 'premium']:
-        if request.user == post.creator:
-            can_view = True
-        else:
-            # Check if user is subscribed
-            is_subscribed = Subscription.objects.filter(
-                subscriber=request.user,
-                creator=post.creator,
-                active=True
-            ).exists()
-            
-            # For premium content, user must be subscribed and pay the additional fee
-            if post.visibility == 'premium':
-                # TODO: Implement premium content purchase check
-                can_view = False
-            else:
-                can_view = is_subscribed
+    post = get_object_or_404(Post.objects.select_related('creator'), id=post_id)
+    if not post.is_published and request.user.id != post.creator_id:
+        raise Http404
     
     context = {
         'post': post,
-        'can_view': can_view,
-        'is_subscriber': Subscription.objects.filter(
-            subscriber=request.user,
-            creator=post.creator,
-            active=True
-        ).exists() if request.user.is_authenticated else False
+        'can_view': entitlements.can_view(request.user, post),
+        'is_subscriber': entitlements.is_subscribed(request.user, post.creator_id)
     }
     
     return render(request, 'content/post_detail.html', context)
 
+def _parse_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _upload_response(session, status=200):
+    response = JsonResponse({
+        'success': status < 400,
+        'id': str(session.pk),
+        'url': reverse('upload_detail', args=[session.pk]),
+        'offset': session.offset,
+        'size': session.size,
+        'chunk_size': settings.RESUMABLE_UPLOAD_CHUNK_SIZE,
+        'complete': session.media_id is not None,
+        'media': {
+            'id': session.media.id,
+            'url': session.media.file.url,
+            'type': session.media.media_type
+        } if session.media_id else None
+    }, status=status)
+    response['Upload-Offset'] = str(session.offset)
+    response['Upload-Length'] = str(session.size)
+    return response
+
+@login_required
+@require_POST
+def create_upload(request):
+    """Start a resumable upload of a file for one of the user's posts"""
+    post = get_object_or_404(Post, id=_parse_int(request.POST.get('post_id')), creator=request.user)
+    filename = os.path.basename(request.POST.get('filename', ''))
+    size = _parse_int(request.POST.get('size'))
+    
+    if not filename or media_type_for(filename) is None:
+        return JsonResponse({
+            'success': False,
+            'error': str(_('Unsupported file type. Please upload images or videos only.'))
+        }, status=400)
+    if size is None or size <= 0:
+        return JsonResponse({'success': False, 'error': 'Invalid file size'}, status=400)
+    if size > settings.RESUMABLE_UPLOAD_MAX_SIZE:
+        return JsonResponse({'success': False, 'error': 'File is too large'}, status=413)
+    
+    session = uploads.create_session(request.user, post, filename, media_type_for(filename), size)
+    response = _upload_response(session, status=201)
+    response['Location'] = reverse('upload_detail', args=[session.pk])
+    return response
+
+@login_required
+@require_http_methods(['GET', 'HEAD', 'PATCH', 'DELETE'])
+def upload_detail(request, upload_id):
+    """Report (GET/HEAD), continue (PATCH) or abort (DELETE) a resumable upload"""
+    session = get_object_or_404(UploadSession.objects.select_related('media'), pk=upload_id, user=request.user)
+    
+    if request.method == 'DELETE':
+        if session.media_id is None:
+            uploads.discard(session)
+        return JsonResponse({'success': True})
+    if request.method != 'PATCH':
+        return _upload_response(session)
+    
+    # The body is read from the socket in small pieces, never via request.body
+    if request.content_type != 'application/offset+octet-stream':
+        return JsonResponse({'success': False, 'error': 'Expected application/offset+octet-stream'}, status=415)
+    offset = _parse_int(request.headers.get('Upload-Offset'))
+    length = _parse_int(request.headers.get('Content-Length'))
+    if offset is None or length is None:
+        return JsonResponse({'success': False, 'error': 'Upload-Offset and Content-Length are required'}, status=400)
+    
+    try:
+        uploads.append_chunk(session, offset, request, length)
+    except uploads.UploadConflict:
+        # The client resumes from the offset it gets back
+        return _upload_response(session, status=409)
+    except uploads.UploadTooLarge:
+        return _upload_response(session, status=413)
+    return _upload_response(session)
+
+@require_http_methods(['GET', 'HEAD'])
+def protected_media(request, path):
+    """Serve an uploaded file to users allowed to see it"""
+    name = media_access.clean_name(path)
+    # 404 rather than 403, so locked files don't reveal that they exist
+    if name is None or not media_access.can_access(request.user, name):
+        raise Http404
+    return media_access.serve(request, name)
+
+@require_http_methods(['GET', 'HEAD'])
+def signed_media(request, post_id, viewer_id, expires, signature, path):
+    """Serve a file by signed URL; the signature is the only check, nothing is looked up"""
+    # Normalized first: the signature covers a directory, so the rest of the path must stay inside it
+    name = media_access.clean_name(path)
+    if name is None:
+        raise Http404
+    # A video's renditions are signed as a whole, so its playlists can link their segments relatively
+    scope = transcoding.rendition_scope(name)
+    if scope is not None and not transcoding.in_rendition_dir(name, scope):
+        raise Http404
+    if not media_signing.verify(post_id, viewer_id, expires, scope or name, signature):
+        return HttpResponseForbidden()
+    return media_access.serve(request, name, cache_control=media_signing.cache_control(viewer_id, expires))
+
 @login_required
 def edit_post(request, post_id):
     """Edit an existing post"""
@@ -219,15 +489,19 @@ def add_comment(request, post_id):
 
 def creator_profile(request, username):
     creator = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(creator=creator, visibility='public').order_by('-created_at')
-    is_subscribed = False
-    if request.user.is_authenticated:
-        is_subscribed = Subscription.objects.filter(subscriber=request.user, creator=creator, status='active').exists()
+    posts = Post.objects.filter(creator=creator)
+    if request.user != creator:
+        # Locked posts are listed as teasers, private ones not at all
+        posts = posts.exclude(visibility='private')
+    posts = entitlements.annotate_access(posts, request.user).select_related('creator').prefetch_related(
+        'media_files__variants', latest_comments()
+    ).order_by('-created_at')
+    media_signing.sign_posts(posts, request.user)
     
     context = {
         'creator': creator,
         'posts': posts,
-        'is_subscribed': is_subscribed,
+        'is_subscribed': entitlements.is_subscribed(request.user, creator),
     }
     return render(request, 'accounts/creator_profile.html', context)
 
@@ -237,18 +511,11 @@ def like_post(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     
     # Check if user can view this post
-    if post.visibility in ['subscribers', 'premium']:
-        if request.user != post.creator:
-            is_subscribed = Subscription.objects.filter(
-                subscriber=request.user,
-                creator=post.creator,
-                active=True
-            ).exists()
-            if not is_subscribed:
-                return JsonResponse({
-                    'success': False,
-                    'message': _('You need to be subscribed to like this post.')
-                }, status=403)
+    if not entitlements.can_view(request.user, post):
+        return JsonResponse({
+            'success': False,
+            'message': _('You need to be subscribed to like this post.')
+        }, status=403)
     
     # Toggle like
     like, created = Like.objects.get_or_create(
@@ -262,25 +529,20 @@ def like_post(request, post_id):
     else:
         is_liked = True
     
+    # The counter was updated in the database by the Like signal handlers
+    post.refresh_from_db(fields=['like_count'])
+    
     return JsonResponse({
         'success': True,
         'is_liked': is_liked,
-        'likes_count': post.likes.count()
+        'likes_count': post.like_count
     })
 
 @login_required
 def chat_list(request):
     """List all chats for the current user"""
-    # Get all chats where user is either creator or subscriber
-    chats = Chat.objects.filter(
-        Q(creator=request.user) | Q(subscriber=request.user)
-    ).select_related('creator', 'subscriber').annotate(
-        last_message_time=Max('messages__created_at'),
-        unread_count=Count(
-            'messages',
-            filter=Q(messages__is_read=False) & ~Q(messages__sender=request.user)
-        )
-    ).order_by(Coalesce('last_message_time', F('created_at')).desc())
+    # Latest message first, read from the user's ChatParticipant rows (see content.inbox)
+    chats = inbox.chats(request.user)
     
     context = {
         'chats': chats,
@@ -302,18 +564,15 @@ def chat_detail(request, chat_id):
     other_user = chat.subscriber if request.user == chat.creator else chat.creator
     
     # Mark unread messages as read
-    Message.objects.filter(
-        chat=chat,
-        sender=other_user,
-        is_read=False
-    ).update(is_read=True)
+    inbox.mark_read(chat, request.user)
     
-    # Get messages with sender info
-    messages_list = Message.objects.filter(chat=chat).select_related('sender').order_by('created_at')
+    # Only the newest messages; older ones are fetched over the WebSocket as the reader scrolls up
+    messages_list, history_cursor = chat_history.page(chat.pk)
     
     context = {
         'chat': chat,
         'messages': messages_list,
+        'history_cursor': history_cursor,
         'other_user': other_user,
         'debug': True  # Enable debug mode for development
     }
@@ -353,9 +612,9 @@ def upload_chat_media(request, chat_id):
         file_extension = os.path.splitext(file.name)[1]
         filename = f'chat_{chat_id}_{timezone.now().strftime("%Y%m%d_%H%M%S")}{file_extension}'
         
-        # Save the file
-        path = default_storage.save(f'chat_media/{filename}', file)
-        url = default_storage.url(path)
+        # Save the file, shared with any earlier upload of the same bytes
+        path = blob_storage.save(f'chat_media/{filename}', file)
+        url = blob_storage.url(path)
         
         # Determine media type
         media_type = 'image' if file_extension.lower() in ['.jpg', '.jpeg', '.png', '.gif'] else 'video'
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+import shutil
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -87,6 +88,9 @@ WSGI_APPLICATION = 'fanshub.wsgi.application'
 # ASGI Application
 ASGI_APPLICATION = 'fanshub.asgi.application'
 
+# Tests start with an empty cache, see fanshub.test_runner
+TEST_RUNNER = 'fanshub.test_runner.TestRunner'
+
 # Channels Configuration
 CHANNEL_LAYERS = {
     'default': {
@@ -97,6 +101,30 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Cache
+# Shared Redis cache when REDIS_URL is set, per-process memory cache otherwise
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+
+# Typeahead index: "memory" keeps a trie in each process, "redis" shares
+# sorted sets between app servers
+TYPEAHEAD_BACKEND = os.getenv('TYPEAHEAD_BACKEND', 'redis' if REDIS_URL else 'memory')
+
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
@@ -151,12 +179,113 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 # Media files
 MEDIA_URL = os.getenv('MEDIA_URL', '/media/')
 MEDIA_ROOT = os.path.join(BASE_DIR, os.getenv('MEDIA_ROOT', 'media'))
+# Uploads are kept in an S3-compatible bucket when AWS_STORAGE_BUCKET_NAME is
+# set, with MEDIA_ROOT as a local cache of it; otherwise MEDIA_ROOT holds them
+STORAGES = {
+    'default': {'BACKEND': 'content.storage.TieredStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+MEDIA_REMOTE_STORAGE = {
+    'BACKEND': 'storages.backends.s3.S3Storage',
+    'OPTIONS': {
+        'bucket_name': os.getenv('AWS_STORAGE_BUCKET_NAME'),
+        # Any S3-compatible store: MinIO, R2, Backblaze B2...
+        'endpoint_url': os.getenv('AWS_S3_ENDPOINT_URL') or None,
+        'region_name': os.getenv('AWS_S3_REGION_NAME') or None,
+        'default_acl': 'private',
+        'querystring_auth': True,
+        'file_overwrite': True,
+    },
+} if os.getenv('AWS_STORAGE_BUCKET_NAME') else None
+# Bytes of media kept in MEDIA_ROOT when there is a bucket; the least recently read files go first
+MEDIA_CACHE_MAX_SIZE = int(os.getenv('MEDIA_CACHE_MAX_SIZE', str(50 * 1024 ** 3)))
+# Creators whose media warm_media_cache keeps cached, by rank
+MEDIA_CACHE_WARM_CREATORS = int(os.getenv('MEDIA_CACHE_WARM_CREATORS', '100'))
+# Widths of the resized copies generated for every uploaded image
+MEDIA_VARIANT_WIDTHS = [int(width) for width in os.getenv('MEDIA_VARIANT_WIDTHS', '320,640,1080,1600').split(',')]
+# Processes that decode and encode images; resizing is CPU bound so it runs outside the task threads
+MEDIA_PROCESS_WORKERS = int(os.getenv('MEDIA_PROCESS_WORKERS', '2'))
+# Width in pixels of the blurred preview painted while an image loads
+MEDIA_PLACEHOLDER_SIZE = int(os.getenv('MEDIA_PLACEHOLDER_SIZE', '16'))
+
+# Video processing
+FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+FFPROBE_BINARY = os.getenv('FFPROBE_BINARY', 'ffprobe')
+# Seconds into the video the poster frame is taken from, and its largest width
+VIDEO_POSTER_AT = float(os.getenv('VIDEO_POSTER_AT', '1.0'))
+VIDEO_POSTER_WIDTH = int(os.getenv('VIDEO_POSTER_WIDTH', '1280'))
+VIDEO_PROBE_TIMEOUT = int(os.getenv('VIDEO_PROBE_TIMEOUT', '60'))
+# Transcode uploaded videos to HLS; "auto" does when ffmpeg is installed.
+# A post with a video is published once the video's first rendition is ready
+HLS_TRANSCODING = os.getenv('HLS_TRANSCODING', 'auto')
+HLS_TRANSCODING = shutil.which(FFMPEG_BINARY) is not None if HLS_TRANSCODING == 'auto' else HLS_TRANSCODING == 'True'
+# Renditions as height:video kbps, made lowest first
+HLS_RENDITIONS = [
+    tuple(int(part) for part in rendition.split(':'))
+    for rendition in os.getenv('HLS_RENDITIONS', '360:800,480:1400,720:2800,1080:5000').split(',')
+]
+HLS_SEGMENT_SECONDS = int(os.getenv('HLS_SEGMENT_SECONDS', '6'))
+HLS_AUDIO_BITRATE = os.getenv('HLS_AUDIO_BITRATE', '128k')
+HLS_TRANSCODE_TIMEOUT = int(os.getenv('HLS_TRANSCODE_TIMEOUT', '3600'))
+
+# Protected media
+# After the access check files are handed to the front proxy: "x-accel-redirect"
+# (nginx) or "x-sendfile" (Apache). Leave empty to let Django send them
+MEDIA_ACCEL_MODE = os.getenv('MEDIA_ACCEL_MODE', '')
+# nginx "internal" location aliased to MEDIA_ROOT, used with x-accel-redirect
+MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+# Chat media arrive over the WebSocket in binary chunks
+CHAT_MEDIA_MAX_SIZE = int(os.getenv('CHAT_MEDIA_MAX_SIZE', str(200 * 1024 * 1024)))
+# Files a single connection may be receiving at once
+CHAT_MEDIA_MAX_TRANSFERS = int(os.getenv('CHAT_MEDIA_MAX_TRANSFERS', '4'))
+
+# Feed and profile media are linked with signed, expiring URLs
+MEDIA_SIGNING_KEY = os.getenv('MEDIA_SIGNING_KEY', SECRET_KEY)
+# Seconds a signed URL stays valid at least
+MEDIA_URL_TTL = int(os.getenv('MEDIA_URL_TTL', str(2 * 60 * 60)))
+# Expiry times are rounded up to a multiple of this, so URLs stay stable and cacheable
+MEDIA_URL_BUCKET = int(os.getenv('MEDIA_URL_BUCKET', str(60 * 60)))
+
+# Uploads
+# Multipart files larger than this are streamed to FILE_UPLOAD_TEMP_DIR instead of memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('FILE_UPLOAD_MAX_MEMORY_SIZE', str(2 * 1024 * 1024)))
+FILE_UPLOAD_TEMP_DIR = os.getenv('FILE_UPLOAD_TEMP_DIR') or None
+# Resumable uploads keep their partial files here until they are complete
+RESUMABLE_UPLOAD_DIR = os.path.join(BASE_DIR, os.getenv('RESUMABLE_UPLOAD_DIR', 'uploads_in_progress'))
+RESUMABLE_UPLOAD_MAX_SIZE = int(os.getenv('RESUMABLE_UPLOAD_MAX_SIZE', str(4 * 1024 ** 3)))
+# Chunk size the browser sends; smaller chunks lose less on a dropped connection
+RESUMABLE_UPLOAD_CHUNK_SIZE = int(os.getenv('RESUMABLE_UPLOAD_CHUNK_SIZE', str(5 * 1024 * 1024)))
+# Unfinished uploads untouched for this many hours are removed by clear_stale_uploads
+RESUMABLE_UPLOAD_EXPIRY_HOURS = int(os.getenv('RESUMABLE_UPLOAD_EXPIRY_HOURS', '24'))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Background tasks
+# Eager mode runs tasks inline after commit; disable in production to use the thread pool
+BACKGROUND_TASKS_EAGER = os.getenv('BACKGROUND_TASKS_EAGER', 'True') == 'True'
+BACKGROUND_TASK_WORKERS = int(os.getenv('BACKGROUND_TASK_WORKERS', '4'))
+# Workers of queues other than the default one
+BACKGROUND_QUEUE_WORKERS = {
+    # Each ffmpeg run already uses every core
+    'transcode': int(os.getenv('TRANSCODE_WORKERS', '1')),
+}
+
+# Home feed
+# Creators with more active subscribers than this are merged in at read time
+# instead of being fanned out to every subscriber's inbox
+FEED_FANOUT_MAX_SUBSCRIBERS = int(os.getenv('FEED_FANOUT_MAX_SUBSCRIBERS', '10000'))
+# Number of a creator's latest posts copied into the inbox of a new subscriber
+FEED_BACKFILL_LIMIT = int(os.getenv('FEED_BACKFILL_LIMIT', '200'))
+
+# Featured creators
+# Size of the weighted pool sampled on the landing and home pages; refresh it
+# periodically with the refresh_featured_creators command
+FEATURED_POOL_SIZE = int(os.getenv('FEATURED_POOL_SIZE', '100'))
+
 # Supabase Configuration
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_KEY')
@@ -0,0 +1,50 @@
+"""
+Test runner that starts every test with an empty cache.
+
+Test databases reuse primary keys, so per-user cache entries (entitlements,
+facet counts) written by one test would otherwise be read by the unrelated
+user that gets the same ID in the next one.
+"""
+import unittest
+
+from django.core.cache import caches
+from django.test.runner import DiscoverRunner, ParallelTestSuite, RemoteTestResult, RemoteTestRunner
+
+
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+
+
+class CacheClearingResultMixin:
+    def startTest(self, test):
+        clear_caches()
+        super().startTest(test)
+
+
+class CacheClearingResult(CacheClearingResultMixin, unittest.TextTestResult):
+    pass
+
+
+class CacheClearingRemoteResult(CacheClearingResultMixin, RemoteTestResult):
+    pass
+
+
+class CacheClearingRemoteRunner(RemoteTestRunner):
+    resultclass = CacheClearingRemoteResult
+
+
+class CacheClearingParallelSuite(ParallelTestSuite):
+    # Used by the worker processes of --parallel runs
+    runner_class = CacheClearingRemoteRunner
+
+
+class TestRunner(DiscoverRunner):
+    parallel_test_suite = CacheClearingParallelSuite
+
+    def get_resultclass(self):
+        resultclass = super().get_resultclass()
+        if resultclass is None:
+            return CacheClearingResult
+        # --debug-sql and --pdb results
+        return type(resultclass.__name__, (CacheClearingResultMixin, resultclass), {})
@@ -321,4 +321,16 @@ def stripe_webhook(request):
             print(f"Error in webhook handler: {str(e)}")
             return JsonResponse({'error': str(e)}, status=500)
     
+    elif event['type'] == 'customer.subscription.deleted':
+        stripe_subscription = event['data']['object']
+        
+        # Saving (not queryset.update) so the feed and entitlement signals run
+        for subscription in Subscription.objects.filter(
+            stripe_subscription_id=stripe_subscription['id'],
+            active=True
+        ):
+            subscription.active = False
+            subscription.save()
+            print(f"Deactivated subscription from webhook: {subscription.id}")  # Debug log
+    
     return JsonResponse({'status': 'success'}) 
\ No newline at end of file